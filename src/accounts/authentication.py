@@ -0,0 +1,99 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache, caches
+from django.utils.translation import gettext_lazy as _
+from drf_spectacular.contrib.rest_framework_simplejwt import SimpleJWTScheme
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from config.db_routers import note_authenticated_user
+
+
+def user_cache_key(user_id) -> str:
+    return f"auth_user_{user_id}"
+
+
+def user_version_key(user_id) -> str:
+    return f"auth_user_version_{user_id}"
+
+
+def get_cached_user(user_id):
+    """Resolve a user by token id claim, hitting the user table only on a cache miss.
+
+    The user is cached per process together with the user's version stamp from the
+    shared cache. The stamp is re-read at most every ``AUTH_USER_STAMP_CHECK_SECONDS``,
+    so most requests make no round trip at all; a save on another worker is seen
+    within that interval, and one on this worker at once. The stamp is read before
+    the user row, so a change racing with the load is caught on the next check.
+    """
+    key = user_cache_key(user_id)
+    ttl = getattr(settings, "AUTH_USER_CACHE_TTL_SECONDS", 60)
+    now = time.monotonic()
+    entry = cache.get(key)
+    if entry is not None:
+        version, user, loaded_at, checked_at = entry
+        if now - checked_at < getattr(settings, "AUTH_USER_STAMP_CHECK_SECONDS", 5):
+            return user
+    version = caches["shared"].get(user_version_key(user_id), 0)
+    if entry is not None and entry[0] == version:
+        _, user, loaded_at, _ = entry
+        # Still current: note the check but keep the original expiry, which bounds bulk updates.
+        remaining = ttl - (now - loaded_at)
+        if remaining > 0:
+            cache.set(key, (version, user, loaded_at, now), remaining)
+            return user
+    user = get_user_model().objects.filter(**{api_settings.USER_ID_FIELD: user_id}).first()
+    if user is not None:
+        cache.set(key, (version, user, now, now), ttl)
+    return user
+
+
+def invalidate_cached_user(user_id) -> None:
+    """Bump the user's shared version stamp, which retires the cached copy in every worker.
+
+    This worker's copy is dropped at once; others notice at their next stamp check.
+    """
+    shared = caches["shared"]
+    try:
+        shared.incr(user_version_key(user_id))
+    except ValueError:
+        shared.set(user_version_key(user_id), 1, None)
+    cache.delete(user_cache_key(user_id))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication that resolves the user from a short-TTL cache.
+
+    Saving or deleting a user bumps their version stamp in the shared cache (see
+    accounts.signals), so deactivation and password changes take effect at once on
+    the saving worker and within ``AUTH_USER_STAMP_CHECK_SECONDS`` on the others. Bulk ``QuerySet.update()`` calls bypass signals and are
+    bounded by the TTL instead.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_("Token contained no recognizable user identification")) from e
+
+        user = get_cached_user(user_id)
+        if user is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+
+        note_authenticated_user(user)
+        return user
+
+
+class CachedJWTScheme(SimpleJWTScheme):
+    target_class = "accounts.authentication.CachedJWTAuthentication"
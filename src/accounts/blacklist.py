@@ -0,0 +1,133 @@
+import hashlib
+import math
+import threading
+import time
+from datetime import timedelta
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Max
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+GENERATION_KEY = "auth_blacklist_generation"
+EPOCH_KEY = "auth_blacklist_epoch"
+
+# Blacklist rows younger than this may still sit behind an uncommitted insert with a
+# lower id, so the incremental sync only advances past rows older than it.
+SETTLE_SECONDS = 30
+
+
+class BloomFilter:
+    """Probabilistic set membership: no false negatives, tunable false positives."""
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        self.capacity = max(capacity, 1)
+        self.size = max(8, int(-self.capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / self.capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, item: str) -> None:
+        for pos in self._positions(item):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+
+class BlacklistFilter:
+    """Process-local Bloom filter over blacklisted refresh-token JTIs.
+
+    A negative answer is authoritative; a positive one must be confirmed against
+    the database. Checks answer from memory; every ``AUTH_BLACKLIST_SYNC_SECONDS``
+    the filter reads the generation and epoch keys from the shared cache. Every
+    committed blacklist row bumps the generation (see accounts.signals), and a
+    changed generation loads the new rows, so a token blacklisted on any worker
+    or replica is caught everywhere within the interval (at once on the worker
+    that blacklisted it). A purge changes the epoch key, which makes every worker
+    rebuild from the remaining unexpired rows.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        self._bloom = None
+        self._last_id = 0
+        # Rows past ``_last_id`` already added while they settle, so reloads do not add them twice.
+        self._unsettled = set()
+        self._generation = None
+        self._epoch = None
+        self._synced_at = 0.0
+
+    def might_contain(self, jti: str) -> bool:
+        self._sync()
+        return jti in self._bloom
+
+    def add(self, jti: str) -> None:
+        with self._lock:
+            if self._bloom is not None:
+                self._bloom.add(jti)
+
+    def _sync(self) -> None:
+        interval = getattr(settings, "AUTH_BLACKLIST_SYNC_SECONDS", 5)
+        with self._lock:
+            if self._bloom is not None and time.monotonic() - self._synced_at < interval:
+                return
+        state = caches["shared"].get_many([GENERATION_KEY, EPOCH_KEY])
+        generation, epoch = state.get(GENERATION_KEY), state.get(EPOCH_KEY)
+        with self._lock:
+            if self._bloom is None or epoch != self._epoch or self._bloom.count > self._bloom.capacity:
+                self._rebuild()
+            elif generation != self._generation or self._unsettled:
+                self._load_since(self._last_id)
+            self._generation, self._epoch = generation, epoch
+            self._synced_at = time.monotonic()
+
+    def _rebuild(self) -> None:
+        now = timezone.now()
+        settled = BlacklistedToken.objects.filter(blacklisted_at__lt=now - timedelta(seconds=SETTLE_SECONDS))
+        last_id = settled.aggregate(last_id=Max("id"))["last_id"] or 0
+        # Expired tokens fail signature checks anyway, so only live JTIs need bits.
+        jtis = list(
+            BlacklistedToken.objects.filter(token__expires_at__gt=now).values_list("token__jti", flat=True).iterator()
+        )
+        self._bloom = BloomFilter(max(getattr(settings, "AUTH_BLACKLIST_FILTER_CAPACITY", 10000), 2 * len(jtis)))
+        for jti in jtis:
+            self._bloom.add(jti)
+        self._last_id = last_id
+        self._unsettled = set(
+            BlacklistedToken.objects.filter(id__gt=last_id, token__expires_at__gt=now).values_list("id", flat=True)
+        )
+
+    def _load_since(self, last_id: int) -> None:
+        settled_before = timezone.now() - timedelta(seconds=SETTLE_SECONDS)
+        rows = BlacklistedToken.objects.filter(id__gt=last_id).values_list("id", "token__jti", "blacklisted_at")
+        for row_id, jti, blacklisted_at in rows.iterator():
+            if row_id not in self._unsettled:
+                self._bloom.add(jti)
+                self._unsettled.add(row_id)
+            if blacklisted_at < settled_before:
+                self._last_id = max(self._last_id, row_id)
+        self._unsettled = {row_id for row_id in self._unsettled if row_id > self._last_id}
+
+
+def bump_generation() -> None:
+    caches["shared"].set(GENERATION_KEY, uuid4().hex, timeout=None)
+
+
+def bump_epoch() -> None:
+    caches["shared"].set(EPOCH_KEY, uuid4().hex, timeout=None)
+
+
+blacklist_filter = BlacklistFilter()
@@ -0,0 +1,48 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+from accounts.blacklist import bump_epoch
+
+
+class Command(BaseCommand):
+    help = "Delete expired outstanding and blacklisted tokens in small batches"
+    # Set by the job runner when its lease is lost; checked between batches.
+    stealth_options = ("stop",)
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000, help="Rows deleted per transaction")
+        parser.add_argument("--sleep", type=float, default=0.05, help="Seconds to pause between batches")
+
+    def handle(self, *args, **options):
+        batch_size = max(1, options["batch_size"])
+        cutoff = timezone.now()
+        outstanding = blacklisted = batches = 0
+        stop = options.get("stop")
+
+        while stop is None or not stop.is_set():
+            # Short transactions keyed on primary keys keep row locks brief while the tables shrink.
+            ids = list(
+                OutstandingToken.objects.filter(expires_at__lte=cutoff)
+                .order_by("id")
+                .values_list("id", flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+            with transaction.atomic():
+                blacklisted += BlacklistedToken.objects.filter(token_id__in=ids).delete()[0]
+                outstanding += OutstandingToken.objects.filter(id__in=ids).delete()[0]
+            batches += 1
+            if options["sleep"]:
+                time.sleep(options["sleep"])
+
+        if outstanding:
+            bump_epoch()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Purged {outstanding} outstanding and {blacklisted} blacklisted tokens in {batches} batches"
+            )
+        )
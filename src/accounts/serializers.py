@@ -1,5 +1,13 @@
 from django.contrib.auth import get_user_model
 from rest_framework import serializers
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+
+from coins.models import Watchlist
+from coins.prefetch import prefetch_watchlist
+from .authentication import get_cached_user
+from .tokens import FilteredRefreshToken
 
 
 User = get_user_model()
@@ -27,3 +35,39 @@ class UserSerializer(serializers.ModelSerializer):
         fields = ["id", "username", "email", "first_name", "last_name"]
 
 
+class LoginSerializer(TokenObtainPairSerializer):
+    """Token pair login that starts prefetching the user's watchlisted coins."""
+
+    def validate(self, attrs):
+        data = super().validate(attrs)
+        coin_ids = Watchlist.objects.filter(user=self.user).order_by("-added_at").values_list("coin__cg_id", flat=True)
+        prefetch_watchlist(coin_ids)
+        return data
+
+
+class RefreshSerializer(TokenRefreshSerializer):
+    """Token refresh using the blacklist filter and the cached user lookup."""
+
+    token_class = FilteredRefreshToken
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs["refresh"])
+
+        user_id = refresh.payload.get(api_settings.USER_ID_CLAIM, None)
+        if user_id:
+            user = get_cached_user(user_id)
+            if user is None or not api_settings.USER_AUTHENTICATION_RULE(user):
+                raise AuthenticationFailed(self.error_messages["no_active_account"], "no_active_account")
+
+        data = {"access": str(refresh.access_token)}
+
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            if api_settings.BLACKLIST_AFTER_ROTATION:
+                refresh.blacklist()
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            refresh.outstand()
+            data["refresh"] = str(refresh)
+
+        return data
@@ -1,6 +1,20 @@
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
+
 from django.urls import reverse
 from rest_framework.test import APITestCase
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import override_settings
+from django.utils import timezone
+
+from .authentication import invalidate_cached_user
+from .blacklist import BlacklistFilter, blacklist_filter
+from .tokens import FilteredRefreshToken
 
 
 class TestAuth(APITestCase):
@@ -21,3 +35,79 @@ class TestAuth(APITestCase):
         self.assertEqual(resp.status_code, 200)
         self.assertEqual(resp.data.get("username"), "tester")
 
+
+class TestCachedJWTAuthentication(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(username="cached", password="StrongPass123!")
+        resp = self.client.post("/api/auth/login", {"username": "cached", "password": "StrongPass123!"}, format="json")
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {resp.data['access']}")
+
+    def test_repeat_requests_skip_user_query(self):
+        self.assertEqual(self.client.get("/api/auth/me").status_code, 200)
+        with self.assertNumQueries(0):
+            resp = self.client.get("/api/auth/me")
+        self.assertEqual(resp.data.get("username"), "cached")
+
+    @override_settings(AUTH_USER_STAMP_CHECK_SECONDS=0)
+    def test_invalidation_on_another_worker_retires_local_copy(self):
+        self.assertEqual(self.client.get("/api/auth/me").status_code, 200)
+        get_user_model().objects.filter(pk=self.user.pk).update(is_active=False)
+        with patch.object(cache, "delete"):  # the save happened elsewhere: only the shared stamp moves
+            invalidate_cached_user(self.user.pk)
+        self.assertEqual(self.client.get("/api/auth/me").status_code, 401)
+
+    def test_deactivation_revokes_cached_user(self):
+        self.assertEqual(self.client.get("/api/auth/me").status_code, 200)
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get("/api/auth/me").status_code, 401)
+
+
+class TestTokenBlacklist(APITestCase):
+    def setUp(self):
+        cache.clear()
+        blacklist_filter.reset()
+        get_user_model().objects.create_user(username="leaver", password="StrongPass123!")
+        resp = self.client.post("/api/auth/login", {"username": "leaver", "password": "StrongPass123!"}, format="json")
+        self.refresh = resp.data["refresh"]
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {resp.data['access']}")
+
+    def test_refresh_rejected_after_logout(self):
+        self.assertEqual(self.client.post("/api/auth/refresh", {"refresh": self.refresh}, format="json").status_code, 200)
+        self.assertEqual(self.client.post("/api/auth/logout", {"refresh": self.refresh}, format="json").status_code, 200)
+        resp = self.client.post("/api/auth/refresh", {"refresh": self.refresh}, format="json")
+        self.assertEqual(resp.status_code, 401)
+
+    @override_settings(AUTH_BLACKLIST_SYNC_SECONDS=0)
+    def test_blacklisting_reaches_other_workers_on_their_next_sync(self):
+        other_worker = BlacklistFilter()
+        self.assertFalse(other_worker.might_contain("unrelated"))
+        token = FilteredRefreshToken(self.refresh)
+        with self.captureOnCommitCallbacks(execute=True):
+            token.blacklist()
+        cache.clear()  # the other worker does not share this process's cache
+        self.assertTrue(other_worker.might_contain(token["jti"]))
+
+        # Rows still settling are not added again by later syncs.
+        count = other_worker._bloom.count
+        with self.captureOnCommitCallbacks(execute=True):
+            RefreshToken.for_user(get_user_model().objects.get(username="leaver")).blacklist()
+        other_worker.might_contain("unrelated")
+        other_worker.might_contain("unrelated")
+        self.assertEqual(other_worker._bloom.count, count + 1)
+
+    def test_checks_between_syncs_make_no_round_trips(self):
+        worker = BlacklistFilter()
+        worker.might_contain("warm-up")
+        with self.assertNumQueries(0):
+            self.assertFalse(worker.might_contain("unrelated"))
+
+    def test_purge_removes_only_expired_tokens(self):
+        self.client.post("/api/auth/logout", {"refresh": self.refresh}, format="json")
+        OutstandingToken.objects.update(expires_at=timezone.now() - timedelta(days=1))
+        live = get_user_model().objects.create_user(username="stayer", password="StrongPass123!")
+        RefreshToken.for_user(live)
+        call_command("purge_expired_tokens", batch_size=1, sleep=0, stdout=StringIO())
+        self.assertEqual(OutstandingToken.objects.count(), 1)
+        self.assertEqual(BlacklistedToken.objects.count(), 0)
@@ -3,9 +3,9 @@ from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
-from rest_framework_simplejwt.tokens import RefreshToken
 from drf_spectacular.utils import extend_schema, OpenApiParameter
-from .serializers import RegisterSerializer, UserSerializer
+from .serializers import LoginSerializer, RefreshSerializer, RegisterSerializer, UserSerializer
+from .tokens import FilteredRefreshToken
 
 
 class RegisterView(APIView):
@@ -31,10 +31,12 @@ class RegisterView(APIView):
 
 class LoginView(TokenObtainPairView):
     permission_classes = [AllowAny]
+    serializer_class = LoginSerializer
 
 
 class RefreshView(TokenRefreshView):
     permission_classes = [AllowAny]
+    serializer_class = RefreshSerializer
 
 
 class LogoutView(APIView):
@@ -45,7 +47,7 @@ class LogoutView(APIView):
         if not refresh_token:
             return Response({"detail": "refresh token required"}, status=status.HTTP_400_BAD_REQUEST)
         try:
-            token = RefreshToken(refresh_token)
+            token = FilteredRefreshToken(refresh_token)
             token.blacklist()
         except Exception:  # pylint: disable=broad-except
             return Response({"detail": "invalid token"}, status=status.HTTP_400_BAD_REQUEST)
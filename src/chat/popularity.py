@@ -0,0 +1,192 @@
+import hashlib
+import heapq
+import logging
+import threading
+import time
+from array import array
+from typing import Dict, List, Tuple
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+
+class CountMinSketch:
+    """Fixed-size frequency estimator. Estimates may overcount but never undercount."""
+
+    def __init__(self, width: int = 2048, depth: int = 4):
+        self.width = width
+        self.depth = depth
+        self.rows = [array("Q", [0]) * width for _ in range(depth)]
+
+    def _indexes(self, item: str) -> List[int]:
+        # Stable across processes (unlike hash()), so sketches from different workers can be merged.
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.width for i in range(self.depth)]
+
+    def add(self, item: str, count: int = 1) -> int:
+        estimate = None
+        for row, idx in zip(self.rows, self._indexes(item), strict=True):
+            row[idx] += count
+            estimate = row[idx] if estimate is None else min(estimate, row[idx])
+        return estimate or 0
+
+    def estimate(self, item: str) -> int:
+        return min(row[idx] for row, idx in zip(self.rows, self._indexes(item), strict=True))
+
+    def merge(self, other: "CountMinSketch") -> None:
+        if (other.width, other.depth) != (self.width, self.depth):
+            raise ValueError("Cannot merge sketches of different dimensions")
+        for row, other_row in zip(self.rows, other.rows, strict=True):
+            for idx, value in enumerate(other_row):
+                if value:
+                    row[idx] += value
+
+    def __bool__(self) -> bool:
+        return any(any(row) for row in self.rows)
+
+
+class TopK:
+    """Bounded set of the k items with the highest estimated counts."""
+
+    def __init__(self, k: int):
+        self.k = k
+        self.counts: Dict[str, int] = {}
+        self._heap: List[Tuple[int, str]] = []
+
+    def offer(self, item: str, count: int) -> None:
+        if item in self.counts or len(self.counts) < self.k:
+            self.counts[item] = count
+            heapq.heappush(self._heap, (count, item))
+        else:
+            min_count, min_item = self._peek_min()
+            if count <= min_count:
+                return
+            del self.counts[min_item]
+            self.counts[item] = count
+            heapq.heappush(self._heap, (count, item))
+        if len(self._heap) > 4 * self.k:
+            self._heap = [(c, i) for i, c in self.counts.items()]
+            heapq.heapify(self._heap)
+
+    def _peek_min(self) -> Tuple[int, str]:
+        # Heap entries are never updated in place; skip ones superseded by a later offer.
+        while True:
+            count, item = self._heap[0]
+            if self.counts.get(item) == count:
+                return count, item
+            heapq.heappop(self._heap)
+
+    def items(self) -> List[Tuple[str, int]]:
+        return sorted(self.counts.items(), key=lambda kv: (-kv[1], kv[0]))
+
+
+class PopularityTracker:
+    """Streaming heavy-hitters over canonical keys (suggestion phrases, requested cache keys).
+
+    Each worker counts into a local delta sketch. A daemon thread, started with
+    the server (see config/asgi.py), folds it into a shared sketch in the shared
+    cache every merge interval and refreshes the served top-k from the merged
+    counts, so requests never merge and an idle worker still serves what the
+    other workers have seen.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        capacity: int = 32,
+        width: int = 2048,
+        depth: int = 4,
+        merge_setting: str = "CHAT_SUGGESTIONS_MERGE_SECONDS",
+    ):
+        self.name = name
+        self.capacity = capacity
+        self.merge_setting = merge_setting
+        self.width = width
+        self.depth = depth
+        self._lock = threading.Lock()
+        self._worker = None
+        self.reset()
+
+    @property
+    def cache_key(self) -> str:
+        return f"popularity_{self.name}"
+
+    def reset(self) -> None:
+        with self._lock:
+            self._delta = CountMinSketch(self.width, self.depth)
+            self._local = TopK(self.capacity)
+            self._snapshot: Tuple[Tuple[str, int], ...] = ()
+
+    def record(self, key: str) -> None:
+        """Count one occurrence of ``key``, which callers pass in canonical form."""
+        with self._lock:
+            self._local.offer(key, self._delta.add(key))
+
+    def top(self) -> Tuple[Tuple[str, int], ...]:
+        """Top-k merged across workers, as of this worker's last sync."""
+        return self._snapshot
+
+    def start(self) -> None:
+        """Start the background sync; the first round runs at once so a new worker has suggestions."""
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name=f"popularity-{self.name}", daemon=True)
+                self._worker.start()
+
+    def _run(self) -> None:
+        while True:
+            try:
+                self.sync()
+            except Exception:  # a failed round must not stop future ones
+                logger.exception("Popularity sync for %s failed", self.name)
+            finally:
+                # The worker outlives requests, so nothing else closes its connection.
+                connection.close()
+            time.sleep(getattr(settings, self.merge_setting, 30))
+
+    def sync(self) -> None:
+        """Fold this worker's counts into the shared sketch and refresh the served top-k."""
+        with self._lock:
+            delta, local = self._delta, self._local
+            self._delta, self._local = CountMinSketch(self.width, self.depth), TopK(self.capacity)
+        if delta and not self._merge(delta, local):
+            # Another worker is merging; keep the counts for the next round.
+            with self._lock:
+                self._delta.merge(delta)
+                for item in local.counts:
+                    self._local.offer(item, self._delta.estimate(item))
+        self._snapshot = self.shared_top()
+
+    def _merge(self, delta: CountMinSketch, local: TopK) -> bool:
+        shared_cache = caches["shared"]
+        lock_key = f"{self.cache_key}_lock"
+        if not shared_cache.add(lock_key, 1, timeout=10):
+            return False
+        try:
+            shared = shared_cache.get(self.cache_key) or {}
+            sketch = shared.get("sketch")
+            if not isinstance(sketch, CountMinSketch) or sketch.width != self.width or sketch.depth != self.depth:
+                sketch = CountMinSketch(self.width, self.depth)
+            sketch.merge(delta)
+
+            top = TopK(self.capacity)
+            for item in set(shared.get("top", {})) | set(local.counts):
+                top.offer(item, sketch.estimate(item))
+            shared_cache.set(self.cache_key, {"sketch": sketch, "top": top.counts}, timeout=None)
+        finally:
+            shared_cache.delete(lock_key)
+        return True
+
+    def shared_top(self) -> Tuple[Tuple[str, int], ...]:
+        """Top-k as last merged by any worker, read from the shared cache."""
+        shared = caches["shared"].get(self.cache_key) or {}
+        counts = shared.get("top") or {}
+        return tuple(sorted(counts.items(), key=lambda kv: (-kv[1], kv[0])))
+
+
+query_popularity = PopularityTracker("chat_queries")
@@ -1,6 +1,13 @@
 from unittest.mock import patch
 from rest_framework.test import APITestCase
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import SimpleTestCase
+from django.test.utils import CaptureQueriesContext
+
+from coins.models import Coin
+from .popularity import CountMinSketch, PopularityTracker, TopK, query_popularity
 
 
 class TestQaApi(APITestCase):
@@ -25,3 +32,62 @@ class TestQaApi(APITestCase):
         self.assertEqual(resp.status_code, 200)
         self.assertIn("prices", resp.data)
 
+
+class TestSuggestionsApi(APITestCase):
+    def setUp(self):
+        cache.clear()
+        query_popularity.reset()
+        User = get_user_model()
+        User.objects.create_user(username="u3", password="pass12345")
+        resp = self.client.post("/api/auth/login", {"username": "u3", "password": "pass12345"}, format="json")
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {resp.data['access']}")
+
+    def test_defaults_without_traffic(self):
+        resp = self.client.get("/api/chat/suggestions")
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.data["suggestions"][0], "Price of Bitcoin")
+
+    def test_popular_questions_rank_first_in_canonical_form(self):
+        Coin.objects.create(cg_id="solana", symbol="SOL", name="Solana")
+        Coin.objects.create(cg_id="bitcoin", symbol="BTC", name="Bitcoin")
+        for message in ("What is the PRICE of solana??", "price of  Solana", "solana price") * 2:
+            self.client.post("/api/chat/message", {"message": message}, format="json")
+        for _ in range(3):
+            self.client.post("/api/chat/message", {"message": "btc 30 day trend"}, format="json")
+        self.client.post("/api/chat/message", {"message": "bitcoin 24h change"}, format="json")  # below the minimum
+        for _ in range(5):
+            self.client.post("/api/chat/message", {"message": "my seed phrase is apple banana"}, format="json")
+        query_popularity.sync()
+        resp = self.client.get("/api/chat/suggestions")
+        self.assertEqual(resp.data["suggestions"], [
+            "Price of Solana", "30-day trend of Bitcoin", "Price of Bitcoin", "24h change of Ethereum",
+        ])
+
+    def test_coin_names_are_looked_up_once(self):
+        Coin.objects.create(cg_id="solana", symbol="SOL", name="Solana")
+        self.client.post("/api/chat/message", {"message": "price of solana"}, format="json")
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post("/api/chat/message", {"message": "What is the PRICE of solana??"}, format="json")
+        self.assertFalse([q for q in queries if "coins_coin" in q["sql"]])
+
+    def test_idle_worker_serves_suggestions_merged_elsewhere(self):
+        other_worker = PopularityTracker("chat_queries")
+        for _ in range(3):
+            other_worker.record("Show top coins")
+        other_worker.sync()
+        query_popularity.sync()  # this worker's background round, without any local traffic
+        self.assertEqual(self.client.get("/api/chat/suggestions").data["suggestions"][0], "Show top coins")
+
+
+class TestPopularitySketch(SimpleTestCase):
+    def test_merged_sketch_keeps_heavy_hitters(self):
+        sketch = CountMinSketch(width=64, depth=3)
+        other = CountMinSketch(width=64, depth=3)
+        top = TopK(2)
+        for i in range(200):
+            item = "hot" if i % 2 else f"cold-{i}"
+            top.offer(item, sketch.add(item))
+        other.add("hot", 5)
+        sketch.merge(other)
+        self.assertGreaterEqual(sketch.estimate("hot"), 105)
+        self.assertEqual(top.items()[0][0], "hot")
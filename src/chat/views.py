@@ -5,7 +5,12 @@ from rest_framework.response import Response
 from rest_framework import status
 from drf_spectacular.utils import extend_schema
 
+from django.conf import settings
+from django.core.cache import cache
+
+from coins.models import Coin
 from coins.services import fetch_coin_market_by_id, fetch_coin_history
+from .popularity import query_popularity
 
 
 COIN_SYNONYMS = {
@@ -13,6 +18,18 @@ COIN_SYNONYMS = {
     'ethereum': ['eth', 'ethereum'],
 }
 
+DEFAULT_SUGGESTIONS = [
+    "Price of Bitcoin",
+    "24h change of Ethereum",
+    "Show top coins",
+    "BTC last week trend",
+]
+
+# Windows a trend question may name and still become a suggestion.
+SUGGESTION_DAYS = (1, 7, 14, 30, 90, 365)
+# Coin names are looked up per chat message, so they are cached rather than queried each time.
+COIN_NAME_CACHE_SECONDS = 3600
+
 
 def normalize_coin(q: str) -> str | None:
     ql = q.lower()
@@ -30,6 +47,47 @@ def normalize_coin(q: str) -> str | None:
     return parts[-1] if parts else None
 
 
+def coin_name(coin_id: str) -> str | None:
+    """Display name of a stored coin, or None if there is no such coin."""
+    name = cache.get_or_set(
+        f"chat_coin_name_{coin_id}",
+        lambda: Coin.objects.filter(cg_id=coin_id).values_list("name", flat=True).first() or "",
+        COIN_NAME_CACHE_SECONDS,
+    )
+    return name or None
+
+
+def suggestion_for(text: str, coin_id: str | None = None) -> str | None:
+    """Canonical wording of a question the assistant answers, or None.
+
+    Only these phrasings are counted for suggestions, so nothing a user typed is
+    ever shown to other users verbatim. Pass ``coin_id`` when the caller has
+    already normalized the question.
+    """
+    ql = text.lower()
+    if "top" in ql and "coin" in ql:
+        return "Show top coins"
+    coin_id = coin_id or normalize_coin(ql)
+    name = coin_name(coin_id) if coin_id else None
+    if name is None:
+        return "Global market overview" if "market" in ql else None
+    if "price" in ql:
+        return f"Price of {name}"
+    if "change" in ql or "24h" in ql:
+        return f"24h change of {name}"
+    m = re.search(r"(\d+)[- ]?day", ql)
+    days = int(m.group(1)) if m else 7
+    if "trend" in ql and days in SUGGESTION_DAYS:
+        return f"{days}-day trend of {name}"
+    return None
+
+
+def record_suggestion(text: str, coin_id: str | None = None) -> None:
+    phrase = suggestion_for(text, coin_id)
+    if phrase:
+        query_popularity.record(phrase)
+
+
 class QaQueryView(APIView):
     permission_classes = [IsAuthenticated]
 
@@ -66,6 +124,7 @@ class QaQueryView(APIView):
 
         ql = text.lower()
         coin_id = normalize_coin(ql)
+        record_suggestion(text, coin_id)
         if not coin_id:
             return Response({"answer": "Sorry, I couldn't identify the coin."})
 
@@ -87,18 +146,20 @@ class SuggestionsView(APIView):
 
     @extend_schema(
         summary="Autocomplete suggestions",
-        description="Return simple suggestions for coin-related queries.",
+        description="Return the most popular recent questions across all workers, padded with default suggestions.",
         tags=["Chat Assistant"],
     )
     def get(self, request):
-        return Response({
-            "suggestions": [
-                "Price of Bitcoin",
-                "24h change of Ethereum",
-                "Show top coins",
-                "BTC last week trend",
-            ]
-        })
+        count = getattr(settings, "CHAT_SUGGESTIONS_COUNT", 4)
+        min_count = getattr(settings, "CHAT_SUGGESTIONS_MIN_COUNT", 3)
+        suggestions = [phrase for phrase, seen in query_popularity.top() if seen >= min_count][:count]
+        seen = {s.lower() for s in suggestions}
+        for default in DEFAULT_SUGGESTIONS:
+            if len(suggestions) >= count:
+                break
+            if default.lower() not in seen:
+                suggestions.append(default)
+        return Response({"suggestions": suggestions})
 
 
 class ChatMessageView(APIView):
@@ -130,7 +191,8 @@ class ChatMessageView(APIView):
         message = request.data.get('message', '').strip()
         if not message:
             return Response({"detail": "Message is required"}, status=status.HTTP_400_BAD_REQUEST)
-        
+
+        record_suggestion(message)
         message_lower = message.lower()
         
         if "bitcoin" in message_lower or "btc" in message_lower:
@@ -0,0 +1,111 @@
+from bisect import bisect_left
+from typing import Any, Dict, List, Optional, Sequence
+
+from django.conf import settings
+from django.core.cache import cache
+
+from monitoring.metrics import record_cache_lookup
+from .codec import chart_columns
+from .services import cache_family, fetch_coin_history
+
+INTERVAL_MS = {
+    "5m": 300_000,
+    "15m": 900_000,
+    "1h": 3_600_000,
+    "4h": 14_400_000,
+    "1d": 86_400_000,
+    "1w": 604_800_000,
+}
+
+
+def source_resolution_ms(days: int) -> int:
+    """CoinGecko's automatic market_chart granularity: 5-minutely for 1 day, hourly up to 90 days, daily beyond."""
+    if days <= 1:
+        return INTERVAL_MS["5m"]
+    if days <= 90:
+        return INTERVAL_MS["1h"]
+    return INTERVAL_MS["1d"]
+
+
+DEFAULT_INTERVALS = {1: "15m", 7: "1h", 30: "4h", 90: "1d", 365: "1w"}
+
+# Weekly buckets start on Monday like the weekly rollups (the epoch fell on a Thursday).
+WEEK_ORIGIN_MS = 4 * 86_400_000
+
+Candle = List[float]  # [bucket_start_ms, open, high, low, close, volume]
+
+
+def ohlc_cache_key(coin_id: str, days: int, interval: str) -> str:
+    return f"coins_ohlc_{coin_id}_{days}_{interval}"
+
+
+def bin_ohlc(
+    timestamps: Sequence[int], prices: Sequence[float], volumes: Sequence[Optional[float]], interval_ms: int
+) -> List[Candle]:
+    """Resample time-ordered points into candles in one pass of integer bucket arithmetic.
+
+    ``volume`` is CoinGecko's rolling 24h volume at the candle's last point.
+    """
+    origin = WEEK_ORIGIN_MS if interval_ms == INTERVAL_MS["1w"] else 0
+    candles: List[Candle] = []
+    current = None
+    candle: Candle = []
+    for ts, price, volume in zip(timestamps, prices, volumes, strict=True):
+        if price is None:
+            continue
+        bucket = (ts - origin) // interval_ms
+        if bucket != current:
+            current = bucket
+            candle = [bucket * interval_ms + origin, price, price, price, price, volume]
+            candles.append(candle)
+            continue
+        if price > candle[2]:
+            candle[2] = price
+        elif price < candle[3]:
+            candle[3] = price
+        candle[4] = price
+        if volume is not None:
+            candle[5] = volume
+    return candles
+
+
+def coin_candles(coin_id: str, days: int, interval: str) -> List[Candle]:
+    """Candles for the last ``days`` of ``coin_id``, cached per (coin, range, interval).
+
+    When the underlying series is refreshed, completed candles still wholly inside
+    the new window are kept; the first bucket (which lost its oldest points as the
+    window slid) and the last (possibly partial) candle onwards are rebinned from
+    the new points, so the result equals a full rebin.
+    """
+    interval_ms = INTERVAL_MS[interval]
+    columns = chart_columns(fetch_coin_history(coin_id, days=days))
+    timestamps = columns["timestamps"]
+    if not timestamps:
+        return []
+
+    key = ohlc_cache_key(coin_id, days, interval)
+    cached: Dict[str, Any] = cache.get(key) or {}
+    record_cache_lookup(cache_family(key), bool(cached))
+    candles: List[Candle] = cached.get("candles") or []
+    if candles and cached.get("last_ts") == timestamps[-1]:
+        return candles
+
+    first_bucket = timestamps[0] - (timestamps[0] - (WEEK_ORIGIN_MS if interval == "1w" else 0)) % interval_ms
+    kept = [c for c in candles[:-1] if c[0] > first_bucket]
+    if kept:
+        head = bisect_left(timestamps, kept[0][0])
+        start = bisect_left(timestamps, candles[-1][0])
+        candles = (
+            bin_ohlc(timestamps[:head], columns["prices"][:head], columns["volumes"][:head], interval_ms)
+            + kept
+            + bin_ohlc(timestamps[start:], columns["prices"][start:], columns["volumes"][start:], interval_ms)
+        )
+    else:
+        candles = bin_ohlc(timestamps, columns["prices"], columns["volumes"], interval_ms)
+
+    cache.set(
+        key,
+        {"last_ts": timestamps[-1], "candles": candles},
+        getattr(settings, "COINS_OHLC_CACHE_TTL_SECONDS", 3600),
+    )
+    return candles
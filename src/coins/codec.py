@@ -0,0 +1,227 @@
+"""Compact cache representations of CoinGecko payloads.
+
+Entries keep only the fields the views read. Chart series are stored as packed
+little-endian float64 columns, zlib-compressed once they are big enough for it
+to pay off, instead of lists of ``[timestamp, value]`` lists. The columnar
+response formats of PriceHistoryView live here too.
+"""
+import struct
+import sys
+import zlib
+from array import array
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+MARKET_FIELDS = (
+    "id",
+    "symbol",
+    "name",
+    "image",
+    "current_price",
+    "market_cap",
+    "market_cap_rank",
+    "total_volume",
+    "price_change_percentage_24h",
+)
+
+DETAIL_USD_FIELDS = ("current_price", "market_cap", "total_volume", "ath", "atl")
+DETAIL_SCALAR_FIELDS = (
+    "price_change_percentage_24h",
+    "price_change_percentage_7d",
+    "price_change_percentage_30d",
+    "market_cap_rank",
+    "circulating_supply",
+    "total_supply",
+    "max_supply",
+)
+
+CHART_SERIES = ("prices", "market_caps", "total_volumes")
+
+# Below this many raw bytes zlib's header and CPU cost are not worth it.
+COMPRESS_MIN_BYTES = 1024
+
+PACKED_CHART_VERSION = 1
+
+# Response columns in PriceHistoryView naming, keyed by market_chart series.
+RESPONSE_COLUMNS = (("prices", "prices"), ("total_volumes", "volumes"), ("market_caps", "marketCaps"))
+
+# magic, version, column count, byte length of the names, row count
+BINARY_CHART_HEADER = struct.Struct("<4sBBHI")
+BINARY_CHART_MAGIC = b"CDCH"
+BINARY_CHART_VERSION = 1
+
+# magic, version, column count, row count; then names and the zlib body
+INTRADAY_HEADER = struct.Struct("<4sBBI")
+INTRADAY_MAGIC = b"CDID"
+INTRADAY_VERSION = 1
+
+
+def trim_market(items: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [{field: item.get(field) for field in MARKET_FIELDS if field in item} for item in items]
+
+
+def trim_coin_detail(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Project ``/coins/{id}`` down to what CoinDetailView reads, keeping its nested shape."""
+    market_data = data.get("market_data") or {}
+    trimmed_market = {
+        field: {"usd": (market_data.get(field) or {}).get("usd")} for field in DETAIL_USD_FIELDS if field in market_data
+    }
+    trimmed_market.update({field: market_data[field] for field in DETAIL_SCALAR_FIELDS if field in market_data})
+    trimmed = {key: data[key] for key in ("id", "name", "symbol") if key in data}
+    if "image" in data:
+        trimmed["image"] = {"large": (data.get("image") or {}).get("large", "")}
+    trimmed["market_data"] = trimmed_market
+    return trimmed
+
+
+def pack_floats(values: Sequence[float]) -> bytes:
+    column = array("d", values)
+    if sys.byteorder != "little":
+        column.byteswap()
+    raw = column.tobytes()
+    if len(raw) >= COMPRESS_MIN_BYTES:
+        return b"z" + zlib.compress(raw, 1)
+    return b"r" + raw
+
+
+def unpack_floats(blob: bytes) -> array:
+    raw = zlib.decompress(blob[1:]) if blob[:1] == b"z" else blob[1:]
+    column = array("d")
+    column.frombytes(raw)
+    if sys.byteorder != "little":
+        column.byteswap()
+    return column
+
+
+def pack_chart(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Pack ``market_chart`` series; series sharing the price timestamps store only values."""
+    prices = data.get("prices") or []
+    timestamps = [point[0] for point in prices]
+    packed: Dict[str, Any] = {"v": PACKED_CHART_VERSION, "t": pack_floats(timestamps), "series": {}}
+    for name in CHART_SERIES:
+        points = data.get(name)
+        if points is None:
+            continue
+        if len(points) == len(timestamps) and all(p[0] == t for p, t in zip(points, timestamps, strict=True)):
+            packed["series"][name] = (None, pack_floats([p[1] for p in points]))
+        else:
+            packed["series"][name] = (pack_floats([p[0] for p in points]), pack_floats([p[1] for p in points]))
+    return packed
+
+
+def unpack_chart(packed: Any) -> Optional[Dict[str, Any]]:
+    """Inverse of ``pack_chart``; plain dicts cached by older code pass through unchanged."""
+    if packed is None or not isinstance(packed, dict) or packed.get("v") != PACKED_CHART_VERSION:
+        return packed
+    shared = unpack_floats(packed["t"])
+    chart = {}
+    for name, (own_timestamps, values) in packed["series"].items():
+        timestamps = unpack_floats(own_timestamps) if own_timestamps is not None else shared
+        # Timestamps are epoch milliseconds; give them back as ints like CoinGecko sends them.
+        chart[name] = [[int(t), v] for t, v in zip(timestamps, unpack_floats(values), strict=True)]
+    return chart
+
+
+def chart_columns(chart: Dict[str, Any]) -> Dict[str, List[Any]]:
+    """One shared ``timestamps`` column plus a value column per series.
+
+    Rows follow the price timestamps; a series point with no matching
+    timestamp is dropped and a missing one becomes ``None``.
+    """
+    prices = chart.get("prices") or []
+    timestamps = [int(point[0]) for point in prices]
+    columns: Dict[str, List[Any]] = {"timestamps": timestamps}
+    for series, column in RESPONSE_COLUMNS:
+        points = chart.get(series) or []
+        if len(points) == len(timestamps) and all(int(p[0]) == t for p, t in zip(points, timestamps, strict=True)):
+            columns[column] = [p[1] for p in points]
+        else:
+            by_time = {int(p[0]): p[1] for p in points}
+            columns[column] = [by_time.get(t) for t in timestamps]
+    return columns
+
+
+def encode_binary_columns(columns: Dict[str, List[Any]]) -> bytes:
+    """Header, comma-separated column names, zero padding to 8 bytes, then float64 LE columns.
+
+    The padding lets clients view each column directly as a ``Float64Array``;
+    missing values are NaN.
+    """
+    names = ",".join(columns).encode("ascii")
+    rows = len(next(iter(columns.values()), []))
+    header = BINARY_CHART_HEADER.pack(BINARY_CHART_MAGIC, BINARY_CHART_VERSION, len(columns), len(names), rows) + names
+    parts = [header, b"\0" * (-len(header) % 8)]
+    for values in columns.values():
+        column = array("d", (float("nan") if v is None else v for v in values))
+        if sys.byteorder != "little":
+            column.byteswap()
+        parts.append(column.tobytes())
+    return b"".join(parts)
+
+
+def decode_binary_columns(payload: bytes) -> Dict[str, List[float]]:
+    magic, version, count, names_len, rows = BINARY_CHART_HEADER.unpack_from(payload)
+    if magic != BINARY_CHART_MAGIC or version != BINARY_CHART_VERSION:
+        raise ValueError("Not a binary chart payload")
+    offset = BINARY_CHART_HEADER.size
+    names = payload[offset:offset + names_len].decode("ascii").split(",") if count else []
+    offset += names_len
+    offset += -offset % 8
+    columns = {}
+    for name in names:
+        column = array("d")
+        column.frombytes(payload[offset:offset + rows * 8])
+        if sys.byteorder != "little":
+            column.byteswap()
+        columns[name] = column.tolist()
+        offset += rows * 8
+    return columns
+
+
+def _little_endian(column: array) -> bytes:
+    if sys.byteorder != "little":
+        column = array(column.typecode, column)
+        column.byteswap()
+    return column.tobytes()
+
+
+def _from_little_endian(typecode: str, raw: bytes) -> array:
+    column = array(typecode)
+    column.frombytes(raw)
+    if sys.byteorder != "little":
+        column.byteswap()
+    return column
+
+
+def pack_intraday(timestamps: Sequence[int], columns: Dict[str, Sequence[float]]) -> bytes:
+    """Pack one coin-day of points: delta-encoded int64 timestamps plus float64 value columns.
+
+    Regularly spaced timestamps turn into runs of identical deltas, which zlib
+    squeezes to almost nothing.
+    """
+    deltas = array("q", (t - p for t, p in zip(timestamps, [0, *timestamps[:-1]], strict=True)))
+    body = [_little_endian(deltas)]
+    for values in columns.values():
+        body.append(_little_endian(array("d", (float("nan") if v is None else v for v in values))))
+    names = ",".join(columns).encode("ascii")
+    header = INTRADAY_HEADER.pack(INTRADAY_MAGIC, INTRADAY_VERSION, len(columns), len(timestamps))
+    return header + len(names).to_bytes(2, "little") + names + zlib.compress(b"".join(body), 6)
+
+
+def unpack_intraday(payload: bytes) -> Tuple[array, Dict[str, array]]:
+    """Inverse of ``pack_intraday``: (int64 timestamps, {name: float64 values})."""
+    magic, version, count, rows = INTRADAY_HEADER.unpack_from(payload)
+    if magic != INTRADAY_MAGIC or version != INTRADAY_VERSION:
+        raise ValueError("Not an intraday payload")
+    offset = INTRADAY_HEADER.size
+    names_len = int.from_bytes(payload[offset:offset + 2], "little")
+    names = payload[offset + 2:offset + 2 + names_len].decode("ascii").split(",") if count else []
+    body = zlib.decompress(payload[offset + 2 + names_len:])
+    timestamps = _from_little_endian("q", body[:rows * 8])
+    running = 0
+    for i, delta in enumerate(timestamps):
+        running += delta
+        timestamps[i] = running
+    columns = {}
+    for n, name in enumerate(names, start=1):
+        columns[name] = _from_little_endian("d", body[n * rows * 8:(n + 1) * rows * 8])
+    return timestamps, columns
@@ -0,0 +1,70 @@
+import contextvars
+from bisect import bisect_right
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .services import coin_chart_cache_key, fetch_coin_chart_data
+from .softcache import is_fresh
+
+MAX_FETCH_WORKERS = 4
+HOUR_MS = 3_600_000
+DAY_MS = 86_400_000
+
+
+def grid_step_ms(days: int) -> int:
+    """Spacing of the comparison grid; matches the granularity fetch_coin_chart_data asks for."""
+    return HOUR_MS if days <= 1 else DAY_MS
+
+
+def fetch_price_series(coin_ids: Sequence[str], days: int) -> Dict[str, List[List[float]]]:
+    """Price series per coin; cached ones are read inline, the rest fetched concurrently.
+
+    Each fetch runs in a copy of the caller's context, so it keeps the request's deadline budget.
+    """
+    missing = [c for c in coin_ids if not is_fresh(coin_chart_cache_key(c, days))]
+    series = {}
+    if missing:
+        with ThreadPoolExecutor(max_workers=min(MAX_FETCH_WORKERS, len(missing))) as pool:
+            futures = [
+                pool.submit(contextvars.copy_context().run, fetch_coin_chart_data, coin_id, days=days)
+                for coin_id in missing
+            ]
+            for coin_id, future in zip(missing, futures, strict=True):
+                series[coin_id] = future.result().get("prices") or []
+    for coin_id in coin_ids:
+        if coin_id not in series:
+            series[coin_id] = fetch_coin_chart_data(coin_id, days=days).get("prices") or []
+    return series
+
+
+def align_series(
+    series: Dict[str, Sequence[Sequence[float]]], step_ms: int
+) -> Tuple[List[int], Dict[str, List[Optional[float]]]]:
+    """Sample every series on one grid over their common time span.
+
+    Each grid point takes the latest price at or before it (an as-of join), so
+    series reported at slightly different instants still line up.
+    """
+    non_empty = {coin_id: points for coin_id, points in series.items() if points}
+    if not non_empty:
+        return [], {coin_id: [] for coin_id in series}
+    start = max(points[0][0] for points in non_empty.values())
+    end = min(points[-1][0] for points in non_empty.values())
+    grid = list(range(int(start), int(end) + 1, step_ms)) if end >= start else []
+    if grid and grid[-1] != int(end):
+        grid.append(int(end))
+
+    aligned: Dict[str, List[Optional[float]]] = {}
+    for coin_id, points in series.items():
+        times = [p[0] for p in points]
+        aligned[coin_id] = [points[i - 1][1] if (i := bisect_right(times, t)) else None for t in grid]
+    return grid, aligned
+
+
+def rebase(values: Sequence[Optional[float]], base: float = 100.0) -> List[Optional[float]]:
+    """Scale a series so its first available value equals ``base``."""
+    first = next((v for v in values if v), None)
+    if not first:
+        return [None for _ in values]
+    factor = base / first
+    return [round(v * factor, 6) if v is not None else None for v in values]
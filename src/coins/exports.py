@@ -0,0 +1,77 @@
+import csv
+import json
+from datetime import date
+from itertools import islice
+from typing import AsyncIterator, Iterable, Iterator, Optional, Sequence, Tuple
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from .models import PriceHistory
+
+EXPORT_FORMATS = ("csv", "ndjson")
+CSV_HEADER = ("coin", "date", "price_usd")
+
+Row = Tuple[str, date, object]
+
+
+def history_rows(
+    coin_ids: Sequence[str] = (),
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    chunk_size: Optional[int] = None,
+    using: Optional[str] = None,
+) -> Iterator[Row]:
+    """(cg_id, date, price) tuples ordered by coin and date, read with a server-side cursor.
+
+    Pass ``using`` when the rows are consumed after the request's routing context
+    has ended, as a streaming response body is.
+    """
+    qs = PriceHistory.objects.using(using)
+    if coin_ids:
+        qs = qs.filter(coin__cg_id__in=coin_ids)
+    if start:
+        qs = qs.filter(date__gte=start)
+    if end:
+        qs = qs.filter(date__lte=end)
+    chunk_size = chunk_size or getattr(settings, "EXPORT_CHUNK_SIZE", 2000)
+    return qs.order_by("coin_id", "date").values_list("coin__cg_id", "date", "price_usd").iterator(chunk_size=chunk_size)
+
+
+class _Echo:
+    """File-like object whose write() hands the formatted line back to the caller."""
+
+    def write(self, value: str) -> str:
+        return value
+
+
+def csv_lines(rows: Iterable[Row]) -> Iterator[str]:
+    writer = csv.writer(_Echo())
+    yield writer.writerow(CSV_HEADER)
+    for cg_id, day, price in rows:
+        yield writer.writerow((cg_id, day.isoformat(), price))
+
+
+def ndjson_lines(rows: Iterable[Row]) -> Iterator[str]:
+    for cg_id, day, price in rows:
+        # Prices stay strings so the Decimal column round-trips exactly.
+        yield json.dumps({"coin": cg_id, "date": day.isoformat(), "priceUsd": str(price)}) + "\n"
+
+
+def export_lines(fmt: str, rows: Iterable[Row]) -> Iterator[str]:
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format '{fmt}'; choose from {', '.join(EXPORT_FORMATS)}")
+    return csv_lines(rows) if fmt == "csv" else ndjson_lines(rows)
+
+
+async def aiter_batches(lines: Iterator[str], batch_size: Optional[int] = None) -> AsyncIterator[str]:
+    """Serve a sync line iterator to an ASGI server ``batch_size`` lines per chunk.
+
+    Django consumes a sync iterator under ASGI with ``sync_to_async(list)``, which would
+    build the whole export in memory. Each chunk is pulled on the thread-sensitive
+    executor, so the server-side cursor keeps using the request's connection.
+    """
+    batch_size = batch_size or getattr(settings, "EXPORT_CHUNK_SIZE", 2000)
+    next_batch = sync_to_async(lambda: "".join(islice(lines, batch_size)), thread_sensitive=True)
+    while chunk := await next_batch():
+        yield chunk
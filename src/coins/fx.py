@@ -0,0 +1,50 @@
+from typing import Any, Dict, List
+
+from .services import fetch_exchange_rates
+
+CHART_SERIES = ("prices", "market_caps", "total_volumes")
+
+
+# Currencies CoinGecko's /exchange_rates quotes. One missing from the table while CoinGecko is
+# down (and no earlier table is cached) is unavailable for now, not unsupported.
+KNOWN_CURRENCIES = frozenset((
+    "btc eth ltc bch bnb eos xrp xlm link dot yfi sol usd aed ars aud bdt bhd bmd brl cad chf clp cny czk "
+    "dkk eur gbp gel hkd huf idr ils inr jpy krw kwd lkr mmk mxn myr ngn nok nzd php pkr pln rub sar sek "
+    "sgd thb try twd uah vef vnd zar xdr xag xau bits sats"
+).split())
+
+
+class UnsupportedCurrency(ValueError):
+    pass
+
+
+class RatesUnavailable(RuntimeError):
+    """A known currency has no rate because the exchange-rate table could not be fetched."""
+
+
+def usd_rate(vs_currency: str) -> float:
+    """Units of ``vs_currency`` per 1 USD; USD itself never touches the exchange-rate table."""
+    code = (vs_currency or "usd").lower()
+    if code == "usd":
+        return 1.0
+    rate = fetch_exchange_rates().get(code)
+    if rate is None:
+        raise (RatesUnavailable if code in KNOWN_CURRENCIES else UnsupportedCurrency)(code)
+    return rate
+
+
+def convert(value: Any, rate: float) -> Any:
+    """``value`` (USD) in the target currency; missing values stay missing."""
+    if value is None:
+        return None
+    return float(value) * rate
+
+
+def convert_chart(chart: Dict[str, Any], rate: float) -> Dict[str, List[List[float]]]:
+    """A market_chart payload with every series converted from USD."""
+    if rate == 1.0:
+        return chart
+    return {
+        series: [[ts, value * rate if value is not None else None] for ts, value in chart.get(series) or []]
+        for series in CHART_SERIES
+    }
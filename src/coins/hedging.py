@@ -0,0 +1,96 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from django.conf import settings
+
+from monitoring.metrics import UPSTREAM_SECONDS, record_upstream_hedge, registry
+from .throttling import parse_rate, sliding_window_hit
+
+HEDGE_QUANTILE = 0.95
+# Below this many successful calls the observed p95 is noise, so nothing is hedged.
+HEDGE_MIN_SAMPLES = 20
+HEDGE_WORKERS = 8
+# What a hedge that never fired returns.
+_NOT_HEDGED = object()
+
+_lock = threading.Lock()
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _pool() -> ThreadPoolExecutor:
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=HEDGE_WORKERS, thread_name_prefix="upstream-hedge")
+        return _executor
+
+
+def hedge_delay(endpoint: str) -> Optional[float]:
+    """When to fire a second request: the endpoint's observed p95, or None if hedging is off or unsampled."""
+    if not getattr(settings, "UPSTREAM_HEDGE_ENABLED", False):
+        return None
+    histogram = registry.get_histogram(UPSTREAM_SECONDS, endpoint=endpoint, status="200")
+    if histogram is None or histogram.count < HEDGE_MIN_SAMPLES:
+        return None
+    return histogram.quantile(HEDGE_QUANTILE)
+
+
+def call_hedged(endpoint: str, timeout: float, fetch: Callable[[float], Any]) -> Any:
+    """Run ``fetch(timeout)`` inline; if it outlives the endpoint's p95, start a second copy to fall back on.
+
+    Only for idempotent reads. The first attempt always runs on the calling
+    thread, so only hedges take slots in the shared pool and upstream concurrency
+    is not capped by its size. The caller keeps its own attempt's result when it
+    succeeds; when it fails or times out, a hedge already in flight answers instead
+    of a retry started from scratch. Every hedge is a real CoinGecko call, so
+    hedges share an upstream budget (``UPSTREAM_HEDGE_RATE``, like prefetches'
+    ``PREFETCH_RATE``). Requests cannot be cancelled, so an unused hedge runs to
+    its own timeout, but its latency is still recorded.
+    """
+    delay = hedge_delay(endpoint)
+    if delay is None or delay >= timeout:
+        return fetch(timeout)
+    settled, fired = threading.Event(), threading.Event()
+    hedge = _pool().submit(_hedge, endpoint, time.monotonic() + timeout, delay, settled, fired, fetch)
+    try:
+        result = fetch(timeout)
+    except Exception:
+        settled.set()
+        if hedge.cancel():
+            raise
+        try:
+            fallback = hedge.result()
+        except Exception:
+            record_upstream_hedge(endpoint, "failed")
+            raise
+        if fallback is _NOT_HEDGED:
+            raise
+        record_upstream_hedge(endpoint, "hedge")
+        return fallback
+    settled.set()
+    hedge.cancel()
+    if fired.is_set():
+        record_upstream_hedge(endpoint, "primary")
+    return result
+
+
+def _hedge(
+    endpoint: str,
+    deadline: float,
+    delay: float,
+    settled: threading.Event,
+    fired: threading.Event,
+    fetch: Callable[[float], Any],
+) -> Any:
+    """Fire the hedge once ``delay`` passes without the first attempt settling, budget permitting."""
+    if settled.wait(delay):
+        return _NOT_HEDGED
+    limit, window = parse_rate(getattr(settings, "UPSTREAM_HEDGE_RATE", "10/min"))
+    allowed, _ = sliding_window_hit("hedge_upstream", limit, window)
+    if not allowed:
+        record_upstream_hedge(endpoint, "over_budget")
+        return _NOT_HEDGED
+    fired.set()
+    return fetch(deadline - time.monotonic())
@@ -0,0 +1,94 @@
+import math
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime, timezone
+from typing import Any, Dict, Optional, Tuple
+
+from django.db import transaction
+
+from .codec import RESPONSE_COLUMNS, chart_columns, pack_intraday, unpack_intraday
+from .models import Coin, IntradaySeries
+
+DAY_MS = 86_400_000
+
+# Stored column name -> market_chart series, in storage order.
+SERIES_BY_COLUMN = {column: series for series, column in RESPONSE_COLUMNS}
+
+
+def _utc_date(ts_ms: int) -> date:
+    return datetime.fromtimestamp(ts_ms / 1000, tz=timezone.utc).date()
+
+
+def store_intraday(coin: Coin, chart: Dict[str, Any]) -> int:
+    """Merge a market_chart payload into per-day packed rows; returns points stored.
+
+    Points already stored for a day are kept and overwritten only by newer values
+    at the same timestamp, so overlapping 24h windows accumulate into full days.
+    """
+    columns = chart_columns(chart)
+    incoming: Dict[date, Dict[int, Tuple[float, ...]]] = {}
+    names = list(SERIES_BY_COLUMN)
+    for i, ts in enumerate(columns["timestamps"]):
+        incoming.setdefault(_utc_date(ts), {})[ts] = tuple(columns[name][i] for name in names)
+
+    stored = 0
+    with transaction.atomic():
+        existing = {
+            row.date: row
+            for row in IntradaySeries.objects.select_for_update().filter(coin=coin, date__in=list(incoming))
+        }
+        for day, points in incoming.items():
+            row = existing.get(day)
+            if row is not None:
+                timestamps, old = unpack_intraday(bytes(row.payload))
+                merged = {ts: tuple(old[name][i] for name in names) for i, ts in enumerate(timestamps)}
+                merged.update(points)
+                points = merged
+            ordered = sorted(points)
+            payload = pack_intraday(ordered, {name: [points[ts][n] for ts in ordered] for n, name in enumerate(names)})
+            IntradaySeries.objects.update_or_create(
+                coin=coin,
+                date=day,
+                defaults={"points": len(ordered), "first_ts": ordered[0], "last_ts": ordered[-1], "payload": payload},
+            )
+            stored += len(ordered)
+    return stored
+
+
+def load_intraday(coin_id: int, start_ms: int, end_ms: int) -> Tuple[array, Dict[str, array]]:
+    """Points with ``start_ms <= ts <= end_ms`` as (int64 timestamps, {column: float64 values})."""
+    timestamps = array("q")
+    columns = {name: array("d") for name in SERIES_BY_COLUMN}
+    rows = IntradaySeries.objects.filter(
+        coin_id=coin_id, date__gte=_utc_date(start_ms), date__lte=_utc_date(end_ms)
+    ).order_by("date")
+    for payload in rows.values_list("payload", flat=True):
+        day_ts, day_columns = unpack_intraday(bytes(payload))
+        lo, hi = bisect_left(day_ts, start_ms), bisect_right(day_ts, end_ms)
+        timestamps.extend(day_ts[lo:hi])
+        for name, values in columns.items():
+            values.extend(day_columns[name][lo:hi])
+    return timestamps, columns
+
+
+def recent_chart(cg_id: str, max_age_seconds: float, hours: int = 24) -> Optional[Dict[str, Any]]:
+    """The last ``hours`` of stored points as a market_chart payload, if the newest point is fresh enough."""
+    now_ms = int(time.time() * 1000)
+    latest = (
+        IntradaySeries.objects.filter(coin__cg_id=cg_id, date__gte=_utc_date(now_ms - DAY_MS))
+        .order_by("-date")
+        .values_list("coin_id", "last_ts")
+        .first()
+    )
+    if latest is None or latest[1] < now_ms - max_age_seconds * 1000:
+        return None
+    timestamps, columns = load_intraday(latest[0], now_ms - hours * 3_600_000, now_ms)
+    # Only a window covering (nearly) the whole period can stand in for an upstream call.
+    if not timestamps or timestamps[0] > now_ms - (hours - 1) * 3_600_000:
+        return None
+    return {
+        SERIES_BY_COLUMN[name]: [[ts, value] for ts, value in zip(timestamps, values, strict=True) if not math.isnan(value)]
+        for name, values in columns.items()
+    }
+
@@ -0,0 +1,119 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List
+
+import requests
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from coins.models import BackfillCheckpoint, Coin
+from coins.persistence import store_price_history, upsert_market_coins
+from coins.services import fetch_daily_prices, fetch_top_coins
+from coins.throttling import parse_rate, sliding_window_hit
+
+
+class Command(BaseCommand):
+    help = "Backfill daily PriceHistory for many coins in parallel, within the CoinGecko rate budget"
+    # Set by the job runner when its lease is lost; stops the run after the coin being stored.
+    stealth_options = ("stop",)
+
+    def add_arguments(self, parser):
+        parser.add_argument("--coins", default="", help="Comma-separated CoinGecko ids (default: top coins by rank)")
+        parser.add_argument("--top", type=int, default=100, help="Number of top coins when --coins is not given")
+        parser.add_argument("--days", type=int, default=365, help="Days of history per coin")
+        parser.add_argument("--workers", type=int, default=4, help="Concurrent upstream fetches")
+        parser.add_argument("--rate", default="25/min", help="Upstream call budget, e.g. 25/min")
+        parser.add_argument("--retries", type=int, default=3, help="Retries per coin on 429/5xx/network errors")
+        parser.add_argument("--restart", action="store_true", help="Ignore checkpoints and refetch every coin")
+
+    def handle(self, *args, **options):
+        try:
+            self.limit, self.window = parse_rate(options["rate"])
+        except (KeyError, ValueError):
+            raise CommandError(f"Invalid --rate '{options['rate']}'")
+        self.retries = max(0, options["retries"])
+        days = options["days"]
+
+        coin_ids = self._coin_ids(options)
+        if not options["restart"]:
+            done = set(
+                BackfillCheckpoint.objects.filter(cg_id__in=coin_ids, completed_at__isnull=False, days__gte=days)
+                .values_list("cg_id", flat=True)
+            )
+            if done:
+                self.stdout.write(f"Skipping {len(done)} coins already backfilled for {days}d")
+            coin_ids = [c for c in coin_ids if c not in done]
+
+        coins = {c.cg_id: c for c in Coin.objects.filter(cg_id__in=coin_ids)}
+        stop = options.get("stop")
+        started = time.perf_counter()
+        completed = failed = total_rows = 0
+        # Workers only talk to CoinGecko; rows are written here, on the command's own connection.
+        with ThreadPoolExecutor(max_workers=max(1, options["workers"])) as pool:
+            futures = {pool.submit(self._fetch, cg_id, days): cg_id for cg_id in coin_ids}
+            for future in as_completed(futures):
+                if stop is not None and stop.is_set():
+                    for pending in futures:
+                        pending.cancel()
+                    self.stderr.write("Stopped early; checkpointed coins are kept")
+                    break
+                cg_id = futures[future]
+                try:
+                    prices = future.result()
+                except requests.exceptions.RequestException as exc:
+                    failed += 1
+                    BackfillCheckpoint.objects.update_or_create(
+                        cg_id=cg_id, defaults={"completed_at": None, "last_error": str(exc)[:500]}
+                    )
+                    self.stderr.write(f"{cg_id}: {exc}")
+                    continue
+                coin = coins.get(cg_id) or Coin.objects.create(cg_id=cg_id, symbol=cg_id[:10].upper(), name=cg_id)
+                rows = store_price_history(coin, prices)
+                BackfillCheckpoint.objects.update_or_create(
+                    cg_id=cg_id, defaults={"days": days, "rows": rows, "completed_at": timezone.now(), "last_error": ""}
+                )
+                completed += 1
+                total_rows += rows
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Backfilled {completed} coins ({total_rows} rows) in {elapsed:.1f}s, {failed} failed; "
+                f"{completed / elapsed if elapsed else 0:.2f} coins/s, {total_rows / elapsed if elapsed else 0:.0f} rows/s"
+            )
+        )
+        if failed:
+            raise CommandError(f"{failed} coins failed; rerun to retry them")
+
+    def _coin_ids(self, options) -> List[str]:
+        explicit = [c.strip() for c in options["coins"].split(",") if c.strip()]
+        if explicit:
+            return explicit
+        top = max(1, options["top"])
+        ranked = Coin.objects.filter(market_cap_rank__isnull=False).order_by("market_cap_rank")
+        if ranked.count() < top:
+            upsert_market_coins(fetch_top_coins(limit=min(top, 250)))
+        return list(ranked.values_list("cg_id", flat=True)[:top])
+
+    def _acquire(self) -> None:
+        while True:
+            allowed, wait = sliding_window_hit("backfill_upstream", self.limit, self.window)
+            if allowed:
+                return
+            time.sleep(max(wait, 0.05))
+
+    def _fetch(self, cg_id: str, days: int):
+        for attempt in range(self.retries + 1):
+            self._acquire()
+            try:
+                return fetch_daily_prices(cg_id, days)
+            except requests.exceptions.HTTPError as exc:
+                status = exc.response.status_code if exc.response is not None else 0
+                if attempt == self.retries or (status != 429 and status < 500):
+                    raise
+                retry_after = exc.response.headers.get("Retry-After", "")
+                time.sleep(float(retry_after) if retry_after.isdigit() else 2 ** attempt)
+            except requests.exceptions.RequestException:
+                if attempt == self.retries:
+                    raise
+                time.sleep(2 ** attempt)
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from coins.exports import EXPORT_FORMATS, export_lines, history_rows
+
+
+class Command(BaseCommand):
+    help = "Stream stored PriceHistory rows for a set of coins as CSV or NDJSON"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--coins", default="", help="Comma-separated CoinGecko ids (default: all)")
+        parser.add_argument("--start", help="First date, YYYY-MM-DD")
+        parser.add_argument("--end", help="Last date, YYYY-MM-DD")
+        parser.add_argument("--format", choices=EXPORT_FORMATS, default="csv")
+        parser.add_argument("--output", "-o", help="File to write (default: stdout)")
+        parser.add_argument("--chunk-size", type=int, default=None, help="Rows fetched per cursor round trip")
+
+    def handle(self, *args, **options):
+        bounds = {}
+        for name in ("start", "end"):
+            bounds[name] = parse_date(options[name]) if options[name] else None
+            if options[name] and bounds[name] is None:
+                raise CommandError(f"--{name} must be a YYYY-MM-DD date")
+        coin_ids = [c.strip() for c in options["coins"].split(",") if c.strip()]
+        rows = history_rows(coin_ids, bounds["start"], bounds["end"], chunk_size=options["chunk_size"])
+
+        if not options["output"]:
+            for line in export_lines(options["format"], rows):
+                self.stdout.write(line, ending="")
+            return
+        written = 0
+        with open(options["output"], "w", newline="", encoding="utf-8") as out:
+            for line in export_lines(options["format"], rows):
+                out.write(line)
+                written += 1
+        self.stderr.write(f"Wrote {written} lines to {options['output']}")
@@ -0,0 +1,57 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from coins.models import PriceHistory
+from coins.rollups import refresh_rollups, retention_cutoff
+
+
+class Command(BaseCommand):
+    help = "Delete daily PriceHistory rows past the retention window, keeping their weekly/monthly rollups"
+    # Set by the job runner when its lease is lost; checked between coins and batches.
+    stealth_options = ("stop",)
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, help="Keep this many days (default: PRICE_HISTORY_RETENTION_DAYS)")
+        parser.add_argument("--batch-size", type=int, default=1000, help="Rows deleted per transaction")
+        parser.add_argument("--sleep", type=float, default=0.05, help="Seconds to pause between batches")
+
+    def handle(self, *args, **options):
+        if options["days"]:
+            cutoff = timezone.now().date() - timedelta(days=options["days"])
+        else:
+            cutoff = retention_cutoff()
+        if cutoff is None:
+            raise CommandError("No retention configured; set PRICE_HISTORY_RETENTION_DAYS or pass --days")
+
+        stop = options.get("stop")
+        expiring = PriceHistory.objects.filter(date__lt=cutoff)
+        rollups = 0
+        for coin_id in expiring.order_by().values_list("coin_id", flat=True).distinct():
+            if stop is not None and stop.is_set():
+                self.stderr.write("Stopped before pruning")
+                return
+            # Rows written before rollups existed have no rollup yet; build it while the days are still here.
+            with transaction.atomic():
+                rollups += refresh_rollups(coin_id, expiring.filter(coin_id=coin_id).values_list("date", flat=True))
+
+        batch_size = max(1, options["batch_size"])
+        deleted = batches = 0
+        while stop is None or not stop.is_set():
+            ids = list(expiring.order_by("id").values_list("id", flat=True)[:batch_size])
+            if not ids:
+                break
+            with transaction.atomic():
+                deleted += PriceHistory.objects.filter(id__in=ids).delete()[0]
+            batches += 1
+            if options["sleep"]:
+                time.sleep(options["sleep"])
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Deleted {deleted} daily rows older than {cutoff} in {batches} batches ({rollups} rollups backfilled)"
+            )
+        )
@@ -0,0 +1,52 @@
+# Generated by Django 6.1.2 on 2026-10-19 04:26
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('coins', '0005_backfillcheckpoint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonthlyPrice',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period_start', models.DateField()),
+                ('open_usd', models.DecimalField(decimal_places=8, max_digits=20)),
+                ('high_usd', models.DecimalField(decimal_places=8, max_digits=20)),
+                ('low_usd', models.DecimalField(decimal_places=8, max_digits=20)),
+                ('close_usd', models.DecimalField(decimal_places=8, max_digits=20)),
+                ('avg_usd', models.DecimalField(decimal_places=8, max_digits=20)),
+                ('points', models.IntegerField()),
+                ('coin', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='coins.coin')),
+            ],
+            options={
+                'ordering': ['period_start'],
+                'abstract': False,
+                'unique_together': {('coin', 'period_start')},
+            },
+        ),
+        migrations.CreateModel(
+            name='WeeklyPrice',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period_start', models.DateField()),
+                ('open_usd', models.DecimalField(decimal_places=8, max_digits=20)),
+                ('high_usd', models.DecimalField(decimal_places=8, max_digits=20)),
+                ('low_usd', models.DecimalField(decimal_places=8, max_digits=20)),
+                ('close_usd', models.DecimalField(decimal_places=8, max_digits=20)),
+                ('avg_usd', models.DecimalField(decimal_places=8, max_digits=20)),
+                ('points', models.IntegerField()),
+                ('coin', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='coins.coin')),
+            ],
+            options={
+                'ordering': ['period_start'],
+                'abstract': False,
+                'unique_together': {('coin', 'period_start')},
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 6.1.2 on 2026-10-19 04:27
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('coins', '0006_monthlyprice_weeklyprice'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IntradaySeries',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('points', models.IntegerField()),
+                ('first_ts', models.BigIntegerField()),
+                ('last_ts', models.BigIntegerField()),
+                ('payload', models.BinaryField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('coin', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='intraday', to='coins.coin')),
+            ],
+            options={
+                'ordering': ['date'],
+                'unique_together': {('coin', 'date')},
+            },
+        ),
+    ]
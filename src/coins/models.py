@@ -37,6 +37,62 @@ class PriceHistory(models.Model):
         ]
 
 
+class PriceRollup(models.Model):
+    """OHLC and average of daily prices over a calendar period starting at ``period_start``."""
+
+    coin = models.ForeignKey(Coin, on_delete=models.CASCADE, related_name="+")
+    period_start = models.DateField()
+    open_usd = models.DecimalField(max_digits=20, decimal_places=8)
+    high_usd = models.DecimalField(max_digits=20, decimal_places=8)
+    low_usd = models.DecimalField(max_digits=20, decimal_places=8)
+    close_usd = models.DecimalField(max_digits=20, decimal_places=8)
+    avg_usd = models.DecimalField(max_digits=20, decimal_places=8)
+    points = models.IntegerField()
+
+    class Meta:
+        abstract = True
+        unique_together = ("coin", "period_start")
+        ordering = ["period_start"]
+
+
+class WeeklyPrice(PriceRollup):
+    """Rollup of PriceHistory by ISO week (periods start on Monday)."""
+
+
+class MonthlyPrice(PriceRollup):
+    """Rollup of PriceHistory by calendar month."""
+
+
+class IntradaySeries(models.Model):
+    """All intraday points of one coin for one UTC day, packed by ``coins.codec.pack_intraday``."""
+
+    coin = models.ForeignKey(Coin, on_delete=models.CASCADE, related_name="intraday")
+    date = models.DateField()
+    points = models.IntegerField()
+    first_ts = models.BigIntegerField()
+    last_ts = models.BigIntegerField()
+    payload = models.BinaryField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ("coin", "date")
+        ordering = ["date"]
+
+
+class BackfillCheckpoint(models.Model):
+    """Progress of ``backfill_history`` per coin, so an interrupted run can resume."""
+
+    cg_id = models.CharField(max_length=128, unique=True)
+    days = models.IntegerField(default=0)
+    rows = models.IntegerField(default=0)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True, default="")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.cg_id} backfilled {self.days}d"
+
+
 class Watchlist(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="watchlist")
     coin = models.ForeignKey(Coin, on_delete=models.CASCADE, related_name="watchers")
@@ -53,6 +109,24 @@ class Watchlist(models.Model):
         return f"{self.user.username} watches {self.coin.name}"
 
 
+class Holding(models.Model):
+    """Quantity of a coin a user holds; ``cost_basis_usd`` is the total paid for it, when known."""
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="holdings")
+    coin = models.ForeignKey(Coin, on_delete=models.CASCADE, related_name="holders")
+    quantity = models.DecimalField(max_digits=28, decimal_places=10)
+    cost_basis_usd = models.DecimalField(max_digits=24, decimal_places=8, null=True, blank=True)
+    added_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ("user", "coin")
+        ordering = ["added_at"]
+
+    def __str__(self):
+        return f"{self.user.username} holds {self.quantity} {self.coin.symbol}"
+
+
 class Meta:
     pass
 
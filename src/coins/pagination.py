@@ -0,0 +1,42 @@
+from typing import Any, List, Sequence, Union
+
+from django.db.models import QuerySet
+
+Part = Union[QuerySet, Sequence[Any]]
+
+
+class ChainedResults:
+    """Lists and querysets read back to back, paginated without loading them.
+
+    ``Paginator`` only needs ``count()`` and slicing, so a page that spans parts
+    takes just its rows from each; querysets are counted and sliced in SQL.
+    """
+
+    def __init__(self, *parts: Part):
+        self.parts = parts
+        self._lengths: List[int] = []
+
+    def _part_lengths(self) -> List[int]:
+        if not self._lengths:
+            self._lengths = [part.count() if isinstance(part, QuerySet) else len(part) for part in self.parts]
+        return self._lengths
+
+    def count(self) -> int:
+        return sum(self._part_lengths())
+
+    def __len__(self) -> int:
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            position = range(self.count())[index]
+            return self[position:position + 1][0]
+        start, stop, _ = index.indices(self.count())
+        rows: List[Any] = []
+        offset = 0
+        for part, length in zip(self.parts, self._part_lengths(), strict=True):
+            lo, hi = max(start - offset, 0), min(stop - offset, length)
+            if lo < hi:
+                rows.extend(part[lo:hi])
+            offset += length
+        return rows
@@ -0,0 +1,80 @@
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Sequence
+
+from django.db import transaction
+
+from .models import Coin, PriceHistory
+from .rollups import refresh_rollups
+
+
+def _decimal(value: Any):
+    return Decimal(str(value)) if value is not None else None
+
+
+def market_coin_fields(item: Dict[str, Any]) -> Dict[str, Any]:
+    """Coin field values from one CoinGecko /coins/markets item."""
+    return {
+        "symbol": item.get("symbol", "").upper(),
+        "name": item.get("name", ""),
+        "last_price_usd": _decimal(item.get("current_price")),
+        "last_volume_24h_usd": _decimal(item.get("total_volume")),
+        "last_pct_change_24h": _decimal(item.get("price_change_percentage_24h")),
+        "market_cap_rank": item.get("market_cap_rank"),
+        "market_cap_usd": _decimal(item.get("market_cap")),
+        "image_url": item.get("image"),
+        "last_updated_at": datetime.now(timezone.utc),
+    }
+
+
+# Every field market_coin_fields sets; refreshed in place when the coin already exists.
+MARKET_COIN_FIELDS = [
+    "symbol", "name", "last_price_usd", "last_volume_24h_usd", "last_pct_change_24h",
+    "market_cap_rank", "market_cap_usd", "image_url", "last_updated_at",
+]
+
+
+def upsert_market_coins(market: Iterable[Dict[str, Any]], batch_size: int = 500) -> int:
+    """Create or refresh Coin rows from a CoinGecko /coins/markets payload in bulk; returns rows written."""
+    # One row per id (the last item wins): an upsert may not touch the same row twice.
+    latest = {item["id"]: item for item in market}
+    rows = [Coin(cg_id=cg_id, **market_coin_fields(item)) for cg_id, item in latest.items()]
+    Coin.objects.bulk_create(
+        rows,
+        batch_size=batch_size,
+        update_conflicts=True,
+        unique_fields=["cg_id"],
+        update_fields=MARKET_COIN_FIELDS,
+    )
+    return len(rows)
+
+
+def daily_prices(prices: Sequence[List[float]]) -> Dict[date, Decimal]:
+    """One price per UTC day from ``[timestamp_ms, price]`` pairs; the last point of a day wins."""
+    daily = {}
+    for ts, price in prices:
+        if price is None:
+            continue
+        daily[datetime.fromtimestamp(ts / 1000, tz=timezone.utc).date()] = Decimal(str(price))
+    return daily
+
+
+def store_price_history(coin: Coin, prices: Sequence[List[float]], batch_size: int = 500) -> int:
+    """Upsert one PriceHistory row per day from ``[timestamp_ms, price]`` pairs; returns rows written.
+
+    When a day has several points (CoinGecko appends the current price to daily
+    series) the last one wins. Weekly and monthly rollups of the touched periods
+    are refreshed in the same transaction.
+    """
+    daily = daily_prices(prices)
+    rows = [PriceHistory(coin=coin, date=day, price_usd=price) for day, price in daily.items()]
+    with transaction.atomic():
+        PriceHistory.objects.bulk_create(
+            rows,
+            batch_size=batch_size,
+            update_conflicts=True,
+            unique_fields=["coin", "date"],
+            update_fields=["price_usd"],
+        )
+        refresh_rollups(coin.pk, daily.keys())
+    return len(rows)
@@ -0,0 +1,143 @@
+import math
+from array import array
+from datetime import date, timedelta
+from operator import mul
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import OuterRef, Subquery
+from django.utils import timezone
+
+from .codec import pack_floats, unpack_floats
+from .models import Coin, Holding, PriceHistory
+
+
+def price_row_cache_key(coin_pk: int, end: date, days: int) -> str:
+    return f"portfolio_prices_{coin_pk}_{end.isoformat()}_{days}"
+
+
+def price_matrix(coin_pks: Sequence[int], end: date, days: int) -> Dict[int, array]:
+    """Daily USD prices for ``days`` days ending at ``end``: one float64 row per coin.
+
+    Rows are forward-filled from the last stored price, however old; days before a
+    coin's first stored price are 0. Rows are cached per coin, so the whole matrix
+    costs one cache round trip plus at most two queries for the coins that missed.
+    """
+    keys = {coin_pk: price_row_cache_key(coin_pk, end, days) for coin_pk in coin_pks}
+    cached = cache.get_many(list(keys.values()))
+    rows = {coin_pk: unpack_floats(cached[key]) for coin_pk, key in keys.items() if key in cached}
+
+    missing = [coin_pk for coin_pk in coin_pks if coin_pk not in rows]
+    if missing:
+        start = end - timedelta(days=days - 1)
+        # The latest price before the window seeds the forward fill: one (coin, date) index probe per coin.
+        before = PriceHistory.objects.filter(coin_id=OuterRef("pk"), date__lt=start).order_by("-date")
+        seeds = (
+            Coin.objects.filter(pk__in=missing)
+            .annotate(seed=Subquery(before.values("price_usd")[:1]))
+            .filter(seed__isnull=False)
+            .values_list("pk", "seed")
+        )
+        last: Dict[int, Tuple[int, float]] = {coin_pk: (0, float(price)) for coin_pk, price in seeds}
+        history = (
+            PriceHistory.objects.filter(coin_id__in=missing, date__gte=start, date__lte=end)
+            .order_by("coin_id", "date")
+            .values_list("coin_id", "date", "price_usd")
+        )
+        filled: Dict[int, array] = {coin_pk: array("d", bytes(8 * days)) for coin_pk in missing}
+        for coin_pk, day, price in history.iterator():
+            row = filled[coin_pk]
+            offset = (day - start).days
+            prev_offset, prev_price = last.get(coin_pk, (0, 0.0))
+            for i in range(max(prev_offset, 0), min(offset, days)):
+                row[i] = prev_price
+            last[coin_pk] = (offset, float(price))
+        for coin_pk, (offset, price) in last.items():
+            row = filled[coin_pk]
+            for i in range(max(offset, 0), days):
+                row[i] = price
+        cache.set_many(
+            {keys[coin_pk]: pack_floats(row) for coin_pk, row in filled.items()},
+            getattr(settings, "COINGECKO_CACHE_TTL_SECONDS", 300),
+        )
+        rows.update(filled)
+    return rows
+
+
+def value_positions(quantities: Sequence[float], prices: Sequence[float]) -> Tuple[List[float], float]:
+    """Per-position values and their total, in one pass over the two columns."""
+    values = list(map(mul, quantities, prices))
+    return values, math.fsum(values)
+
+
+def value_series(quantities: Sequence[float], rows: Iterable[Sequence[float]], days: int) -> array:
+    """Daily portfolio value: the quantity-weighted sum of the price rows.
+
+    Walks the matrix one day column at a time so each day is a single C-level
+    dot product (``sum(map(mul, ...))``) rather than a Python loop over positions.
+    """
+    rows = list(rows)
+    if not rows:
+        return array("d", bytes(8 * days))
+    return array("d", [sum(map(mul, quantities, column)) for column in zip(*rows, strict=True)])
+
+
+def _cost(holdings: Sequence[Holding], rate: float = 1.0) -> Optional[float]:
+    costs = [float(h.cost_basis_usd) * rate for h in holdings if h.cost_basis_usd is not None]
+    return math.fsum(costs) if costs else None
+
+
+def portfolio_valuation(user, rate: float = 1.0) -> Dict[str, object]:
+    """Current value and P&L of every position, from one query over holdings and their coins.
+
+    Money is quoted in the currency ``rate`` converts USD into (cost bases are stored in USD).
+    Prices are the coins' stored market prices; ``priceUpdatedAt`` says when each was
+    stored and ``pricesAsOf`` is the oldest of them, so a client can tell stale values.
+    """
+    holdings = list(Holding.objects.filter(user=user).select_related("coin"))
+    quantities = [float(h.quantity) for h in holdings]
+    prices = [float(h.coin.last_price_usd or 0) * rate for h in holdings]
+    values, total = value_positions(quantities, prices)
+    cost = _cost(holdings, rate)
+
+    positions = []
+    for holding, quantity, price, value in zip(holdings, quantities, prices, values, strict=True):
+        coin = holding.coin
+        basis = float(holding.cost_basis_usd) * rate if holding.cost_basis_usd is not None else None
+        positions.append({
+            "id": coin.cg_id,
+            "name": coin.name,
+            "symbol": coin.symbol,
+            "image": coin.image_url or "",
+            "quantity": quantity,
+            "price": price,
+            "priceUpdatedAt": coin.last_updated_at,
+            "value": value,
+            "costBasis": basis,
+            "pnl": value - basis if basis is not None else None,
+            "weight": value / total if total else 0,
+        })
+    updated = [h.coin.last_updated_at for h in holdings]
+    return {
+        "positions": positions,
+        "pricesAsOf": None if not updated or None in updated else min(updated),
+        "totalValue": total,
+        "totalCost": cost,
+        "totalPnl": total - cost if cost is not None else None,
+    }
+
+
+def portfolio_history(user, days: int, end: Optional[date] = None, rate: float = 1.0) -> Dict[str, object]:
+    """Daily value of the current holdings over the last ``days`` days, and P&L against their cost."""
+    end = end or timezone.now().date()
+    holdings = list(Holding.objects.filter(user=user).select_related("coin"))
+    matrix = price_matrix([h.coin_id for h in holdings], end, days)
+    totals = value_series([float(h.quantity) * rate for h in holdings], [matrix[h.coin_id] for h in holdings], days)
+    cost = _cost(holdings, rate)
+    start = end - timedelta(days=days - 1)
+    return {
+        "dates": [(start + timedelta(days=i)).isoformat() for i in range(days)],
+        "value": list(totals),
+        "pnl": [total - cost for total in totals] if cost is not None else None,
+    }
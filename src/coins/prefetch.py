@@ -0,0 +1,96 @@
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Iterable
+
+import requests
+from django.conf import settings
+
+from monitoring.metrics import record_prefetch
+from .services import (
+    cache_family, coin_chart_cache_key, coin_detail_cache_key, fetch_coin_chart_data, fetch_coin_detailed_info,
+)
+from .softcache import is_fresh
+from .throttling import parse_rate, sliding_window_hit
+
+logger = logging.getLogger(__name__)
+
+# Ranges the frontend loads after a detail page, in the order users open them.
+DETAIL_FOLLOW_UP_DAYS = (7, 30)
+
+
+class Prefetcher:
+    """Background fetches of data a user is about to ask for.
+
+    Work runs on a small thread pool, is skipped when the key is already cached or
+    being fetched, and spends at most ``PREFETCH_RATE`` upstream calls so
+    speculative traffic can never eat the budget of real requests.
+    """
+
+    def __init__(self):
+        # Re-entrant: a future that finishes instantly runs _done() while schedule() holds the lock.
+        self._lock = threading.RLock()
+        self._executor = None
+        self._inflight: Dict[str, Future] = {}
+
+    def _pool(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            workers = getattr(settings, "PREFETCH_WORKERS", 2)
+            self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="prefetch")
+        return self._executor
+
+    def schedule(self, cache_key: str, fetch: Callable, *args, **kwargs) -> str:
+        """Queue ``fetch(*args, **kwargs)`` to fill ``cache_key``; returns what was decided."""
+        if not getattr(settings, "PREFETCH_ENABLED", True):
+            return "disabled"
+        family = cache_family(cache_key)
+        with self._lock:
+            if cache_key in self._inflight:
+                result = "inflight"
+            elif is_fresh(cache_key):
+                result = "cached"
+            else:
+                limit, window = parse_rate(getattr(settings, "PREFETCH_RATE", "10/min"))
+                allowed, _ = sliding_window_hit("prefetch_upstream", limit, window)
+                result = "scheduled" if allowed else "throttled"
+            if result == "scheduled":
+                future = self._pool().submit(self._run, fetch, *args, **kwargs)
+                self._inflight[cache_key] = future
+                future.add_done_callback(lambda _: self._done(cache_key))
+        record_prefetch(family, result)
+        return result
+
+    def _run(self, fetch: Callable, *args, **kwargs) -> None:
+        try:
+            fetch(*args, **kwargs)
+        except (requests.exceptions.RequestException, ValueError) as exc:
+            logger.info("Prefetch via %s failed: %s", fetch.__name__, exc)
+
+    def _done(self, cache_key: str) -> None:
+        with self._lock:
+            self._inflight.pop(cache_key, None)
+
+    def drain(self, timeout: float = 10) -> None:
+        """Wait for queued prefetches (used by tests and graceful shutdown)."""
+        with self._lock:
+            pending = list(self._inflight.values())
+        wait(pending, timeout=timeout)
+
+
+prefetcher = Prefetcher()
+
+
+def prefetch_detail_follow_ups(coin_id: str) -> None:
+    for days in DETAIL_FOLLOW_UP_DAYS:
+        prefetcher.schedule(coin_chart_cache_key(coin_id, days), fetch_coin_chart_data, coin_id, days=days)
+
+
+def prefetch_watchlist(watchlist_coin_ids: Iterable[str]) -> None:
+    """Details of the coins the dashboard opens right after login.
+
+    The shared market snapshot and global data are kept warm by start-up warm-up,
+    so only the per-user part is fetched here.
+    """
+    limit = getattr(settings, "PREFETCH_WATCHLIST_LIMIT", 10)
+    for coin_id in list(watchlist_coin_ids)[:limit]:
+        prefetcher.schedule(coin_detail_cache_key(coin_id), fetch_coin_detailed_info, coin_id)
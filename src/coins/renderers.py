@@ -0,0 +1,76 @@
+import csv
+import io
+import json
+
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+from .codec import encode_binary_columns
+
+
+class ColumnarJSONRenderer(JSONRenderer):
+    """Chart as ``{"timestamps": [...], "prices": [...], ...}`` (``?format=columnar``)."""
+
+    media_type = "application/vnd.cryptodash.columnar+json"
+    format = "columnar"
+
+
+class ColumnarBinaryRenderer(BaseRenderer):
+    """Chart columns as little-endian float64 arrays behind a small header (``?format=bin``).
+
+    See ``coins.codec.encode_binary_columns`` for the layout.
+    """
+
+    media_type = "application/vnd.cryptodash.columnar"
+    format = "bin"
+    charset = None
+    render_style = "binary"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return encode_binary_columns(data)
+
+
+def _records(data):
+    if data is None:
+        return []
+    return [data] if isinstance(data, dict) else list(data)
+
+
+class CSVRenderer(BaseRenderer):
+    """``text/csv``. The export view streams its body itself; anything else (a dict or a list of
+    dicts, such as an error payload) is rendered as a header row plus one row per record."""
+
+    media_type = "text/csv"
+    format = "csv"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        records = _records(data)
+        if not records:
+            return b""
+        fields = list(dict.fromkeys(key for record in records for key in record))
+        out = io.StringIO()
+        writer = csv.DictWriter(out, fieldnames=fields)
+        writer.writeheader()
+        writer.writerows(records)
+        return out.getvalue().encode("utf-8")
+
+
+class NDJSONRenderer(BaseRenderer):
+    """Newline-delimited JSON. The export view streams its body itself; other payloads are
+    rendered one record per line."""
+
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return "".join(json.dumps(record, cls=JSONEncoder) + "\n" for record in _records(data)).encode("utf-8")
+
+
+class JSONErrorsMixin:
+    """Render error responses (401, 429, ...) as JSON whatever format was negotiated."""
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        if getattr(response, "exception", False) and getattr(request, "accepted_renderer", None) is not None:
+            request.accepted_renderer = JSONRenderer()
+            request.accepted_media_type = JSONRenderer.media_type
+        return super().finalize_response(request, response, *args, **kwargs)
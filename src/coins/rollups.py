@@ -0,0 +1,128 @@
+from datetime import date, timedelta
+from decimal import Decimal
+from itertools import groupby
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Type
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import MonthlyPrice, PriceHistory, PriceRollup, WeeklyPrice
+
+# Approximate days per point, finest first; "1d" is PriceHistory itself.
+INTERVALS: Dict[str, int] = {"1d": 1, "1w": 7, "1M": 30}
+
+
+def week_start(day: date) -> date:
+    return day - timedelta(days=day.weekday())
+
+
+def month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def next_week(start: date) -> date:
+    return start + timedelta(days=7)
+
+
+def next_month(start: date) -> date:
+    return (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+ROLLUPS: Tuple[Tuple[str, Type[PriceRollup], Callable[[date], date], Callable[[date], date]], ...] = (
+    ("1w", WeeklyPrice, week_start, next_week),
+    ("1M", MonthlyPrice, month_start, next_month),
+)
+
+EIGHT_PLACES = Decimal("0.00000001")
+
+
+def retention_cutoff() -> Optional[date]:
+    """Oldest daily row kept by the retention policy, or None when daily rows are kept forever."""
+    days = getattr(settings, "PRICE_HISTORY_RETENTION_DAYS", 0)
+    if not days:
+        return None
+    return timezone.now().date() - timedelta(days=days)
+
+
+def refresh_rollups(coin_id: int, days: Iterable[date]) -> int:
+    """Recompute the weekly and monthly periods containing ``days`` from the daily rows.
+
+    Periods reaching back past the retention cutoff have lost daily rows, so an
+    existing rollup for them is left as is rather than rebuilt from a partial week
+    or month. Returns the number of rollup rows written.
+    """
+    days = set(days)
+    if not days:
+        return 0
+    cutoff = retention_cutoff()
+    written = 0
+    for _, model, start_of, next_start in ROLLUPS:
+        starts = {start_of(day) for day in days}
+        if cutoff:
+            frozen = set(
+                model.objects.filter(coin_id=coin_id, period_start__in=[s for s in starts if s < cutoff])
+                .values_list("period_start", flat=True)
+            )
+            starts -= frozen
+        if not starts:
+            continue
+        daily = (
+            PriceHistory.objects.filter(coin_id=coin_id, date__gte=min(starts), date__lt=next_start(max(starts)))
+            .order_by("date")
+            .values_list("date", "price_usd")
+        )
+        rows = []
+        for period, points in groupby(daily.iterator(), key=lambda row: start_of(row[0])):
+            if period not in starts:
+                continue
+            prices = [price for _, price in points]
+            rows.append(model(
+                coin_id=coin_id,
+                period_start=period,
+                open_usd=prices[0],
+                high_usd=max(prices),
+                low_usd=min(prices),
+                close_usd=prices[-1],
+                avg_usd=(sum(prices) / len(prices)).quantize(EIGHT_PLACES),
+                points=len(prices),
+            ))
+        model.objects.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=["coin", "period_start"],
+            update_fields=["open_usd", "high_usd", "low_usd", "close_usd", "avg_usd", "points"],
+        )
+        written += len(rows)
+    return written
+
+
+def choose_interval(start: date, end: date, interval: str = "auto", max_points: int = 400) -> str:
+    """Coarsest-needed granularity: the finest one that stays within ``max_points`` and retention."""
+    if interval in INTERVALS:
+        return interval
+    span = (end - start).days + 1
+    cutoff = retention_cutoff()
+    for name, days in INTERVALS.items():
+        if name == "1d" and cutoff and start < cutoff:
+            continue
+        if span / days <= max_points:
+            return name
+    return "1M"
+
+
+def price_series(coin_id: int, start: date, end: date, interval: str) -> List[Dict[str, Any]]:
+    """OHLC/average rows between ``start`` and ``end`` at the given interval."""
+    if interval == "1d":
+        rows = PriceHistory.objects.filter(coin_id=coin_id, date__gte=start, date__lte=end).order_by("date")
+        return [
+            {"date": r.date, "open": r.price_usd, "high": r.price_usd, "low": r.price_usd,
+             "close": r.price_usd, "average": r.price_usd, "points": 1}
+            for r in rows.iterator()
+        ]
+    _, model, start_of, _ = next(rollup for rollup in ROLLUPS if rollup[0] == interval)
+    rows = model.objects.filter(coin_id=coin_id, period_start__gte=start_of(start), period_start__lte=end)
+    return [
+        {"date": r.period_start, "open": r.open_usd, "high": r.high_usd, "low": r.low_usd,
+         "close": r.close_usd, "average": r.avg_usd, "points": r.points}
+        for r in rows.order_by("period_start").iterator()
+    ]
@@ -1,3 +1,5 @@
+from decimal import Decimal
+
 from rest_framework import serializers
 from .models import Coin, PriceHistory, Watchlist
 
@@ -10,7 +12,10 @@ class CoinSerializer(serializers.ModelSerializer):
     priceChangePercentage24h = serializers.DecimalField(source='last_pct_change_24h', max_digits=10, decimal_places=4, read_only=True)
     marketCap = serializers.DecimalField(source='market_cap_usd', max_digits=24, decimal_places=2, read_only=True)
     totalVolume = serializers.DecimalField(source='last_volume_24h_usd', max_digits=24, decimal_places=2, read_only=True)
-    
+
+    # Quoted in USD unless the view passes an ``fx_rate`` (units of the target currency per USD) in the context.
+    CONVERTED_FIELDS = ("currentPrice", "marketCap", "totalVolume")
+
     class Meta:
         model = Coin
         fields = [
@@ -25,6 +30,16 @@ class CoinSerializer(serializers.ModelSerializer):
             "totalVolume",
         ]
 
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        rate = self.context.get("fx_rate", 1.0)
+        if rate != 1.0:
+            factor = Decimal(str(rate))
+            for name in self.CONVERTED_FIELDS:
+                if data.get(name) is not None:
+                    data[name] = self.fields[name].to_representation(Decimal(data[name]) * factor)
+        return data
+
 
 class PriceHistorySerializer(serializers.ModelSerializer):
     class Meta:
@@ -36,3 +51,11 @@ class WatchlistSerializer(serializers.ModelSerializer):
     class Meta:
         model = Watchlist
         fields = ["coin", "added_at"]
+
+
+class HoldingInputSerializer(serializers.Serializer):
+    coinId = serializers.CharField(max_length=128, required=False)
+    quantity = serializers.DecimalField(max_digits=28, decimal_places=10, min_value=0)
+    costBasis = serializers.DecimalField(
+        source="cost_basis_usd", max_digits=24, decimal_places=8, min_value=0, required=False, allow_null=True
+    )
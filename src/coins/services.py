@@ -1,26 +1,125 @@
-import os
-from typing import Any, Dict, List
+import time
+from typing import Any, Dict, List, Optional, Tuple
 import requests
 from django.core.cache import cache
 from django.conf import settings
 
-COINGECKO_API_BASE = os.getenv("COINGECKO_API_BASE", "https://api.coingecko.com/api/v3")
-COINGECKO_API_KEY = os.getenv("COINGECKO_API_KEY", "")
+from config.deadlines import remaining
+from monitoring.metrics import record_cache_lookup, record_stale_served, record_upstream_call
+from .codec import pack_chart, trim_coin_detail, trim_market, unpack_chart
+from .hedging import call_hedged
+from .softcache import get_fresh, get_stale, set_entry
+
+# Less budget than this is not worth a round trip; fail fast and serve stale data instead.
+MIN_UPSTREAM_SECONDS = 0.05
+
+
+class DeadlineExceeded(requests.exceptions.Timeout):
+    """The request's deadline budget ran out before CoinGecko could be called."""
 
 
 def _headers() -> Dict[str, str]:
     headers: Dict[str, str] = {}
-    if COINGECKO_API_KEY:
-        headers["x-cg-demo-api-key"] = COINGECKO_API_KEY
+    if settings.COINGECKO_API_KEY:
+        headers["x-cg-demo-api-key"] = settings.COINGECKO_API_KEY
     return headers
 
 
+CACHE_FAMILIES = (
+    "coingecko_top",
+    "coingecko_hist",
+    "coingecko_market",
+    "coingecko_global",
+    "coingecko_coin_detail",
+    "coingecko_chart",
+    "coins_ohlc",
+    "coingecko_fx",
+)
+
+
+def cache_family(cache_key: str) -> str:
+    for family in CACHE_FAMILIES:
+        if cache_key.startswith(family):
+            return family
+    return "other"
+
+
+def _cache_get(cache_key: str) -> Any:
+    cached = get_fresh(cache_key)
+    record_cache_lookup(cache_family(cache_key), cached is not None)
+    return cached
+
+
+def _cache_set(cache_key: str, value: Any) -> None:
+    """Cache an upstream value, kept past its freshness to fall back on when CoinGecko is slow or down."""
+    set_entry(
+        cache_key,
+        value,
+        getattr(settings, "COINGECKO_CACHE_TTL_SECONDS", 300),
+        getattr(settings, "COINGECKO_STALE_TTL_SECONDS", 86400),
+    )
+
+
+def _stale_get(cache_key: str) -> Any:
+    stale = get_stale(cache_key)
+    if stale is not None:
+        record_stale_served(cache_family(cache_key))
+    return stale
+
+
+def upstream_timeout(timeout: float) -> float:
+    """``timeout`` capped at what is left of the request's deadline budget."""
+    budget = remaining()
+    if budget is None:
+        return timeout
+    if budget < MIN_UPSTREAM_SECONDS:
+        raise DeadlineExceeded(f"request deadline exhausted ({budget:.3f}s left)")
+    return min(timeout, budget)
+
+
+def _get(endpoint: str, params: Optional[Dict[str, Any]] = None, timeout: float = 30, **path_params) -> Any:
+    """GET a CoinGecko endpoint template such as "/coins/{id}" and return the decoded JSON.
+
+    Inside a request the timeout is cut to the remaining deadline budget, and a
+    slow call may be hedged with a second one (see :mod:`coins.hedging`).
+    """
+    url = f"{settings.COINGECKO_API_BASE}{endpoint.format(**path_params)}"
+
+    def fetch(seconds: float) -> Any:
+        status = "error"
+        start = time.perf_counter()
+        try:
+            resp = requests.get(url, params=params, headers=_headers(), timeout=seconds)
+            status = str(resp.status_code)
+            resp.raise_for_status()
+            return resp.json()
+        finally:
+            record_upstream_call(endpoint, time.perf_counter() - start, status)
+
+    return call_hedged(endpoint, upstream_timeout(timeout), fetch)
+
+
+def top_coins_cache_key(limit: int) -> str:
+    return f"coingecko_top_{limit}"
+
+
+def coin_history_cache_key(coin_id: str, days: int) -> str:
+    return f"coingecko_hist_{coin_id}_{days}"
+
+
+def coin_detail_cache_key(coin_id: str) -> str:
+    return f"coingecko_coin_detail_{coin_id}"
+
+
+def coin_chart_cache_key(coin_id: str, days: int) -> str:
+    return f"coingecko_chart_{coin_id}_{days}"
+
+
 def fetch_top_coins(limit: int = 10) -> List[Dict[str, Any]]:
-    cache_key = f"coingecko_top_{limit}"
-    cached = cache.get(cache_key)
+    cache_key = top_coins_cache_key(limit)
+    cached = _cache_get(cache_key)
     if cached is not None:
         return cached
-    url = f"{COINGECKO_API_BASE}/coins/markets"
     params = {
         "vs_currency": "usd",
         "order": "market_cap_desc",
@@ -29,61 +128,106 @@ def fetch_top_coins(limit: int = 10) -> List[Dict[str, Any]]:
         "sparkline": "false",
         "price_change_percentage": "24h",
     }
-    resp = requests.get(url, params=params, headers=_headers(), timeout=30)
-    resp.raise_for_status()
-    data = resp.json()
-    cache.set(cache_key, data, getattr(settings, "COINGECKO_CACHE_TTL_SECONDS", 300))
+    try:
+        data = trim_market(_get("/coins/markets", params=params, timeout=30))
+    except requests.exceptions.RequestException:
+        stale = _stale_get(cache_key)
+        if stale is None:
+            raise
+        return stale
+    _cache_set(cache_key, data)
     return data
 
 
 def fetch_coin_history(coin_id: str, days: int = 30) -> Dict[str, Any]:
-    cache_key = f"coingecko_hist_{coin_id}_{days}"
-    cached = cache.get(cache_key)
+    cache_key = coin_history_cache_key(coin_id, days)
+    cached = _cache_get(cache_key)
     if cached is not None:
-        return cached
-    url = f"{COINGECKO_API_BASE}/coins/{coin_id}/market_chart"
+        return unpack_chart(cached)
     params = {"vs_currency": "usd", "days": days}
-    resp = requests.get(url, params=params, headers=_headers(), timeout=30)
-    resp.raise_for_status()
-    data = resp.json()
-    cache.set(cache_key, data, getattr(settings, "COINGECKO_CACHE_TTL_SECONDS", 300))
+    try:
+        data = _get("/coins/{id}/market_chart", params=params, timeout=30, id=coin_id)
+    except requests.exceptions.RequestException:
+        stale = _stale_get(cache_key)
+        if stale is None:
+            raise
+        return unpack_chart(stale)
+    _cache_set(cache_key, pack_chart(data))
     return data
 
 
+def fetch_daily_prices(coin_id: str, days: int) -> List[List[float]]:
+    """Uncached daily ``[timestamp_ms, price]`` points for bulk jobs; raises on upstream errors."""
+    params = {"vs_currency": "usd", "days": days, "interval": "daily"}
+    return _get("/coins/{id}/market_chart", params=params, timeout=30, id=coin_id).get("prices", [])
+
+
 def fetch_coin_market_by_id(coin_id: str) -> Dict[str, Any]:
     cache_key = f"coingecko_market_{coin_id}"
-    cached = cache.get(cache_key)
+    cached = _cache_get(cache_key)
     if cached is not None:
         return cached
-    url = f"{COINGECKO_API_BASE}/coins/markets"
     params = {
         "vs_currency": "usd",
         "ids": coin_id,
         "sparkline": "false",
     }
-    resp = requests.get(url, params=params, headers=_headers(), timeout=30)
-    resp.raise_for_status()
-    data = resp.json()
-    item = data[0] if isinstance(data, list) and data else {}
-    cache.set(cache_key, item, getattr(settings, "COINGECKO_CACHE_TTL_SECONDS", 300))
+    try:
+        data = _get("/coins/markets", params=params, timeout=30)
+    except requests.exceptions.RequestException:
+        stale = _stale_get(cache_key)
+        if stale is None:
+            raise
+        return stale
+    item = trim_market(data[:1])[0] if isinstance(data, list) and data else {}
+    _cache_set(cache_key, item)
     return item
 
 
+FX_CACHE_KEY = "coingecko_fx"
+# Last good table, kept without expiry so an outage degrades to slightly stale rates rather than USD only.
+FX_LAST_GOOD_KEY = "coingecko_fx_last"
+# After a failed refresh the fallback table is cached this long, so an outage costs one upstream call a minute.
+FX_RETRY_SECONDS = 60
+
+
+def fetch_exchange_rates() -> Dict[str, float]:
+    """Units of each currency per 1 USD, derived from CoinGecko's BTC-denominated /exchange_rates."""
+    # Kept under its own TTLs, not as a soft-expiry entry: FX_LAST_GOOD_KEY is the fallback.
+    cached = cache.get(FX_CACHE_KEY)
+    record_cache_lookup(cache_family(FX_CACHE_KEY), cached is not None)
+    if cached is not None:
+        return cached
+    try:
+        rates = _get("/exchange_rates", timeout=10).get("rates") or {}
+    except (requests.exceptions.RequestException, ValueError):
+        rates = {}
+    usd = (rates.get("usd") or {}).get("value")
+    if not usd:
+        fallback = cache.get(FX_LAST_GOOD_KEY) or {"usd": 1.0}
+        cache.set(FX_CACHE_KEY, fallback, FX_RETRY_SECONDS)
+        return fallback
+    table = {code: float(entry["value"]) / usd for code, entry in rates.items() if entry.get("value")}
+    cache.set(FX_CACHE_KEY, table, getattr(settings, "FX_CACHE_TTL_SECONDS", 3600))
+    cache.set(FX_LAST_GOOD_KEY, table, None)
+    return table
+
+
 def fetch_global_market_data() -> Dict[str, Any]:
     """Fetch global cryptocurrency market data including Bitcoin dominance"""
     cache_key = "coingecko_global"
-    cached = cache.get(cache_key)
+    cached = _cache_get(cache_key)
     if cached is not None:
         return cached
     
     try:
-        url = f"{COINGECKO_API_BASE}/global"
-        resp = requests.get(url, headers=_headers(), timeout=10)
-        resp.raise_for_status()
-        data = resp.json()
-        cache.set(cache_key, data, getattr(settings, "COINGECKO_CACHE_TTL_SECONDS", 300))
+        data = _get("/global", timeout=10)
+        _cache_set(cache_key, data)
         return data
     except (requests.exceptions.RequestException, requests.exceptions.Timeout) as e:
+        stale = _stale_get(cache_key)
+        if stale is not None:
+            return stale
         # Return mock data if API fails
         return {
             "data": {
@@ -98,13 +242,12 @@ def fetch_global_market_data() -> Dict[str, Any]:
 
 def fetch_coin_detailed_info(coin_id: str) -> Dict[str, Any]:
     """Fetch detailed information about a specific coin"""
-    cache_key = f"coingecko_coin_detail_{coin_id}"
-    cached = cache.get(cache_key)
+    cache_key = coin_detail_cache_key(coin_id)
+    cached = _cache_get(cache_key)
     if cached is not None:
         return cached
     
     try:
-        url = f"{COINGECKO_API_BASE}/coins/{coin_id}"
         params = {
             "localization": "false",
             "tickers": "false",
@@ -113,12 +256,13 @@ def fetch_coin_detailed_info(coin_id: str) -> Dict[str, Any]:
             "developer_data": "false",
             "sparkline": "false"
         }
-        resp = requests.get(url, params=params, headers=_headers(), timeout=10)
-        resp.raise_for_status()
-        data = resp.json()
-        cache.set(cache_key, data, getattr(settings, "COINGECKO_CACHE_TTL_SECONDS", 300))
+        data = trim_coin_detail(_get("/coins/{id}", params=params, timeout=10, id=coin_id))
+        _cache_set(cache_key, data)
         return data
     except (requests.exceptions.RequestException, requests.exceptions.Timeout) as e:
+        stale = _stale_get(cache_key)
+        if stale is not None:
+            return stale
         # Return mock data if API fails
         return {
             "id": coin_id,
@@ -142,46 +286,58 @@ def fetch_coin_detailed_info(coin_id: str) -> Dict[str, Any]:
         }
 
 
+def mock_chart_data(days: int) -> Dict[str, Any]:
+    """Deterministic placeholder chart used when CoinGecko is unreachable"""
+    current_time = int(time.time() * 1000)
+    mock_prices = []
+    mock_volumes = []
+    mock_market_caps = []
+
+    base_price = 1000.0
+    for i in range(days):
+        timestamp = current_time - (days - i) * 24 * 60 * 60 * 1000
+        price = base_price + (i * 10) + (i % 3 - 1) * 50
+        volume = 1000000 + (i * 10000)
+        market_cap = price * 1000000
+
+        mock_prices.append([timestamp, price])
+        mock_volumes.append([timestamp, volume])
+        mock_market_caps.append([timestamp, market_cap])
+
+    return {
+        "prices": mock_prices,
+        "total_volumes": mock_volumes,
+        "market_caps": mock_market_caps
+    }
+
+
 def fetch_coin_chart_data(coin_id: str, days: int = 7) -> Dict[str, Any]:
     """Fetch comprehensive chart data for a coin including prices, volumes, and market caps"""
-    cache_key = f"coingecko_chart_{coin_id}_{days}"
-    cached = cache.get(cache_key)
+    return fetch_coin_chart(coin_id, days=days)[0]
+
+
+def fetch_coin_chart(coin_id: str, days: int = 7) -> Tuple[Dict[str, Any], bool]:
+    """Chart data as fetch_coin_chart_data returns it, and whether this call got it from CoinGecko.
+
+    False means the payload is cached, stale or the offline placeholder.
+    """
+    cache_key = coin_chart_cache_key(coin_id, days)
+    cached = _cache_get(cache_key)
     if cached is not None:
-        return cached
+        return unpack_chart(cached), False
     
     try:
-        url = f"{COINGECKO_API_BASE}/coins/{coin_id}/market_chart"
         params = {
             "vs_currency": "usd",
             "days": days,
             "interval": "daily" if days > 1 else "hourly"
         }
-        resp = requests.get(url, params=params, headers=_headers(), timeout=10)
-        resp.raise_for_status()
-        data = resp.json()
-        cache.set(cache_key, data, getattr(settings, "COINGECKO_CACHE_TTL_SECONDS", 300))
-        return data
+        data = _get("/coins/{id}/market_chart", params=params, timeout=10, id=coin_id)
+        _cache_set(cache_key, pack_chart(data))
+        return data, True
     except (requests.exceptions.RequestException, requests.exceptions.Timeout) as e:
+        stale = _stale_get(cache_key)
+        if stale is not None:
+            return unpack_chart(stale), False
         # Return mock data if API fails
-        import time
-        current_time = int(time.time() * 1000)
-        mock_prices = []
-        mock_volumes = []
-        mock_market_caps = []
-        
-        base_price = 1000.0
-        for i in range(days):
-            timestamp = current_time - (days - i) * 24 * 60 * 60 * 1000
-            price = base_price + (i * 10) + (i % 3 - 1) * 50
-            volume = 1000000 + (i * 10000)
-            market_cap = price * 1000000
-            
-            mock_prices.append([timestamp, price])
-            mock_volumes.append([timestamp, volume])
-            mock_market_caps.append([timestamp, market_cap])
-        
-        return {
-            "prices": mock_prices,
-            "total_volumes": mock_volumes,
-            "market_caps": mock_market_caps
-        }
+        return mock_chart_data(days), False
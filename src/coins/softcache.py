@@ -0,0 +1,31 @@
+"""Cache entries with a soft expiry.
+
+Each entry is stored once as ``(fresh_until, value)`` and kept in the cache well
+past ``fresh_until``, so the same copy serves fresh reads and, once it has gone
+stale, the fallback when CoinGecko is slow or down.
+"""
+import time
+from typing import Any
+
+from django.core.cache import cache
+
+
+def set_entry(cache_key: str, value: Any, fresh_for: float, keep_for: float) -> None:
+    cache.set(cache_key, (time.time() + fresh_for, value), keep_for)
+
+
+def get_fresh(cache_key: str) -> Any:
+    """The cached value while it is fresh, else None."""
+    entry = cache.get(cache_key)
+    return entry[1] if entry is not None and time.time() < entry[0] else None
+
+
+def get_stale(cache_key: str) -> Any:
+    """The cached value however old it is, or None once it has been dropped."""
+    entry = cache.get(cache_key)
+    return None if entry is None else entry[1]
+
+
+def is_fresh(cache_key: str) -> bool:
+    entry = cache.get(cache_key)
+    return entry is not None and time.time() < entry[0]
@@ -1,6 +1,37 @@
-from unittest.mock import patch
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from io import StringIO
+from unittest.mock import MagicMock, patch
+
+import requests
+from rest_framework.pagination import PageNumberPagination
 from rest_framework.test import APITestCase
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.cache import cache, caches
+from django.core.management import CommandError, call_command
+from django.db import DatabaseError
+from django.test import SimpleTestCase, override_settings
+
+from .candles import bin_ohlc, coin_candles
+from .compare import align_series, fetch_price_series, rebase
+from .codec import decode_binary_columns, pack_chart, pack_intraday, trim_coin_detail, unpack_chart, unpack_intraday
+from .intraday import load_intraday, store_intraday
+from .models import BackfillCheckpoint, Coin, Holding, IntradaySeries, MonthlyPrice, PriceHistory, Watchlist, WeeklyPrice
+from .persistence import store_price_history, upsert_market_coins
+from .rollups import choose_interval
+from .portfolio import price_matrix, value_series
+from .prefetch import prefetcher
+from .renderers import CSVRenderer, NDJSONRenderer
+from config.deadlines import deadline
+from monitoring.metrics import UPSTREAM_HEDGES, UPSTREAM_SECONDS, registry
+from .throttling import sliding_window_hit
+from .services import (
+    FX_CACHE_KEY, FX_LAST_GOOD_KEY, DeadlineExceeded, _cache_set, _get, coin_chart_cache_key, coin_detail_cache_key,
+    fetch_exchange_rates, fetch_top_coins, top_coins_cache_key, upstream_timeout,
+)
+from .writebehind import WriteBehindQueue, write_behind
 
 
 class TestCoinsApi(APITestCase):
@@ -10,9 +41,11 @@ class TestCoinsApi(APITestCase):
         resp = self.client.post("/api/auth/login", {"username": "u1", "password": "pass12345"}, format="json")
         self.access = resp.data["access"]
         self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.access}")
+        self.addCleanup(write_behind.flush)  # the queue is global; leave nothing for later tests
 
-    @patch("coins.services.fetch_top_coins")
-    def test_top_coins(self, mock_fetch):
+    @patch.object(write_behind, "_ensure_worker")
+    @patch("coins.views.fetch_top_coins")
+    def test_top_coins(self, mock_fetch, _):
         mock_fetch.return_value = [
             {"id": "bitcoin", "symbol": "btc", "name": "Bitcoin", "current_price": 50000},
         ]
@@ -21,10 +54,776 @@ class TestCoinsApi(APITestCase):
         self.assertIn("results", resp.data)
         self.assertEqual(len(resp.data["results"]), 1)
 
-    @patch("coins.services.fetch_coin_history")
-    def test_coin_history(self, mock_hist):
+    @patch.object(write_behind, "_ensure_worker")
+    @patch("coins.views.fetch_coin_history")
+    def test_coin_history(self, mock_hist, _):
         mock_hist.return_value = {"prices": [[1730000000000, 50000.0]]}
         resp = self.client.get("/api/coins/bitcoin/history?days=1")
         self.assertEqual(resp.status_code, 200)
         self.assertTrue(len(resp.data) >= 1)
+        self.assertEqual(self.client.get("/api/coins/bitcoin/history?vs_currency=eur").status_code, 400)
+
+
+
+@override_settings(
+    REST_FRAMEWORK={**settings.REST_FRAMEWORK, "DEFAULT_THROTTLE_RATES": {"coins_cached": "3/min", "coins_upstream": "1/min"}},
+    PREFETCH_ENABLED=False,
+)
+class TestCoinGeckoThrottle(APITestCase):
+    def setUp(self):
+        cache.clear()
+        User = get_user_model()
+        User.objects.create_user(username="t1", password="pass12345")
+        resp = self.client.post("/api/auth/login", {"username": "t1", "password": "pass12345"}, format="json")
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {resp.data['access']}")
+
+    @patch("coins.views.fetch_coin_detailed_info")
+    def test_upstream_misses_are_limited_before_the_view_runs(self, mock_detail):
+        mock_detail.return_value = {"id": "bitcoin", "market_data": {}}
+        self.assertEqual(self.client.get("/api/coins/random-1/detail").status_code, 200)
+        resp = self.client.get("/api/coins/random-2/detail")
+        self.assertEqual(resp.status_code, 429)
+        self.assertEqual(mock_detail.call_count, 1)
+
+    def test_window_is_shared_and_denied_hits_are_refunded(self):
+        window = 3600  # hour-wide, so the hits all land in the same fixed window
+        key = f"budget_{int(time.time() // window)}"
+        self.assertEqual(sliding_window_hit("budget", 2, window, cost=2), (True, 0.0))
+        cache.clear()  # another worker: its local cache knows nothing of these hits
+        self.assertFalse(sliding_window_hit("budget", 2, window)[0])
+        self.assertFalse(sliding_window_hit("budget", 2, window)[0])
+        self.assertEqual(caches["shared"].get(key), 2)
+
+    @patch("coins.views.fetch_coin_detailed_info")
+    def test_cached_hits_use_separate_budget(self, mock_detail):
+        mock_detail.return_value = {"id": "bitcoin", "market_data": {}}
+        _cache_set(coin_detail_cache_key("bitcoin"), mock_detail.return_value)
+        self.assertEqual(self.client.get("/api/coins/random-1/detail").status_code, 200)
+        for _ in range(3):
+            self.assertEqual(self.client.get("/api/coins/bitcoin/detail").status_code, 200)
+        self.assertEqual(self.client.get("/api/coins/bitcoin/detail").status_code, 429)
+
+
+@override_settings(PREFETCH_RATE="3/min")
+class TestPrefetch(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(username="p1", password="pass12345")
+
+    def login(self):
+        resp = self.client.post("/api/auth/login", {"username": "p1", "password": "pass12345"}, format="json")
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {resp.data['access']}")
+        prefetcher.drain()
+
+    @patch("coins.services.requests.get")
+    def test_detail_prefetches_follow_up_charts(self, mock_get):
+        mock_get.return_value = MagicMock(status_code=200, json=lambda: {"id": "bitcoin", "market_data": {}, "prices": []})
+        self.login()
+        self.assertEqual(self.client.get("/api/coins/bitcoin/detail").status_code, 200)
+        prefetcher.drain()
+        self.assertTrue(cache.has_key(coin_chart_cache_key("bitcoin", 7)))
+        self.assertTrue(cache.has_key(coin_chart_cache_key("bitcoin", 30)))
+
+        calls = mock_get.call_count
+        self.client.get("/api/coins/bitcoin/price-history?range=30d")
+        self.assertEqual(mock_get.call_count, calls)
+
+    @patch("coins.services.requests.get")
+    def test_login_prefetches_watchlist_within_budget(self, mock_get):
+        mock_get.return_value = MagicMock(status_code=200, json=lambda: {"market_data": {}})
+        for cg_id in ("bitcoin", "ethereum", "solana", "cardano"):
+            Watchlist.objects.create(user=self.user, coin=Coin.objects.create(cg_id=cg_id, symbol=cg_id[:3], name=cg_id))
+        self.login()
+        warmed = [cache.has_key(coin_detail_cache_key(c)) for c in ("bitcoin", "ethereum", "solana", "cardano")]
+        self.assertEqual(sum(warmed), 3)
+        self.assertEqual(mock_get.call_count, 3)
+
+
+class TestCacheCodec(SimpleTestCase):
+    def test_chart_round_trip_shares_timestamps(self):
+        chart = {
+            "prices": [[1730000000000 + i * 3600000, 50000.5 + i] for i in range(200)],
+            "market_caps": [[1730000000000 + i * 3600000, 1e12 + i] for i in range(200)],
+            "total_volumes": [[1730000000000 + i * 3600000 + 1, 3e10] for i in range(200)],
+        }
+        packed = pack_chart(chart)
+        self.assertIsNone(packed["series"]["market_caps"][0])
+        self.assertIsNotNone(packed["series"]["total_volumes"][0])
+        self.assertEqual(unpack_chart(packed), chart)
+        self.assertEqual(unpack_chart({"prices": []}), {"prices": []})
+
+    def test_detail_keeps_only_usd_fields_the_view_reads(self):
+        detail = {
+            "id": "bitcoin",
+            "name": "Bitcoin",
+            "symbol": "btc",
+            "description": {"en": "..." * 1000},
+            "image": {"large": "l.png", "small": "s.png"},
+            "market_data": {"current_price": {"usd": 1.0, "eur": 0.9}, "market_cap_rank": 1, "sparkline_7d": {}},
+        }
+        self.assertEqual(trim_coin_detail(detail), {
+            "id": "bitcoin",
+            "name": "Bitcoin",
+            "symbol": "btc",
+            "image": {"large": "l.png"},
+            "market_data": {"current_price": {"usd": 1.0}, "market_cap_rank": 1},
+        })
+
+
+class TestPriceHistoryFormats(APITestCase):
+    chart = {
+        "prices": [[1730000000000, 1.5], [1730086400000, 2.5]],
+        "total_volumes": [[1730000000000, 10.0], [1730086400000, 20.0]],
+        "market_caps": [[1730000000000, 100.0]],
+    }
+
+    def setUp(self):
+        cache.clear()
+        get_user_model().objects.create_user(username="f1", password="pass12345")
+        resp = self.client.post("/api/auth/login", {"username": "f1", "password": "pass12345"}, format="json")
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {resp.data['access']}")
+
+    @patch("coins.views.fetch_coin_chart_data")
+    def test_columnar_json(self, mock_chart):
+        mock_chart.return_value = self.chart
+        resp = self.client.get("/api/coins/bitcoin/price-history?format=columnar")
+        self.assertEqual(resp["Content-Type"], "application/vnd.cryptodash.columnar+json")
+        self.assertEqual(resp.json(), {
+            "timestamps": [1730000000000, 1730086400000],
+            "prices": [1.5, 2.5],
+            "volumes": [10.0, 20.0],
+            "marketCaps": [100.0, None],
+        })
+
+    @patch("coins.views.fetch_coin_chart_data")
+    def test_binary_by_accept_header(self, mock_chart):
+        mock_chart.return_value = self.chart
+        resp = self.client.get("/api/coins/bitcoin/price-history", HTTP_ACCEPT="application/vnd.cryptodash.columnar")
+        self.assertEqual(resp.status_code, 200)
+        columns = decode_binary_columns(resp.content)
+        self.assertEqual(columns["timestamps"], [1730000000000.0, 1730086400000.0])
+        self.assertEqual(columns["volumes"], [10.0, 20.0])
+        self.assertNotEqual(columns["marketCaps"][1], columns["marketCaps"][1])  # NaN
+
+    def test_errors_stay_json(self):
+        self.client.credentials()
+        resp = self.client.get("/api/coins/bitcoin/price-history?format=bin")
+        self.assertEqual(resp.status_code, 401)
+        self.assertIn("detail", resp.json())
+
+
+class TestHistoryExport(APITestCase):
+    def setUp(self):
+        get_user_model().objects.create_user(username="e1", password="pass12345")
+        resp = self.client.post("/api/auth/login", {"username": "e1", "password": "pass12345"}, format="json")
+        self.auth = f"Bearer {resp.data['access']}"
+        self.client.credentials(HTTP_AUTHORIZATION=self.auth)
+        for cg_id in ("bitcoin", "ethereum", "solana"):
+            coin = Coin.objects.create(cg_id=cg_id, symbol=cg_id[:3], name=cg_id)
+            for day in (1, 2, 3):
+                PriceHistory.objects.create(coin=coin, date=date(2024, 1, day), price_usd="100.5")
+
+    def test_streams_csv_for_coin_set_and_range(self):
+        resp = self.client.get("/api/coins/history/export?coins=bitcoin,solana&start=2024-01-02")
+        self.assertTrue(resp.streaming)
+        self.assertEqual(resp["Content-Type"], "text/csv; charset=utf-8")
+        lines = b"".join(resp.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], "coin,date,price_usd")
+        self.assertEqual(lines[1:], [
+            "bitcoin,2024-01-02,100.50000000",
+            "bitcoin,2024-01-03,100.50000000",
+            "solana,2024-01-02,100.50000000",
+            "solana,2024-01-03,100.50000000",
+        ])
+
+    def test_ndjson_and_bad_dates(self):
+        resp = self.client.get("/api/coins/history/export?coins=ethereum&format=ndjson")
+        lines = b"".join(resp.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertIn('"priceUsd": "100.50000000"', lines[0])
+        resp = self.client.get("/api/coins/history/export?start=yesterday")
+        self.assertEqual(resp.status_code, 400)
+        self.assertIn("start", resp.json())
+
+    @override_settings(EXPORT_CHUNK_SIZE=2)
+    async def test_streams_async_iterator_under_asgi(self):
+        resp = await self.async_client.get(
+            "/api/coins/history/export?coins=bitcoin,solana", headers={"authorization": self.auth},
+        )
+        self.assertTrue(resp.is_async)
+        chunks = [chunk async for chunk in resp.streaming_content]
+        self.assertEqual(len(chunks), 4)  # header + 6 rows, two lines per chunk
+        self.assertEqual(b"".join(chunks).decode().splitlines()[-1], "solana,2024-01-03,100.50000000")
+
+    def test_renderers_handle_plain_payloads(self):
+        self.assertEqual(CSVRenderer().render({"detail": "Not found."}), b"detail\r\nNot found.\r\n")
+        self.assertEqual(NDJSONRenderer().render([{"a": 1}, {"a": 2}]), b'{"a": 1}\n{"a": 2}\n')
+        self.assertEqual(CSVRenderer().render(None), b"")
+
+    def test_command_writes_ndjson(self):
+        out = StringIO()
+        call_command("export_history", coins="bitcoin", format="ndjson", end="2024-01-01", stdout=out)
+        self.assertEqual(out.getvalue(), '{"coin": "bitcoin", "date": "2024-01-01", "priceUsd": "100.50000000"}\n')
+
+
+class TestBackfillHistory(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.fail_for = {"solana"}
+        self.requested = []
+
+    def fake_get(self, url, params=None, **kwargs):
+        coin_id = url.split("/coins/")[1].split("/")[0]
+        self.requested.append(coin_id)
+        if coin_id in self.fail_for:
+            return MagicMock(status_code=404, raise_for_status=MagicMock(side_effect=requests.HTTPError("404")))
+        # Two points on the last day: the later one should win.
+        prices = [[1704067200000, 1.0], [1704153600000, 2.0], [1704200000000, 2.5]]
+        return MagicMock(status_code=200, json=lambda: {"prices": prices})
+
+    def test_resumes_after_failures(self):
+        with patch("coins.services.requests.get", side_effect=self.fake_get):
+            with self.assertRaises(CommandError):
+                call_command("backfill_history", coins="bitcoin,ethereum,solana", days=30, stdout=StringIO(), stderr=StringIO())
+            self.assertEqual(PriceHistory.objects.filter(coin__cg_id="bitcoin").count(), 2)
+            self.assertEqual(str(PriceHistory.objects.get(coin__cg_id="bitcoin", date=date(2024, 1, 2)).price_usd), "2.50000000")
+            self.assertIsNone(BackfillCheckpoint.objects.get(cg_id="solana").completed_at)
+
+            self.fail_for = set()
+            self.requested = []
+            call_command("backfill_history", coins="bitcoin,ethereum,solana", days=30, stdout=StringIO())
+            self.assertEqual(self.requested, ["solana"])
+            self.assertEqual(BackfillCheckpoint.objects.filter(completed_at__isnull=False).count(), 3)
+
+
+def daily_points(start: date, prices):
+    midnight = datetime(start.year, start.month, start.day, tzinfo=dt_timezone.utc)
+    return [[(midnight + timedelta(days=i)).timestamp() * 1000, p] for i, p in enumerate(prices)]
+
+
+class TestRollups(APITestCase):
+    def setUp(self):
+        self.coin = Coin.objects.create(cg_id="bitcoin", symbol="BTC", name="Bitcoin")
+
+    def test_incremental_weekly_and_monthly_rollups(self):
+        # 2024-01-29 is a Monday: one week spans January and February.
+        store_price_history(self.coin, daily_points(date(2024, 1, 29), [10, 30, 20]))
+        store_price_history(self.coin, daily_points(date(2024, 2, 1), [5, 40]))
+        week = WeeklyPrice.objects.get(coin=self.coin, period_start=date(2024, 1, 29))
+        self.assertEqual(
+            (week.open_usd, week.high_usd, week.low_usd, week.close_usd, week.avg_usd, week.points),
+            (10, 40, 5, 40, 21, 5),
+        )
+        jan, feb = MonthlyPrice.objects.filter(coin=self.coin)
+        self.assertEqual((jan.open_usd, jan.close_usd, jan.points), (10, 20, 3))
+        self.assertEqual((feb.open_usd, feb.close_usd, feb.points), (5, 40, 2))
+
+    @override_settings(PRICE_HISTORY_RETENTION_DAYS=30)
+    def test_prune_stops_between_batches(self):
+        today = datetime.now(dt_timezone.utc).date()
+        store_price_history(self.coin, daily_points(today - timedelta(days=89), range(1, 91)))
+        expiring = PriceHistory.objects.filter(date__lt=today - timedelta(days=30))
+        before = expiring.count()
+        # Checked once per coin, then before each batch: the lease is lost after the first one.
+        stop = MagicMock(**{"is_set.side_effect": [False, False, True]})
+        call_command("prune_price_history", batch_size=10, sleep=0, stop=stop, stdout=StringIO())
+        self.assertEqual(expiring.count(), before - 10)
+
+    def test_interval_choice(self):
+        end = date(2024, 12, 31)
+        self.assertEqual(choose_interval(end - timedelta(days=89), end), "1d")
+        self.assertEqual(choose_interval(end - timedelta(days=3 * 365), end), "1w")
+        self.assertEqual(choose_interval(end - timedelta(days=3 * 365), end, max_points=50), "1M")
+        self.assertEqual(choose_interval(end - timedelta(days=3 * 365), end, interval="1d"), "1d")
+
+    @override_settings(PRICE_HISTORY_RETENTION_DAYS=30)
+    def test_prune_keeps_rollups_and_series_falls_back(self):
+        today = datetime.now(dt_timezone.utc).date()
+        store_price_history(self.coin, daily_points(today - timedelta(days=89), range(1, 91)))
+        call_command("prune_price_history", sleep=0, stdout=StringIO())
+        self.assertFalse(PriceHistory.objects.filter(date__lt=today - timedelta(days=30)).exists())
+        self.assertEqual(sum(WeeklyPrice.objects.values_list("points", flat=True)), 90)
+
+        get_user_model().objects.create_user(username="r1", password="pass12345")
+        resp = self.client.post("/api/auth/login", {"username": "r1", "password": "pass12345"}, format="json")
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {resp.data['access']}")
+        resp = self.client.get("/api/coins/bitcoin/history/series?days=90")
+        self.assertEqual(resp.data["interval"], "1w")
+        self.assertEqual(resp.data["points"][-1]["close"], 90.0)
+        resp = self.client.get("/api/coins/bitcoin/history/series?days=30")
+        self.assertEqual(resp.data["interval"], "1d")
+
+
+class TestIntradayStore(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.coin = Coin.objects.create(cg_id="bitcoin", symbol="BTC", name="Bitcoin")
+
+    def window(self, end_ms, count, step=300000):
+        ts = [end_ms - (count - 1 - i) * step for i in range(count)]
+        return {
+            "prices": [[t, 100.0 + i] for i, t in enumerate(ts)],
+            "total_volumes": [[t, 5.0] for t in ts],
+            "market_caps": [[t, 7.0] for t in ts],
+        }
+
+    def test_pack_round_trip_with_irregular_timestamps(self):
+        timestamps = [1730000000000, 1730000300000, 1730000300001, 1730003000000]
+        blob = pack_intraday(timestamps, {"prices": [1.0, None, 3.0, 4.0]})
+        ts, columns = unpack_intraday(blob)
+        self.assertEqual(list(ts), timestamps)
+        self.assertEqual(columns["prices"][2], 3.0)
+        self.assertNotEqual(columns["prices"][1], columns["prices"][1])
+
+    def test_overlapping_windows_merge_into_one_row_per_day(self):
+        day_start = 1730073600000  # 2024-10-28 00:00 UTC
+        store_intraday(self.coin, self.window(day_start + 3_600_000, 10))
+        store_intraday(self.coin, self.window(day_start + 5_400_000, 10))
+        self.assertEqual(IntradaySeries.objects.filter(coin=self.coin).count(), 1)
+        ts, columns = load_intraday(self.coin.pk, day_start, day_start + 86_400_000)
+        self.assertEqual(len(ts), 16)
+        self.assertEqual(list(ts), sorted(set(ts)))
+        self.assertEqual(columns["volumes"][0], 5.0)
+
+    @patch("coins.services.requests.get")
+    def test_1d_chart_is_served_from_store_once_fetched(self, mock_get):
+        now_ms = int(datetime.now(dt_timezone.utc).timestamp() * 1000)
+        mock_get.return_value = MagicMock(status_code=200, json=lambda: self.window(now_ms, 288))
+        get_user_model().objects.create_user(username="i1", password="pass12345")
+        resp = self.client.post("/api/auth/login", {"username": "i1", "password": "pass12345"}, format="json")
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {resp.data['access']}")
+
+        with patch.object(write_behind, "_ensure_worker"):
+            first = self.client.get("/api/coins/bitcoin/price-history?range=1d").data
+            self.client.get("/api/coins/bitcoin/price-history?range=1d")  # cached: nothing more queued
+            self.assertFalse(IntradaySeries.objects.exists())  # the GET only queued the write
+            self.assertEqual(write_behind.flush(), 288)
+        cache.clear()  # e.g. another worker or a restart
+        second = self.client.get("/api/coins/bitcoin/price-history?range=1d").data
+        self.assertEqual(mock_get.call_count, 1)
+        self.assertEqual(second["prices"], first["prices"])
+
+    @patch("coins.services.requests.get", side_effect=requests.exceptions.ConnectionError("offline"))
+    def test_1d_placeholder_chart_is_not_stored(self, mock_get):
+        get_user_model().objects.create_user(username="i2", password="pass12345")
+        resp = self.client.post("/api/auth/login", {"username": "i2", "password": "pass12345"}, format="json")
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {resp.data['access']}")
+        with patch.object(write_behind, "_ensure_worker"):
+            self.assertEqual(self.client.get("/api/coins/bitcoin/price-history?range=1d").status_code, 200)
+            self.assertEqual(write_behind.pending(), 0)
+
+
+class TestOHLC(APITestCase):
+    def setUp(self):
+        cache.clear()
+
+    def series(self, start, count, step=3_600_000):
+        ts = [start + i * step for i in range(count)]
+        return {
+            "prices": [[t, float(t // 3_600_000 % 7)] for t in ts],
+            "total_volumes": [[t, float(t // 3_600_000)] for t in ts],
+        }
+
+    def test_binning(self):
+        candles = bin_ohlc([0, 1000, 2000, 3600000, 3601000], [5.0, 9.0, 1.0, 4.0, 6.0], [1.0, 2.0, 3.0, 4.0, 5.0], 3_600_000)
+        self.assertEqual(candles, [[0, 5.0, 9.0, 1.0, 1.0, 3.0], [3600000, 4.0, 6.0, 4.0, 6.0, 5.0]])
+
+    def test_incremental_refresh_matches_full_rebin(self):
+        day = 86_400_000
+        first = self.series(10 * day, 48)
+        later = self.series(10 * day + 5 * 3_600_000, 48)  # window slid by five hours
+        with patch("coins.candles.fetch_coin_history", side_effect=[first, first, later]) as mock_hist:
+            coin_candles("bitcoin", 2, "4h")
+            coin_candles("bitcoin", 2, "4h")
+            refreshed = coin_candles("bitcoin", 2, "4h")
+        self.assertEqual(mock_hist.call_count, 3)
+        full = bin_ohlc(*zip(*[(p[0], p[1], v[1]) for p, v in zip(later["prices"], later["total_volumes"], strict=True)], strict=True), 4 * 3_600_000)
+        self.assertEqual(refreshed, full)
+
+    def test_endpoint_validates_interval(self):
+        get_user_model().objects.create_user(username="o1", password="pass12345")
+        resp = self.client.post("/api/auth/login", {"username": "o1", "password": "pass12345"}, format="json")
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {resp.data['access']}")
+        self.assertEqual(self.client.get("/api/coins/bitcoin/ohlc?range=30d&interval=5m").status_code, 400)
+        with patch("coins.candles.fetch_coin_history", return_value=self.series(0, 24)):
+            resp = self.client.get("/api/coins/bitcoin/ohlc?range=1d")
+        self.assertEqual(resp.data["interval"], "15m")
+        self.assertEqual(len(resp.data["candles"]), 24)
+
+
+class TestCompare(APITestCase):
+    def setUp(self):
+        cache.clear()
+        get_user_model().objects.create_user(username="c1", password="pass12345")
+        resp = self.client.post("/api/auth/login", {"username": "c1", "password": "pass12345"}, format="json")
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {resp.data['access']}")
+
+    def test_align_and_rebase(self):
+        day = 86_400_000
+        timestamps, aligned = align_series({
+            "a": [[0, 1.0], [day, 2.0], [2 * day, 4.0], [3 * day, 8.0]],
+            "b": [[day + 5, 10.0], [2 * day + 7, 20.0], [3 * day - 1, 30.0]],
+        }, day)
+        # Common span is day+5 .. 3*day-1; each point takes the latest price at or before it.
+        self.assertEqual(timestamps, [day + 5, 2 * day + 5, 3 * day - 1])
+        self.assertEqual(aligned["a"], [2.0, 4.0, 4.0])
+        self.assertEqual(aligned["b"], [10.0, 10.0, 30.0])
+        self.assertEqual(rebase(aligned["b"]), [100.0, 100.0, 300.0])
+        self.assertEqual(rebase([None, 0.0]), [None, None])
+
+    def test_endpoint_fetches_missing_series_once(self):
+        day = 86_400_000
+
+        def market_chart(endpoint, params=None, timeout=30, id=None):
+            scale = {"bitcoin": 100.0, "ethereum": 10.0}[id]
+            return {"prices": [[i * day, scale * (i + 1)] for i in range(3)], "total_volumes": [], "market_caps": []}
+
+        with patch("coins.services._get", side_effect=market_chart) as mock_get:
+            first = self.client.get("/api/coins/compare?ids=bitcoin,ethereum&range=7d")
+            second = self.client.get("/api/coins/compare?ids=ethereum,bitcoin&range=7d")
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(mock_get.call_count, 2)
+        self.assertEqual(first.data["timestamps"], [0, day, 2 * day])
+        self.assertEqual(first.data["series"]["bitcoin"], [100.0, 200.0, 300.0])
+        self.assertEqual(second.data["series"]["ethereum"], first.data["series"]["ethereum"])
+
+    @override_settings(REST_FRAMEWORK={
+        **settings.REST_FRAMEWORK, "DEFAULT_THROTTLE_RATES": {"coins_cached": "100/min", "coins_upstream": "4/min"},
+    })
+    def test_budget_charged_per_uncached_series(self):
+        chart = {"prices": [[0, 1.0]], "total_volumes": [], "market_caps": []}
+        with patch("coins.services._get", return_value=chart):
+            self.assertEqual(self.client.get("/api/coins/compare?ids=a,b,c").status_code, 200)
+            self.assertEqual(self.client.get("/api/coins/compare?ids=a,b,c").status_code, 200)  # all cached now
+            self.assertEqual(self.client.get("/api/coins/compare?ids=a,d,e").status_code, 429)  # 3 + 2 > 4
+            self.assertEqual(self.client.get("/api/coins/compare?ids=a,d").status_code, 200)
+
+    def test_endpoint_validates_ids(self):
+        self.assertEqual(self.client.get("/api/coins/compare?ids=bitcoin").status_code, 400)
+        with override_settings(COMPARE_MAX_COINS=2):
+            self.assertEqual(self.client.get("/api/coins/compare?ids=a,b,c").status_code, 400)
+
+
+class TestWriteBehind(APITestCase):
+    def setUp(self):
+        cache.clear()
+        get_user_model().objects.create_user(username="w1", password="pass12345")
+        resp = self.client.post("/api/auth/login", {"username": "w1", "password": "pass12345"}, format="json")
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {resp.data['access']}")
+
+    def test_coalesces_until_flush(self):
+        queue = WriteBehindQueue()
+        day = 86_400_000
+        with patch.object(queue, "_ensure_worker"):
+            queue.enqueue_market([{"id": "bitcoin", "symbol": "btc", "name": "Bitcoin", "current_price": 1}])
+            queue.enqueue_market([{"id": "bitcoin", "symbol": "btc", "name": "Bitcoin", "current_price": 2}])
+            queue.enqueue_prices("ethereum", [[day, 10.0], [2 * day, 11.0]])
+            queue.enqueue_prices("ethereum", [[2 * day, 12.0]])
+        self.assertEqual(queue.pending(), 3)
+        self.assertFalse(Coin.objects.exists())
+
+        self.assertEqual(queue.flush(), 3)
+        self.assertEqual(queue.pending(), 0)
+        self.assertEqual(str(Coin.objects.get(cg_id="bitcoin").last_price_usd), "2.00000000")
+        self.assertEqual(
+            [str(p) for p in PriceHistory.objects.filter(coin__cg_id="ethereum").order_by("date").values_list("price_usd", flat=True)],
+            ["10.00000000", "12.00000000"],
+        )
+
+    def test_market_upsert_is_one_statement(self):
+        Coin.objects.create(cg_id="bitcoin", symbol="BTC", name="Bitcoin", last_price_usd="1")
+        market = [
+            {"id": "bitcoin", "symbol": "btc", "name": "Bitcoin", "current_price": 2, "market_cap_rank": 1},
+            {"id": "ethereum", "symbol": "eth", "name": "Ethereum", "current_price": 3, "market_cap_rank": 2},
+        ]
+        with self.assertNumQueries(1):
+            self.assertEqual(upsert_market_coins(market), 2)
+        self.assertEqual(str(Coin.objects.get(cg_id="bitcoin").last_price_usd), "2.00000000")
+        self.assertEqual(Coin.objects.get(cg_id="ethereum").market_cap_rank, 2)
+
+    def test_inline_when_disabled(self):
+        with override_settings(WRITE_BEHIND_ENABLED=False):
+            WriteBehindQueue().enqueue_prices("bitcoin", [[0, 1.0]])
+        self.assertTrue(PriceHistory.objects.filter(coin__cg_id="bitcoin").exists())
+
+    def test_history_answers_before_write(self):
+        Coin.objects.create(cg_id="bitcoin", symbol="BTC", name="Bitcoin")
+        PriceHistory.objects.create(coin=Coin.objects.get(cg_id="bitcoin"), date=date(2024, 1, 1), price_usd="1")
+        ts = int(datetime(2024, 1, 2, tzinfo=dt_timezone.utc).timestamp() * 1000)
+        with patch("coins.views.fetch_coin_history", return_value={"prices": [[ts, 2.0]]}), \
+                patch.object(write_behind, "_ensure_worker"):
+            resp = self.client.get("/api/coins/bitcoin/history?days=1")
+            self.assertEqual([row["price_usd"] for row in resp.data["results"]], ["1.00000000", "2.00000000"])
+            self.assertEqual(PriceHistory.objects.count(), 1)
+            write_behind.flush()
+        self.assertEqual(PriceHistory.objects.count(), 2)
+
+    def test_top_answers_from_fetched_market(self):
+        market = [{"id": "bitcoin", "symbol": "btc", "name": "Bitcoin", "current_price": 5, "market_cap_rank": 1}]
+        with patch("coins.views.fetch_top_coins", return_value=market), patch.object(write_behind, "_ensure_worker"):
+            resp = self.client.get("/api/coins/top?limit=1")
+            self.assertEqual(resp.data["results"][0]["id"], "bitcoin")
+            self.assertEqual(resp.data["results"][0]["currentPrice"], "5.00000000")
+            self.assertFalse(Coin.objects.exists())
+            write_behind.flush()
+        self.assertTrue(Coin.objects.filter(cg_id="bitcoin", market_cap_rank=1).exists())
+
+    def test_top_pages_stored_coins_after_fetched(self):
+        Coin.objects.bulk_create(
+            Coin(cg_id=f"coin-{rank}", symbol=f"C{rank}", name=f"Coin {rank}", market_cap_rank=rank) for rank in range(2, 14)
+        )
+        Coin.objects.create(cg_id="bitcoin", symbol="BTC", name="Bitcoin", market_cap_rank=9)
+        market = [{"id": "bitcoin", "symbol": "btc", "name": "Bitcoin", "current_price": 5, "market_cap_rank": 1}]
+        with patch("coins.views.fetch_top_coins", return_value=market), patch.object(write_behind, "_ensure_worker"), \
+                patch.object(PageNumberPagination, "page_size", 5):
+            first = self.client.get("/api/coins/top?limit=1")
+            last = self.client.get("/api/coins/top?limit=1&page=3")
+        self.assertEqual(first.data["count"], 13)
+        self.assertEqual([c["id"] for c in first.data["results"]], ["bitcoin", "coin-2", "coin-3", "coin-4", "coin-5"])
+        self.assertEqual([c["id"] for c in last.data["results"]], ["coin-11", "coin-12", "coin-13"])
+
+    def test_failed_flush_keeps_batch(self):
+        queue = WriteBehindQueue()
+        with patch.object(queue, "_ensure_worker"):
+            queue.enqueue_market([{"id": "bitcoin", "symbol": "btc", "name": "Bitcoin", "current_price": 1}])
+            with patch("coins.writebehind.upsert_market_coins", side_effect=DatabaseError("down")), \
+                    self.assertLogs("coins.writebehind", "ERROR"):
+                queue.safe_flush("interval")
+            self.assertEqual(queue.pending(), 1)
+            queue.enqueue_market([{"id": "bitcoin", "symbol": "btc", "name": "Bitcoin", "current_price": 2}])
+        self.assertEqual(queue.flush(), 1)
+        self.assertEqual(str(Coin.objects.get(cg_id="bitcoin").last_price_usd), "2.00000000")
+
+
+class TestPortfolio(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(username="p1", password="pass12345")
+        resp = self.client.post("/api/auth/login", {"username": "p1", "password": "pass12345"}, format="json")
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {resp.data['access']}")
+        self.btc = Coin.objects.create(cg_id="bitcoin", symbol="BTC", name="Bitcoin", last_price_usd="100")
+        self.eth = Coin.objects.create(cg_id="ethereum", symbol="ETH", name="Ethereum", last_price_usd="10")
+
+    def test_price_matrix_forward_fills_and_caches(self):
+        PriceHistory.objects.create(coin=self.btc, date=date(2024, 1, 1), price_usd="1")
+        PriceHistory.objects.create(coin=self.btc, date=date(2024, 1, 4), price_usd="4")
+        PriceHistory.objects.create(coin=self.eth, date=date(2024, 1, 3), price_usd="3")
+        matrix = price_matrix([self.btc.pk, self.eth.pk], date(2024, 1, 5), 4)
+        self.assertEqual(list(matrix[self.btc.pk]), [1.0, 1.0, 4.0, 4.0])
+        self.assertEqual(list(matrix[self.eth.pk]), [0.0, 3.0, 3.0, 3.0])
+        with self.assertNumQueries(0):
+            self.assertEqual(list(price_matrix([self.btc.pk], date(2024, 1, 5), 4)[self.btc.pk]), [1.0, 1.0, 4.0, 4.0])
+        self.assertEqual(list(value_series([2.0, 10.0], [matrix[self.btc.pk], matrix[self.eth.pk]], 4)), [2.0, 32.0, 38.0, 38.0])
+
+    def test_price_matrix_seeds_from_any_older_price(self):
+        PriceHistory.objects.create(coin=self.btc, date=date(2023, 6, 1), price_usd="7")
+        PriceHistory.objects.create(coin=self.btc, date=date(2023, 5, 1), price_usd="6")
+        PriceHistory.objects.create(coin=self.btc, date=date(2024, 1, 4), price_usd="4")
+        with self.assertNumQueries(2):
+            matrix = price_matrix([self.btc.pk, self.eth.pk], date(2024, 1, 5), 4)
+        self.assertEqual(list(matrix[self.btc.pk]), [7.0, 7.0, 4.0, 4.0])
+        self.assertEqual(list(matrix[self.eth.pk]), [0.0, 0.0, 0.0, 0.0])
+
+    def test_holdings_and_valuation(self):
+        self.assertEqual(self.client.post("/api/coins/portfolio", {"coinId": "bitcoin", "quantity": "2", "costBasis": "150"}, format="json").status_code, 201)
+        self.assertEqual(self.client.post("/api/coins/portfolio/ethereum", {"quantity": "5"}, format="json").status_code, 201)
+        self.assertEqual(self.client.post("/api/coins/portfolio", {"coinId": "bitcoin", "quantity": "-1"}, format="json").status_code, 400)
+
+        with self.assertNumQueries(1):  # holdings joined with their coins, nothing per position
+            resp = self.client.get("/api/coins/portfolio")
+        self.assertEqual(resp.data["totalValue"], 250.0)
+        self.assertEqual(resp.data["totalCost"], 150.0)
+        self.assertEqual(resp.data["totalPnl"], 100.0)
+        btc = resp.data["positions"][0]
+        self.assertEqual((btc["id"], btc["value"], btc["pnl"], btc["weight"]), ("bitcoin", 200.0, 50.0, 0.8))
+        self.assertIsNone(resp.data["positions"][1]["pnl"])
+        self.assertIsNone(resp.data["pricesAsOf"])  # the fixtures were never priced by a market fetch
+
+        updated = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+        Coin.objects.filter(pk=self.btc.pk).update(last_updated_at=updated)
+        Coin.objects.filter(pk=self.eth.pk).update(last_updated_at=updated + timedelta(hours=1))
+        resp = self.client.get("/api/coins/portfolio")
+        self.assertEqual(resp.data["positions"][0]["priceUpdatedAt"], updated)
+        self.assertEqual(resp.data["pricesAsOf"], updated)
+
+        self.assertEqual(self.client.delete("/api/coins/portfolio/ethereum").status_code, 200)
+        self.assertEqual(self.client.delete("/api/coins/portfolio/ethereum").status_code, 404)
+        self.assertEqual(Holding.objects.filter(user=self.user).count(), 1)
+
+    def test_history_endpoint(self):
+        Holding.objects.create(user=self.user, coin=self.btc, quantity="2", cost_basis_usd="100")
+        today = datetime.now(dt_timezone.utc).date()
+        PriceHistory.objects.create(coin=self.btc, date=today - timedelta(days=1), price_usd="60")
+        resp = self.client.get("/api/coins/portfolio/history?range=7d")
+        self.assertEqual(len(resp.data["dates"]), 7)
+        self.assertEqual(resp.data["value"][-2:], [120.0, 120.0])
+        self.assertEqual(resp.data["pnl"][-1], 20.0)
+
+
+class TestVsCurrency(APITestCase):
+    RATES = {"rates": {
+        "btc": {"name": "Bitcoin", "unit": "BTC", "value": 1.0, "type": "crypto"},
+        "usd": {"name": "US Dollar", "unit": "$", "value": 50000.0, "type": "fiat"},
+        "eur": {"name": "Euro", "unit": "€", "value": 45000.0, "type": "fiat"},
+    }}
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(username="fx1", password="pass12345")
+        resp = self.client.post("/api/auth/login", {"username": "fx1", "password": "pass12345"}, format="json")
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {resp.data['access']}")
+
+    def test_rates_are_per_usd_and_survive_outage(self):
+        with patch("coins.services._get", return_value=self.RATES) as mock_get:
+            self.assertEqual(fetch_exchange_rates()["eur"], 0.9)
+            fetch_exchange_rates()
+        self.assertEqual(mock_get.call_count, 1)
+        cache.delete(FX_CACHE_KEY)
+        with patch("coins.services._get", side_effect=requests.exceptions.ConnectionError()):
+            self.assertEqual(fetch_exchange_rates()["eur"], 0.9)
+        cache.delete_many([FX_CACHE_KEY, FX_LAST_GOOD_KEY])
+        with patch("coins.services._get", side_effect=requests.exceptions.ConnectionError()) as mock_get:
+            self.assertEqual(fetch_exchange_rates(), {"usd": 1.0})
+            self.assertEqual(fetch_exchange_rates(), {"usd": 1.0})
+        self.assertEqual(mock_get.call_count, 1)  # the failure is cached for FX_RETRY_SECONDS
+
+    def test_known_currency_during_outage_is_unavailable_not_unsupported(self):
+        with patch("coins.services._get", side_effect=requests.exceptions.ConnectionError()) as mock_get:
+            eur = self.client.get("/api/coins/market-data?vs_currency=eur")
+            xyz = self.client.get("/api/coins/market-data?vs_currency=xyz")
+        self.assertEqual(eur.status_code, 503)
+        self.assertEqual(xyz.status_code, 400)
+        self.assertEqual(mock_get.call_count, 1)
+
+    def test_chart_and_holdings_converted_from_one_usd_snapshot(self):
+        chart = {"prices": [[0, 100.0], [1, 200.0]], "total_volumes": [[0, 10.0]], "market_caps": [[0, 1000.0]]}
+        _cache_set(coin_chart_cache_key("bitcoin", 7), pack_chart(chart))
+        coin = Coin.objects.create(cg_id="bitcoin", symbol="BTC", name="Bitcoin", last_price_usd="100")
+        Holding.objects.create(user=self.user, coin=coin, quantity="2", cost_basis_usd="100")
+        with patch("coins.services._get", return_value=self.RATES) as mock_get:
+            usd = self.client.get("/api/coins/bitcoin/price-history?range=7d")
+            eur = self.client.get("/api/coins/bitcoin/price-history?range=7d&vs_currency=EUR")
+            portfolio = self.client.get("/api/coins/portfolio?vs_currency=eur")
+        self.assertEqual(mock_get.call_count, 1)  # the FX table; the chart itself is the cached USD copy
+        self.assertEqual(usd.data["prices"], [[0, 100.0], [1, 200.0]])
+        self.assertEqual(eur.data["prices"], [[0, 90.0], [1, 180.0]])
+        self.assertEqual(eur.data["marketCaps"], [[0, 900.0]])
+        self.assertEqual((portfolio.data["totalValue"], portfolio.data["totalPnl"]), (180.0, 90.0))
+
+    def test_unsupported_currency(self):
+        with patch("coins.services._get", return_value=self.RATES):
+            resp = self.client.get("/api/coins/market-data?vs_currency=xyz")
+        self.assertEqual(resp.status_code, 400)
+        self.assertIn("vs_currency", resp.data)
+
+
+# Hedge budgets are spent from pool threads, which cannot write the test transaction's cache table.
+LOCAL_SHARED_CACHES = {**settings.CACHES, "shared": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+class TestUpstreamDeadlines(APITestCase):
+    def setUp(self):
+        cache.clear()
+        registry.reset()
+
+    @patch("coins.services.requests.get")
+    def test_timeout_capped_at_request_budget(self, mock_get):
+        mock_get.return_value = MagicMock(status_code=200, json=lambda: {"id": "bitcoin", "market_data": {}})
+        get_user_model().objects.create_user(username="d1", password="pass12345")
+        resp = self.client.post("/api/auth/login", {"username": "d1", "password": "pass12345"}, format="json")
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {resp.data['access']}")
+        self.client.get("/api/coins/bitcoin/detail", HTTP_X_REQUEST_TIMEOUT="1.5")
+        prefetcher.drain()
+        timeouts = [c.kwargs["timeout"] for c in mock_get.call_args_list if c.args[0].endswith("/coins/bitcoin")]
+        self.assertEqual(len(timeouts), 1)
+        self.assertLessEqual(timeouts[0], 1.5)
+        with patch("coins.services.requests.get", return_value=mock_get.return_value) as direct:
+            _get("/global", timeout=10)  # no request, no deadline: the full timeout
+        self.assertEqual(direct.call_args.kwargs["timeout"], 10)
+
+    def test_exhausted_budget_serves_stale_without_calling_upstream(self):
+        market = [{"id": "bitcoin", "symbol": "btc", "name": "Bitcoin", "current_price": 1.0}]
+        with patch("coins.services.requests.get", return_value=MagicMock(status_code=200, json=lambda: market)):
+            with override_settings(COINGECKO_CACHE_TTL_SECONDS=0):
+                fetch_top_coins(limit=1)  # stale as soon as it is stored
+        self.assertEqual(cache.get(top_coins_cache_key(1))[1][0]["id"], "bitcoin")
+        with patch("coins.services.requests.get") as mock_get, deadline(0):
+            self.assertEqual(fetch_top_coins(limit=1)[0]["id"], "bitcoin")
+            with self.assertRaises(DeadlineExceeded):
+                fetch_top_coins(limit=2)
+        mock_get.assert_not_called()
+
+    @patch("coins.services.requests.get")
+    def test_spent_budget_without_stale_copy_answers_504(self, mock_get):
+        get_user_model().objects.create_user(username="d2", password="pass12345")
+        resp = self.client.post("/api/auth/login", {"username": "d2", "password": "pass12345"}, format="json")
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {resp.data['access']}")
+        resp = self.client.get("/api/coins/top?limit=5", HTTP_X_REQUEST_TIMEOUT="0.01")
+        self.assertEqual(resp.status_code, 504)
+        mock_get.assert_not_called()
+        mock_get.side_effect = requests.exceptions.ConnectionError()
+        self.assertEqual(self.client.get("/api/coins/bitcoin/history?days=3").status_code, 503)
+
+    def test_compare_fetches_keep_the_request_deadline(self):
+        timeouts = []
+
+        def market_chart(endpoint, params=None, timeout=30, **path):
+            timeouts.append(upstream_timeout(timeout))
+            return {"prices": [[0, 1.0]]}
+
+        with patch("coins.services._get", side_effect=market_chart), deadline(2):
+            fetch_price_series(["bitcoin", "ethereum"], 7)
+        self.assertEqual(len(timeouts), 2)
+        self.assertTrue(all(t <= 2 for t in timeouts))
+
+    @override_settings(UPSTREAM_HEDGE_ENABLED=True, CACHES=LOCAL_SHARED_CACHES)
+    def test_hedge_answers_when_a_slow_call_fails(self):
+        for _ in range(20):
+            registry.observe(UPSTREAM_SECONDS, 0.04, endpoint="/global", status="200")
+        hedged = threading.Event()
+        lock = threading.Lock()
+        calls = []
+
+        def fake_get(url, **kwargs):
+            with lock:
+                calls.append((threading.current_thread(), kwargs["timeout"]))
+                first = len(calls) == 1
+            if first:
+                hedged.wait(5)
+                raise requests.exceptions.ReadTimeout()
+            hedged.set()
+            return MagicMock(status_code=200, json=lambda: {"winner": "hedge"})
+
+        with patch("coins.services.requests.get", side_effect=fake_get):
+            self.assertEqual(_get("/global", timeout=10), {"winner": "hedge"})
+        self.assertEqual(len(calls), 2)
+        self.assertIs(calls[0][0], threading.current_thread())  # the first attempt runs inline
+        self.assertLess(calls[1][1], 10)
+        self.assertEqual(registry.counter_values(UPSTREAM_HEDGES), {(("endpoint", "/global"), ("winner", "hedge")): 1})
+
+    @override_settings(UPSTREAM_HEDGE_ENABLED=True, UPSTREAM_HEDGE_RATE="1/min", CACHES=LOCAL_SHARED_CACHES)
+    def test_hedges_stop_when_their_budget_is_spent(self):
+        caches["shared"].clear()
+        for _ in range(20):
+            registry.observe(UPSTREAM_SECONDS, 0.004, endpoint="/global", status="200")
+        calls = []
+
+        def slow_get(url, **kwargs):
+            calls.append(kwargs["timeout"])
+            time.sleep(0.05)
+            return MagicMock(status_code=200, json=lambda: {})
+
+        with patch("coins.services.requests.get", side_effect=slow_get):
+            _get("/global", timeout=10)
+            _get("/global", timeout=10)
+        self.assertEqual(len(calls), 3)  # one hedge, then the budget is spent
+        winners = {dict(key)["winner"] for key in registry.counter_values(UPSTREAM_HEDGES)}
+        self.assertIn("over_budget", winners)
 
+    def test_no_hedging_when_disabled_or_unsampled(self):
+        with patch("coins.services.requests.get", return_value=MagicMock(status_code=200, json=lambda: {})) as mock_get:
+            _get("/global", timeout=10)
+            with override_settings(UPSTREAM_HEDGE_ENABLED=True):
+                _get("/global", timeout=10)
+        self.assertEqual(mock_get.call_count, 2)
+        self.assertEqual(registry.counter_values(UPSTREAM_HEDGES), {})
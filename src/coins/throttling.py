@@ -0,0 +1,94 @@
+import time
+from typing import Tuple
+
+from django.core.cache import caches
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+from .softcache import is_fresh
+
+RATE_PERIODS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def parse_rate(rate: str) -> Tuple[int, int]:
+    """Parse a DRF-style rate such as ``"30/min"`` into (requests, seconds)."""
+    num, period = rate.split("/")
+    return int(num), RATE_PERIODS[period[0]]
+
+
+def sliding_window_hit(key: str, limit: int, window: int, cost: int = 1) -> Tuple[bool, float]:
+    """Count ``cost`` hits against a sliding window approximated by two fixed-window counters.
+
+    The previous window's count is weighted by how much of it still overlaps the
+    sliding window, which bounds error without storing per-request timestamps.
+    Counters live in the shared cache, so a limit holds across workers and replicas.
+    Hits are reserved with ``add``/``incr`` first and handed back with ``decr`` when
+    over the limit, so concurrent callers never both take the last slot (on backends
+    whose ``incr`` is atomic, e.g. Redis). Returns (allowed, seconds_to_wait).
+    """
+    shared = caches["shared"]
+    now = time.time()
+    current = int(now // window)
+    elapsed = now - current * window
+    current_key, previous_key = f"{key}_{current}", f"{key}_{current - 1}"
+    previous = shared.get(previous_key, 0)
+    if shared.add(current_key, cost, timeout=2 * window):
+        count = cost
+    else:
+        try:
+            count = shared.incr(current_key, cost)
+        except ValueError:  # expired between add and incr
+            shared.set(current_key, cost, timeout=2 * window)
+            count = cost
+    weight = (window - elapsed) / window
+
+    if previous * weight + count <= limit:
+        return True, 0.0
+    try:
+        shared.decr(current_key, cost)
+    except ValueError:
+        pass
+    count -= cost
+    if count + cost > limit or not previous:
+        return False, window - elapsed
+    # Time until the previous window's contribution decays enough to admit ``cost`` more hits.
+    return False, max(0.0, (window - elapsed) - (limit - cost - count) * window / previous)
+
+
+class CoinGeckoBudgetThrottle(BaseThrottle):
+    """Per-user, per-endpoint sliding-window throttle for views that may call CoinGecko.
+
+    Views set ``throttle_scope`` and implement ``upstream_cache_key(request, **kwargs)``,
+    or ``upstream_cache_keys`` when one request may fetch several keys. Requests whose
+    data is already cached count once against the ``coins_cached`` rate, everything
+    else against the stricter ``coins_upstream`` rate, once per key still to fetch.
+    """
+
+    def __init__(self):
+        self._wait = None
+
+    def allow_request(self, request, view):
+        scope = getattr(view, "throttle_scope", None)
+        if not scope:
+            return True
+
+        if hasattr(view, "upstream_cache_keys"):
+            keys = view.upstream_cache_keys(request, **view.kwargs)
+        else:
+            keys = [view.upstream_cache_key(request, **view.kwargs)]
+        missing = sum(1 for key in keys if key is not None and not is_fresh(key))
+        bucket = "upstream" if missing else "cached"
+        rate = api_settings.DEFAULT_THROTTLE_RATES.get(f"coins_{bucket}")
+        if not rate:
+            return True
+
+        if request.user and request.user.is_authenticated:
+            ident = f"user_{request.user.pk}"
+        else:
+            ident = f"ip_{self.get_ident(request)}"
+        limit, window = parse_rate(rate)
+        allowed, self._wait = sliding_window_hit(f"throttle_{bucket}_{scope}_{ident}", limit, window, max(missing, 1))
+        return allowed
+
+    def wait(self):
+        return self._wait
@@ -1,13 +1,20 @@
 from django.urls import path
-from .views import TopCoinsView, CoinHistoryView, MarketDataView, GainersLosersView, PriceHistoryView, CoinDetailView, WatchlistView
+from .views import TopCoinsView, CompareView, CoinHistoryView, MarketDataView, GainersLosersView, PriceHistoryView, PriceHistoryExportView, StoredHistorySeriesView, OHLCView, CoinDetailView, WatchlistView, PortfolioView, PortfolioHistoryView
 
 urlpatterns = [
     path("top", TopCoinsView.as_view(), name="coins-top"),
+    path("compare", CompareView.as_view(), name="coins-compare"),
+    path("portfolio", PortfolioView.as_view(), name="portfolio"),
+    path("portfolio/history", PortfolioHistoryView.as_view(), name="portfolio-history"),
+    path("portfolio/<str:coin_id>", PortfolioView.as_view(), name="portfolio-coin"),
+    path("history/export", PriceHistoryExportView.as_view(), name="price-history-export"),
     path("<str:coin_id>/history", CoinHistoryView.as_view(), name="coin-history"),
+    path("<str:coin_id>/history/series", StoredHistorySeriesView.as_view(), name="coin-history-series"),
     path("market-data", MarketDataView.as_view(), name="market-data"),
     path("gainers-losers", GainersLosersView.as_view(), name="gainers-losers"),
     path("<str:coin_id>/price-history", PriceHistoryView.as_view(), name="price-history"),
     path("<str:coin_id>/detail", CoinDetailView.as_view(), name="coin-detail"),
+    path("<str:coin_id>/ohlc", OHLCView.as_view(), name="coin-ohlc"),
     path("watchlist", WatchlistView.as_view(), name="watchlist"),
     path("watchlist/<str:coin_id>", WatchlistView.as_view(), name="watchlist-coin"),
 ]
@@ -1,22 +1,129 @@
-from datetime import datetime, timezone
-from decimal import Decimal
-from typing import List
-
-from django.db import transaction
+from datetime import timedelta
+from typing import Any, Dict, List, Tuple
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import F
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
 from rest_framework.pagination import PageNumberPagination
+from rest_framework.settings import api_settings
 from drf_spectacular.utils import extend_schema, OpenApiParameter
 
-from .models import Coin, PriceHistory, Watchlist
-from .serializers import CoinSerializer, PriceHistorySerializer
-from .services import fetch_top_coins, fetch_coin_history, fetch_global_market_data, fetch_coin_detailed_info, fetch_coin_chart_data
+from config.db_routers import read_database
+
+from .candles import DEFAULT_INTERVALS, INTERVAL_MS, coin_candles, source_resolution_ms
+from .codec import chart_columns
+from .compare import align_series, fetch_price_series, grid_step_ms, rebase
+from .exports import aiter_batches, export_lines, history_rows
+from .fx import RatesUnavailable, UnsupportedCurrency, convert, convert_chart, usd_rate
+from .intraday import recent_chart
+from .models import Coin, Holding, PriceHistory, Watchlist
+from .pagination import ChainedResults
+from .portfolio import portfolio_history, portfolio_valuation
+from .prefetch import prefetch_detail_follow_ups
+from .rollups import INTERVALS, choose_interval, price_series
+from .renderers import ColumnarBinaryRenderer, ColumnarJSONRenderer, CSVRenderer, JSONErrorsMixin, NDJSONRenderer
+from .persistence import daily_prices, market_coin_fields
+from .serializers import CoinSerializer, HoldingInputSerializer, PriceHistorySerializer
+from .services import (
+    fetch_top_coins, fetch_coin_history, fetch_global_market_data, fetch_coin_detailed_info, fetch_coin_chart_data,
+    fetch_coin_chart, top_coins_cache_key, coin_history_cache_key, coin_detail_cache_key, coin_chart_cache_key,
+)
+from .softcache import is_fresh
+from .throttling import CoinGeckoBudgetThrottle
+from .warmup import record_chart_request, record_detail_request
+from .writebehind import write_behind
+
+RANGE_DAYS = {
+    "1d": 1,
+    "7d": 7,
+    "30d": 30,
+    "90d": 90,
+    "1y": 365,
+}
+
+
+VS_CURRENCY_PARAM = OpenApiParameter(
+    name="vs_currency",
+    type=str,
+    location=OpenApiParameter.QUERY,
+    description="Quote currency, e.g. usd, eur, gbp (default: usd); converted from USD with the cached exchange-rate table",
+    default="usd",
+)
+
+
+def _int_param(request, name: str, default: int) -> int:
+    try:
+        return int(request.query_params.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+class ExchangeRatesUnavailable(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_code = "exchange_rates_unavailable"
+
+
+def _fx_rate(request) -> float:
+    """Units of the requested ``vs_currency`` per USD."""
+    try:
+        return usd_rate(request.query_params.get("vs_currency", "usd"))
+    except UnsupportedCurrency as exc:
+        raise ValidationError({"vs_currency": f"Unsupported currency '{exc}'."}) from exc
+    except RatesUnavailable as exc:
+        raise ExchangeRatesUnavailable(f"Exchange rates for '{exc}' are unavailable right now; try again shortly.") from exc
+
+
+def _range_days(request) -> int:
+    return RANGE_DAYS.get(request.query_params.get("range", "7d"), 7)
+
+
+def _compare_ids(request) -> List[str]:
+    ids = [c.strip() for c in request.query_params.get("ids", "").split(",") if c.strip()]
+    return list(dict.fromkeys(ids))
+
+
+def _pct_change_24h(item: Dict[str, Any]) -> float:
+    val = item.get("price_change_percentage_24h")
+    try:
+        return float(val) if val is not None else 0.0
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def rank_movers(market: List[Dict[str, Any]], limit: int) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Return (gainers, losers) by 24h change, ``limit`` per side."""
+    sorted_by_change = sorted(market, key=_pct_change_24h, reverse=True)
+    return sorted_by_change[:limit], list(reversed(sorted_by_change))[:limit]
+
+
+def _intraday_chart(coin_id: str) -> Dict[str, Any]:
+    """1d chart from the intraday store while fresh, else from CoinGecko (queued for storage)."""
+    if not is_fresh(coin_chart_cache_key(coin_id, 1)):
+        stored = recent_chart(coin_id, max_age_seconds=getattr(settings, "COINGECKO_CACHE_TTL_SECONDS", 300))
+        if stored is not None:
+            return stored
+    chart_data, from_upstream = fetch_coin_chart(coin_id, days=1)
+    # Store fresh upstream data only: cached copies were stored when fetched, the offline placeholder never.
+    if from_upstream and chart_data.get("prices"):
+        write_behind.enqueue_intraday(coin_id, chart_data)
+    return chart_data
 
 
 class TopCoinsView(APIView):
     permission_classes = [IsAuthenticated]
+    throttle_classes = [CoinGeckoBudgetThrottle]
+    throttle_scope = "coins_top"
+
+    def upstream_cache_key(self, request):
+        return top_coins_cache_key(_int_param(request, "limit", 10))
 
     @extend_schema(
         summary="Get top cryptocurrencies",
@@ -28,7 +135,8 @@ class TopCoinsView(APIView):
                 location=OpenApiParameter.QUERY,
                 description='Number of coins to return (default: 10)',
                 default=10
-            )
+            ),
+            VS_CURRENCY_PARAM,
         ],
         responses={
             200: CoinSerializer(many=True),
@@ -37,45 +145,43 @@ class TopCoinsView(APIView):
         tags=["Cryptocurrencies"]
     )
     def get(self, request):
-        try:
-            limit = int(request.query_params.get("limit", 10))
-        except (TypeError, ValueError):
-            limit = 10
+        limit = _int_param(request, "limit", 10)
+        rate = _fx_rate(request)
         market = fetch_top_coins(limit=limit)
-        with transaction.atomic():
-            for item in market:
-                Coin.objects.update_or_create(
-                    cg_id=item["id"],
-                    defaults={
-                        "symbol": item.get("symbol", "").upper(),
-                        "name": item.get("name", ""),
-                        "last_price_usd": Decimal(str(item.get("current_price", 0))) if item.get("current_price") is not None else None,
-                        "last_volume_24h_usd": Decimal(str(item.get("total_volume", 0))) if item.get("total_volume") is not None else None,
-                        "last_pct_change_24h": Decimal(str(item.get("price_change_percentage_24h", 0))) if item.get("price_change_percentage_24h") is not None else None,
-                        "market_cap_rank": item.get("market_cap_rank"),
-                        "market_cap_usd": Decimal(str(item.get("market_cap", 0))) if item.get("market_cap") is not None else None,
-                        "image_url": item.get("image"),
-                        "last_updated_at": datetime.now(timezone.utc),
-                    },
-                )
+        write_behind.enqueue_market(market)
 
-        queryset = (
-            Coin.objects.all()
-            .order_by("market_cap_rank", "name")
+        # The fetched snapshot leads (it is the current top ``limit``), then the stored coins it
+        # does not cover, paged in SQL; the upsert happens behind.
+        fetched = sorted(
+            (Coin(cg_id=item["id"], **market_coin_fields(item)) for item in market),
+            key=lambda c: (c.market_cap_rank is None, c.market_cap_rank or 0, c.name),
         )
+        stored = Coin.objects.exclude(cg_id__in=[coin.cg_id for coin in fetched]).order_by(
+            F("market_cap_rank").asc(nulls_last=True), "name"
+        )
+        coins = ChainedResults(fetched, stored)
 
         paginator = PageNumberPagination()
-        page = paginator.paginate_queryset(queryset, request, view=self)
-        data = CoinSerializer(page, many=True).data
+        page = paginator.paginate_queryset(coins, request, view=self)
+        data = CoinSerializer(page, many=True, context={"fx_rate": rate}).data
         return paginator.get_paginated_response(data)
 
 
 class CoinHistoryView(APIView):
     permission_classes = [IsAuthenticated]
+    throttle_classes = [CoinGeckoBudgetThrottle]
+    throttle_scope = "coin_history"
+
+    def upstream_cache_key(self, request, coin_id: str):
+        return coin_history_cache_key(coin_id, _int_param(request, "days", 30))
 
     @extend_schema(
         summary="Get coin price history (legacy endpoint)",
-        description="Get historical price data for a specific coin. This endpoint stores data in database and returns PriceHistory objects.",
+        description=(
+            "Get historical price data for a specific coin. Fetched prices are queued for storage and returned merged "
+            "with the stored PriceHistory rows. Prices are the stored `price_usd` values, so `vs_currency` other "
+            "than usd is rejected here; use /price-history for converted prices."
+        ),
         parameters=[
             OpenApiParameter(
                 name="days",
@@ -92,41 +198,130 @@ class CoinHistoryView(APIView):
         tags=["Cryptocurrencies"],
     )
     def get(self, request, coin_id: str):
-        try:
-            days = int(request.query_params.get("days", 30))
-        except (TypeError, ValueError):
-            days = 30
+        if request.query_params.get("vs_currency", "usd").lower() != "usd":
+            raise ValidationError({"vs_currency": "This legacy endpoint only returns USD prices; use /price-history."})
+        days = _int_param(request, "days", 30)
         data = fetch_coin_history(coin_id, days=days)
         prices = data.get("prices", [])
-        coin = Coin.objects.filter(cg_id=coin_id).first()
-        if not coin:
-            coin = Coin.objects.create(cg_id=coin_id, symbol=coin_id[:10].upper(), name=coin_id)
-        with transaction.atomic():
-            for ts, price in prices:
-                dt = datetime.fromtimestamp(ts / 1000, tz=timezone.utc)
-                PriceHistory.objects.update_or_create(
-                    coin=coin,
-                    date=dt.date(),
-                    defaults={"price_usd": Decimal(str(price))},
-                )
-
-        history_qs = (
-            PriceHistory.objects.select_related("coin")
-            .filter(coin=coin)
-            .order_by("date")
-        )
+        write_behind.enqueue_prices(coin_id, prices)
+
+        # Stored days around the fetched ones, which win; stored rows are paged in SQL and the
+        # queued write is not waited for.
+        daily = daily_prices(prices)
+        stored = PriceHistory.objects.filter(coin__cg_id=coin_id).only("date", "price_usd").order_by("date")
+        fetched = [PriceHistory(date=day, price_usd=daily[day]) for day in sorted(daily)]
+        if fetched:
+            history = ChainedResults(
+                stored.filter(date__lt=fetched[0].date), fetched, stored.filter(date__gt=fetched[-1].date)
+            )
+        else:
+            history = stored
         paginator = PageNumberPagination()
-        page = paginator.paginate_queryset(history_qs, request, view=self)
+        page = paginator.paginate_queryset(history, request, view=self)
         data = PriceHistorySerializer(page, many=True).data
         return paginator.get_paginated_response(data)
 
 
+class StoredHistorySeriesView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(
+        summary="Stored price series at an adaptive resolution",
+        description=(
+            "OHLC and average prices from stored history. With interval=auto the finest of daily, weekly "
+            "and monthly data that fits in `points` rows (and is still retained) is used."
+        ),
+        parameters=[
+            OpenApiParameter(name="days", type=int, location=OpenApiParameter.QUERY, description="Days back from today (default 365)", default=365),
+            OpenApiParameter(
+                name="interval",
+                type=str,
+                location=OpenApiParameter.QUERY,
+                description="auto (default), 1d, 1w or 1M",
+                enum=["auto", *INTERVALS],
+            ),
+            OpenApiParameter(name="points", type=int, location=OpenApiParameter.QUERY, description="Row budget for interval=auto (default 400)", default=400),
+        ],
+        tags=["Cryptocurrencies"],
+    )
+    def get(self, request, coin_id: str):
+        coin = Coin.objects.filter(cg_id=coin_id).first()
+        if not coin:
+            return Response({"detail": "No stored history for this coin"}, status=status.HTTP_404_NOT_FOUND)
+        end = timezone.now().date()
+        start = end - timedelta(days=max(1, _int_param(request, "days", 365)) - 1)
+        interval = choose_interval(
+            start, end, request.query_params.get("interval", "auto"), max(1, _int_param(request, "points", 400))
+        )
+        return Response({
+            "coin": coin_id,
+            "interval": interval,
+            "points": [
+                {
+                    "date": row["date"].isoformat(),
+                    **{key: float(row[key]) for key in ("open", "high", "low", "close", "average")},
+                    "count": row["points"],
+                }
+                for row in price_series(coin.pk, start, end, interval)
+            ],
+        }, status=status.HTTP_200_OK)
+
+
+class PriceHistoryExportView(JSONErrorsMixin, APIView):
+    permission_classes = [IsAuthenticated]
+    renderer_classes = [CSVRenderer, NDJSONRenderer, *api_settings.DEFAULT_RENDERER_CLASSES]
+
+    @extend_schema(
+        summary="Export stored price history",
+        description="Stream stored daily prices for a set of coins as CSV (default) or NDJSON, in constant memory.",
+        parameters=[
+            OpenApiParameter(
+                name="coins",
+                type=str,
+                location=OpenApiParameter.QUERY,
+                description="Comma-separated CoinGecko ids (default: every coin with stored history)",
+            ),
+            OpenApiParameter(name="start", type=str, location=OpenApiParameter.QUERY, description="First date (YYYY-MM-DD)"),
+            OpenApiParameter(name="end", type=str, location=OpenApiParameter.QUERY, description="Last date (YYYY-MM-DD)"),
+            OpenApiParameter(
+                name="format",
+                type=str,
+                location=OpenApiParameter.QUERY,
+                description="csv (default) or ndjson",
+                enum=["csv", "ndjson"],
+            ),
+        ],
+        responses={200: {"type": "string"}},
+        tags=["Cryptocurrencies"],
+    )
+    def get(self, request):
+        bounds = {}
+        for name in ("start", "end"):
+            raw = request.query_params.get(name)
+            bounds[name] = parse_date(raw) if raw else None
+            if raw and bounds[name] is None:
+                raise ValidationError({name: "Must be a YYYY-MM-DD date."})
+        coin_ids = [c.strip() for c in request.query_params.get("coins", "").split(",") if c.strip()]
+
+        fmt = request.accepted_renderer.format if request.accepted_renderer.format in ("csv", "ndjson") else "csv"
+        renderer = CSVRenderer if fmt == "csv" else NDJSONRenderer
+        # Streamed after the view returns, so bind the read alias while the request is still routed.
+        lines = export_lines(fmt, history_rows(coin_ids, bounds["start"], bounds["end"], using=read_database()))
+        response = StreamingHttpResponse(
+            aiter_batches(lines) if isinstance(request._request, ASGIRequest) else lines,
+            content_type=f"{renderer.media_type}; charset=utf-8",
+        )
+        response["Content-Disposition"] = f'attachment; filename="price-history.{fmt}"'
+        return response
+
+
 class MarketDataView(APIView):
     permission_classes = [IsAuthenticated]
 
     @extend_schema(
         summary="Global market data",
         description="Return global cryptocurrency market data including Bitcoin dominance.",
+        parameters=[VS_CURRENCY_PARAM],
         responses={
             200: {
                 "type": "object",
@@ -142,12 +337,13 @@ class MarketDataView(APIView):
         tags=["Cryptocurrencies"],
     )
     def get(self, request):
+        rate = _fx_rate(request)
         global_data = fetch_global_market_data()
         data = global_data.get("data", {})
         
         return Response({
-            "totalMarketCap": data.get("total_market_cap", {}).get("usd", 0),
-            "totalVolume": data.get("total_volume", {}).get("usd", 0),
+            "totalMarketCap": convert(data.get("total_market_cap", {}).get("usd", 0), rate),
+            "totalVolume": convert(data.get("total_volume", {}).get("usd", 0), rate),
             "marketCapChangePercentage24h": data.get("market_cap_change_percentage_24h_usd", 0),
             "activeCoins": data.get("active_cryptocurrencies", 0),
             "bitcoinDominance": data.get("market_cap_percentage", {}).get("btc", 0)
@@ -172,23 +368,10 @@ class GainersLosersView(APIView):
         tags=["Cryptocurrencies"],
     )
     def get(self, request):
-        try:
-            limit = int(request.query_params.get("limit", 5))
-        except (TypeError, ValueError):
-            limit = 5
+        limit = _int_param(request, "limit", 5)
 
         market = fetch_top_coins(limit=100)
-
-        def pct(item):
-            val = item.get("price_change_percentage_24h")
-            try:
-                return float(val) if val is not None else 0.0
-            except (TypeError, ValueError):
-                return 0.0
-
-        sorted_by_change = sorted(market, key=pct, reverse=True)
-        gainers = sorted_by_change[:limit]
-        losers = list(reversed(sorted_by_change))[:limit]
+        gainers, losers = rank_movers(market, limit)
 
         return Response({
             "gainers": [
@@ -214,12 +397,23 @@ class GainersLosersView(APIView):
         }, status=status.HTTP_200_OK)
 
 
-class PriceHistoryView(APIView):
+class PriceHistoryView(JSONErrorsMixin, APIView):
     permission_classes = [IsAuthenticated]
+    throttle_classes = [CoinGeckoBudgetThrottle]
+    throttle_scope = "price_history"
+    renderer_classes = [*api_settings.DEFAULT_RENDERER_CLASSES, ColumnarJSONRenderer, ColumnarBinaryRenderer]
+
+    def upstream_cache_key(self, request, coin_id: str):
+        return coin_chart_cache_key(coin_id, _range_days(request))
 
     @extend_schema(
         summary="Get comprehensive chart data for coin",
-        description="Get price history, volume, and market cap data for a specific coin for charting purposes.",
+        description=(
+            "Get price history, volume, and market cap data for a specific coin for charting purposes. "
+            "`format=columnar` (or Accept: application/vnd.cryptodash.columnar+json) returns one shared "
+            "`timestamps` column plus `prices`, `volumes` and `marketCaps` value columns; `format=bin` "
+            "(Accept: application/vnd.cryptodash.columnar) returns the same columns as little-endian float64 arrays."
+        ),
         parameters=[
             OpenApiParameter(
                 name="range",
@@ -227,7 +421,15 @@ class PriceHistoryView(APIView):
                 location=OpenApiParameter.QUERY,
                 description="Time range: 1d, 7d, 30d, 90d, 1y (default: 7d)",
                 default="7d"
-            )
+            ),
+            OpenApiParameter(
+                name="format",
+                type=str,
+                location=OpenApiParameter.QUERY,
+                description="Response format: json (default), columnar or bin",
+                enum=["json", "columnar", "bin"],
+            ),
+            VS_CURRENCY_PARAM,
         ],
         responses={
             200: {
@@ -266,19 +468,14 @@ class PriceHistoryView(APIView):
         tags=["Cryptocurrencies"],
     )
     def get(self, request, coin_id: str):
-        range_param = request.query_params.get("range", "7d")
-        
-        range_mapping = {
-            "1d": 1,
-            "7d": 7,
-            "30d": 30,
-            "90d": 90,
-            "1y": 365
-        }
-        days = range_mapping.get(range_param, 7)
-        
-        chart_data = fetch_coin_chart_data(coin_id, days=days)
-        
+        days = _range_days(request)
+        rate = _fx_rate(request)
+        record_chart_request(coin_id, days)
+        chart_data = _intraday_chart(coin_id) if days == 1 else fetch_coin_chart_data(coin_id, days=days)
+        chart_data = convert_chart(chart_data, rate)
+        if request.accepted_renderer.format in (ColumnarJSONRenderer.format, ColumnarBinaryRenderer.format):
+            return Response(chart_columns(chart_data), status=status.HTTP_200_OK)
+
         return Response({
             "prices": chart_data.get("prices", []),
             "volumes": chart_data.get("total_volumes", []),
@@ -286,12 +483,137 @@ class PriceHistoryView(APIView):
         }, status=status.HTTP_200_OK)
 
 
+class CompareView(APIView):
+    permission_classes = [IsAuthenticated]
+    throttle_classes = [CoinGeckoBudgetThrottle]
+    throttle_scope = "coin_compare"
+
+    def upstream_cache_keys(self, request):
+        # Each series still to fetch is one upstream call; requests the view rejects fetch nothing.
+        ids = _compare_ids(request)
+        if not 2 <= len(ids) <= getattr(settings, "COMPARE_MAX_COINS", 10):
+            return []
+        days = _range_days(request)
+        return [coin_chart_cache_key(coin_id, days) for coin_id in ids]
+
+    @extend_schema(
+        summary="Compare several coins",
+        description=(
+            "Price series for several coins sampled on one shared time grid (hourly for 1d, daily otherwise) "
+            "over the span all of them cover, each rebased so its first point is 100. Series not yet cached "
+            "are fetched concurrently."
+        ),
+        parameters=[
+            OpenApiParameter(
+                name="ids",
+                type=str,
+                location=OpenApiParameter.QUERY,
+                description="Comma-separated CoinGecko ids, e.g. bitcoin,ethereum,solana",
+                required=True,
+            ),
+            OpenApiParameter(
+                name="range",
+                type=str,
+                location=OpenApiParameter.QUERY,
+                description="Time range: 1d, 7d, 30d, 90d, 1y (default: 7d)",
+                default="7d"
+            ),
+        ],
+        tags=["Cryptocurrencies"],
+    )
+    def get(self, request):
+        coin_ids = _compare_ids(request)
+        if len(coin_ids) < 2:
+            raise ValidationError({"ids": "Give at least two comma-separated coin ids."})
+        max_coins = getattr(settings, "COMPARE_MAX_COINS", 10)
+        if len(coin_ids) > max_coins:
+            raise ValidationError({"ids": f"At most {max_coins} coins can be compared at once."})
+
+        days = _range_days(request)
+        for coin_id in coin_ids:
+            record_chart_request(coin_id, days)
+        timestamps, aligned = align_series(fetch_price_series(coin_ids, days), grid_step_ms(days))
+        return Response({
+            "range": request.query_params.get("range", "7d"),
+            "timestamps": timestamps,
+            "series": {coin_id: rebase(values) for coin_id, values in aligned.items()},
+        }, status=status.HTTP_200_OK)
+
+
+class OHLCView(APIView):
+    permission_classes = [IsAuthenticated]
+    throttle_classes = [CoinGeckoBudgetThrottle]
+    throttle_scope = "coin_ohlc"
+
+    def upstream_cache_key(self, request, coin_id: str):
+        return coin_history_cache_key(coin_id, _range_days(request))
+
+    @extend_schema(
+        summary="OHLC candles for a coin",
+        description=(
+            "Open/high/low/close candles resampled from the CoinGecko price series. `volume` is the rolling "
+            "24h volume at each candle's close. Intervals finer than the source data (5m for 1d, 1h up to 90d, "
+            "1d beyond) are rejected."
+        ),
+        parameters=[
+            OpenApiParameter(
+                name="range",
+                type=str,
+                location=OpenApiParameter.QUERY,
+                description="Time range: 1d, 7d, 30d, 90d, 1y (default: 7d)",
+                default="7d"
+            ),
+            OpenApiParameter(
+                name="interval",
+                type=str,
+                location=OpenApiParameter.QUERY,
+                description="Candle size: 5m, 15m, 1h, 4h, 1d, 1w (default depends on range)",
+                enum=list(INTERVAL_MS),
+            ),
+            VS_CURRENCY_PARAM,
+        ],
+        tags=["Cryptocurrencies"],
+    )
+    def get(self, request, coin_id: str):
+        days = _range_days(request)
+        rate = _fx_rate(request)
+        interval = request.query_params.get("interval") or DEFAULT_INTERVALS.get(days, "1d")
+        if interval not in INTERVAL_MS:
+            raise ValidationError({"interval": f"Choose one of {', '.join(INTERVAL_MS)}."})
+        if INTERVAL_MS[interval] < source_resolution_ms(days):
+            raise ValidationError({"interval": "Finer than the source data for this range."})
+
+        candles = coin_candles(coin_id, days, interval)
+        return Response({
+            "coin": coin_id,
+            "range": request.query_params.get("range", "7d"),
+            "interval": interval,
+            "candles": [
+                {
+                    "time": c[0],
+                    "open": convert(c[1], rate),
+                    "high": convert(c[2], rate),
+                    "low": convert(c[3], rate),
+                    "close": convert(c[4], rate),
+                    "volume": convert(c[5], rate),
+                }
+                for c in candles
+            ],
+        }, status=status.HTTP_200_OK)
+
+
 class CoinDetailView(APIView):
     permission_classes = [IsAuthenticated]
+    throttle_classes = [CoinGeckoBudgetThrottle]
+    throttle_scope = "coin_detail"
+
+    def upstream_cache_key(self, request, coin_id: str):
+        return coin_detail_cache_key(coin_id)
 
     @extend_schema(
         summary="Get detailed coin information",
         description="Get comprehensive information about a specific coin including current price, market data, and statistics.",
+        parameters=[VS_CURRENCY_PARAM],
         responses={
             200: {
                 "type": "object",
@@ -318,7 +640,10 @@ class CoinDetailView(APIView):
         tags=["Cryptocurrencies"],
     )
     def get(self, request, coin_id: str):
+        rate = _fx_rate(request)
+        record_detail_request(coin_id)
         coin_data = fetch_coin_detailed_info(coin_id)
+        prefetch_detail_follow_ups(coin_id)
         market_data = coin_data.get("market_data", {})
         
         return Response({
@@ -326,9 +651,9 @@ class CoinDetailView(APIView):
             "name": coin_data.get("name", coin_id.title()),
             "symbol": coin_data.get("symbol", coin_id[:4].upper()),
             "image": coin_data.get("image", {}).get("large", ""),
-            "currentPrice": market_data.get("current_price", {}).get("usd", 0),
-            "marketCap": market_data.get("market_cap", {}).get("usd", 0),
-            "totalVolume": market_data.get("total_volume", {}).get("usd", 0),
+            "currentPrice": convert(market_data.get("current_price", {}).get("usd", 0), rate),
+            "marketCap": convert(market_data.get("market_cap", {}).get("usd", 0), rate),
+            "totalVolume": convert(market_data.get("total_volume", {}).get("usd", 0), rate),
             "priceChange24h": market_data.get("price_change_percentage_24h", 0),
             "priceChange7d": market_data.get("price_change_percentage_7d", 0),
             "priceChange30d": market_data.get("price_change_percentage_30d", 0),
@@ -336,8 +661,8 @@ class CoinDetailView(APIView):
             "circulatingSupply": market_data.get("circulating_supply", 0),
             "totalSupply": market_data.get("total_supply", 0),
             "maxSupply": market_data.get("max_supply", 0),
-            "ath": market_data.get("ath", {}).get("usd", 0),
-            "atl": market_data.get("atl", {}).get("usd", 0)
+            "ath": convert(market_data.get("ath", {}).get("usd", 0), rate),
+            "atl": convert(market_data.get("atl", {}).get("usd", 0), rate)
         }, status=status.HTTP_200_OK)
 
 
@@ -347,6 +672,7 @@ class WatchlistView(APIView):
     @extend_schema(
         summary="Get user watchlist",
         description="Get the list of coins in the user's watchlist with full coin details.",
+        parameters=[VS_CURRENCY_PARAM],
         responses={
             200: {
                 "type": "array",
@@ -368,6 +694,7 @@ class WatchlistView(APIView):
         tags=["Watchlist"],
     )
     def get(self, request):
+        rate = _fx_rate(request)
         watchlist_items = Watchlist.objects.filter(user=request.user).select_related('coin').order_by('-added_at')
         
         watchlist_data = []
@@ -378,9 +705,9 @@ class WatchlistView(APIView):
                 "name": coin.name,
                 "symbol": coin.symbol,
                 "image": coin.image_url or "",
-                "currentPrice": float(coin.last_price_usd) if coin.last_price_usd else 0,
+                "currentPrice": convert(coin.last_price_usd, rate) if coin.last_price_usd else 0,
                 "priceChange24h": float(coin.last_pct_change_24h) if coin.last_pct_change_24h else 0,
-                "marketCap": float(coin.market_cap_usd) if coin.market_cap_usd else 0,
+                "marketCap": convert(coin.market_cap_usd, rate) if coin.market_cap_usd else 0,
                 "addedAt": item.added_at.isoformat()
             })
         
@@ -455,3 +782,102 @@ class WatchlistView(APIView):
             return Response({"message": "Coin removed from watchlist successfully"}, status=status.HTTP_200_OK)
         except (Coin.DoesNotExist, Watchlist.DoesNotExist):
             return Response({"error": "Coin not found in watchlist"}, status=status.HTTP_404_NOT_FOUND)
+
+
+class PortfolioView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(
+        summary="Get portfolio valuation",
+        description=(
+            "Value and P&L of every holding at the coins' latest stored prices, with totals. "
+            "`pnl` and `totalPnl` are null where no cost basis was given. `priceUpdatedAt` is when each "
+            "price was stored and `pricesAsOf` the oldest of them (null if any coin has never been priced)."
+        ),
+        parameters=[VS_CURRENCY_PARAM],
+        tags=["Portfolio"],
+    )
+    def get(self, request):
+        return Response(portfolio_valuation(request.user, _fx_rate(request)), status=status.HTTP_200_OK)
+
+    @extend_schema(
+        summary="Set a holding",
+        description="Create or replace the quantity (and optional total cost basis in USD) held of a coin.",
+        request=HoldingInputSerializer,
+        responses={
+            200: {"message": "Holding updated"},
+            201: {"message": "Holding added"},
+            400: "Bad Request - Missing coin ID or invalid quantity",
+        },
+        tags=["Portfolio"],
+    )
+    def post(self, request, coin_id: str = None):
+        serializer = HoldingInputSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        coin_id = coin_id or serializer.validated_data.get("coinId")
+        if not coin_id or coin_id == 'undefined':
+            return Response({"error": "Coin ID is required"}, status=status.HTTP_400_BAD_REQUEST)
+
+        coin, _ = Coin.objects.get_or_create(
+            cg_id=coin_id,
+            defaults={"symbol": coin_id[:10].upper(), "name": coin_id.title()},
+        )
+        _, created = Holding.objects.update_or_create(
+            user=request.user,
+            coin=coin,
+            defaults={
+                "quantity": serializer.validated_data["quantity"],
+                "cost_basis_usd": serializer.validated_data.get("cost_basis_usd"),
+            },
+        )
+        if created:
+            return Response({"message": "Holding added"}, status=status.HTTP_201_CREATED)
+        return Response({"message": "Holding updated"}, status=status.HTTP_200_OK)
+
+    @extend_schema(
+        summary="Remove a holding",
+        responses={
+            200: {"message": "Holding removed"},
+            404: "Not Found - Coin not held",
+        },
+        tags=["Portfolio"],
+    )
+    def delete(self, request, coin_id: str = None):
+        coin_id = coin_id or request.data.get('coinId')
+        if not coin_id or coin_id == 'undefined':
+            return Response({"error": "Coin ID is required"}, status=status.HTTP_400_BAD_REQUEST)
+        deleted, _ = Holding.objects.filter(user=request.user, coin__cg_id=coin_id).delete()
+        if not deleted:
+            return Response({"error": "Coin not found in portfolio"}, status=status.HTTP_404_NOT_FOUND)
+        return Response({"message": "Holding removed"}, status=status.HTTP_200_OK)
+
+
+class PortfolioHistoryView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(
+        summary="Get portfolio value history",
+        description=(
+            "Daily value of the current holdings from stored daily prices (forward-filled), and P&L "
+            "against their total cost basis when one is known. Other currencies use today's exchange rate "
+            "for every day."
+        ),
+        parameters=[
+            OpenApiParameter(
+                name="range",
+                type=str,
+                location=OpenApiParameter.QUERY,
+                description="Time range: 7d, 30d, 90d, 1y (default: 30d)",
+                default="30d"
+            ),
+            VS_CURRENCY_PARAM,
+        ],
+        tags=["Portfolio"],
+    )
+    def get(self, request):
+        range_name = request.query_params.get("range", "30d")
+        days = RANGE_DAYS.get(range_name, 30)
+        return Response(
+            {"range": range_name, **portfolio_history(request.user, days, rate=_fx_rate(request))},
+            status=status.HTTP_200_OK,
+        )
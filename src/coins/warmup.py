@@ -0,0 +1,117 @@
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import requests
+from django.conf import settings
+
+from chat.popularity import PopularityTracker
+from .services import (
+    fetch_coin_chart_data, fetch_coin_detailed_info, fetch_exchange_rates, fetch_global_market_data, fetch_top_coins,
+)
+
+logger = logging.getLogger(__name__)
+
+# Detail and chart requests, merged across workers like chat suggestions, so a
+# freshly started worker knows which keys recent traffic asked for.
+coin_requests = PopularityTracker("coin_requests", capacity=64, merge_setting="WARMUP_POPULARITY_MERGE_SECONDS")
+
+
+def record_detail_request(coin_id: str) -> None:
+    coin_requests.record(f"detail:{coin_id}")
+
+
+def record_chart_request(coin_id: str, days: int) -> None:
+    coin_requests.record(f"chart:{coin_id}:{days}")
+
+
+def hot_keys(limit: int, market: Optional[List[Dict[str, Any]]] = None) -> List[Tuple[str, str, Optional[int]]]:
+    """Most requested (kind, coin_id, days) keys, topped up from the market snapshot by rank."""
+    keys: List[Tuple[str, str, Optional[int]]] = []
+    for item, _ in coin_requests.shared_top():
+        kind, _, rest = item.partition(":")
+        if kind == "detail" and rest:
+            keys.append(("detail", rest, None))
+        elif kind == "chart":
+            coin_id, _, days = rest.rpartition(":")
+            if coin_id and days.isdigit():
+                keys.append(("chart", coin_id, int(days)))
+        if len(keys) >= limit:
+            return keys
+    # No (or too little) traffic history yet: assume the largest coins are the hot ones.
+    for coin in market or []:
+        for key in (("detail", coin.get("id"), None), ("chart", coin.get("id"), 7)):
+            if key[1] and key not in keys:
+                keys.append(key)
+        if len(keys) >= limit:
+            break
+    return keys[:limit]
+
+
+def warm_caches(hot_count: int) -> Dict[str, int]:
+    """Populate the market snapshot, global data, FX table and the ``hot_count`` hottest detail/chart keys."""
+    summary = {"warmed": 0, "failed": 0}
+
+    def warm(fetch, *args, **kwargs):
+        try:
+            result = fetch(*args, **kwargs)
+            summary["warmed"] += 1
+            return result
+        except (requests.exceptions.RequestException, ValueError) as exc:
+            summary["failed"] += 1
+            logger.warning("Cache warm-up of %s failed: %s", fetch.__name__, exc)
+            return None
+
+    warm(fetch_top_coins, limit=10)
+    market = warm(fetch_top_coins, limit=100)
+    warm(fetch_global_market_data)
+    warm(fetch_exchange_rates)
+    for kind, coin_id, days in hot_keys(hot_count, market):
+        if kind == "detail":
+            warm(fetch_coin_detailed_info, coin_id)
+        else:
+            warm(fetch_coin_chart_data, coin_id, days=days)
+    return summary
+
+
+class WarmupState:
+    """Tracks this worker's warm-up so the readiness probe can report it."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        self.status = "pending"
+        self.started_at: Optional[float] = None
+        self.duration: Optional[float] = None
+        self.summary: Dict[str, int] = {}
+
+    @property
+    def ready(self) -> bool:
+        return self.status == "ready" or not getattr(settings, "WARMUP_ENABLED", True)
+
+    def run(self) -> None:
+        start = time.monotonic()
+        try:
+            self.summary = warm_caches(getattr(settings, "WARMUP_HOT_KEYS", 10))
+        except Exception:
+            # Never leave a worker unready forever; it can still serve with a cold cache.
+            logger.exception("Cache warm-up crashed")
+        self.duration = round(time.monotonic() - start, 3)
+        self.status = "ready"
+
+    def start(self) -> None:
+        with self._lock:
+            if self.status != "pending" or not getattr(settings, "WARMUP_ENABLED", True):
+                return
+            self.status = "warming"
+            self.started_at = time.time()
+        threading.Thread(target=self.run, name="cache-warmup", daemon=True).start()
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {"status": "ready" if self.ready else self.status, "durationSeconds": self.duration, **self.summary}
+
+
+warmup_state = WarmupState()
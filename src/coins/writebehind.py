@@ -0,0 +1,160 @@
+import atexit
+import logging
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Tuple
+
+from django.conf import settings
+from django.db import DatabaseError, connection
+
+from monitoring.metrics import record_write_behind_flush
+from .intraday import SERIES_BY_COLUMN, store_intraday
+from .models import Coin
+from .persistence import store_price_history, upsert_market_coins
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindQueue:
+    """Persistence work queued by read requests and written in bulk off the request path.
+
+    Writes are coalesced while they wait: a coin keeps only its latest market
+    snapshot, and daily prices and intraday chart points are merged per coin by
+    timestamp. A daemon worker
+    flushes every ``WRITE_BEHIND_INTERVAL_SECONDS`` or as soon as
+    ``WRITE_BEHIND_MAX_PENDING`` entries are waiting. With ``WRITE_BEHIND_ENABLED``
+    off every enqueue is flushed inline, as before.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._coins: Dict[str, Dict[str, Any]] = {}
+        self._prices: Dict[str, Dict[int, float]] = {}
+        self._intraday: Dict[str, Dict[str, Dict[int, float]]] = {}
+        self._worker = None
+
+    def pending(self) -> int:
+        with self._cond:
+            return len(self._coins) + sum(len(points) for points in self._prices.values()) + len(self._intraday)
+
+    def enqueue_market(self, market: Iterable[Dict[str, Any]]) -> None:
+        with self._cond:
+            for item in market:
+                self._coins[item["id"]] = item
+        self._submitted()
+
+    def enqueue_prices(self, cg_id: str, prices: Iterable[List[float]]) -> None:
+        with self._cond:
+            self._prices.setdefault(cg_id, {}).update((int(ts), price) for ts, price in prices)
+        self._submitted()
+
+    def enqueue_intraday(self, cg_id: str, chart: Dict[str, Any]) -> None:
+        """Queue a fresh market_chart payload for the intraday store (one pending entry per coin)."""
+        with self._cond:
+            pending = self._intraday.setdefault(cg_id, {})
+            for series in SERIES_BY_COLUMN.values():
+                pending.setdefault(series, {}).update((int(ts), value) for ts, value in chart.get(series) or [])
+        self._submitted()
+
+    def _submitted(self) -> None:
+        if not getattr(settings, "WRITE_BEHIND_ENABLED", True):
+            self.flush("inline")
+            return
+        self._ensure_worker()
+        if self.pending() >= getattr(settings, "WRITE_BEHIND_MAX_PENDING", 500):
+            with self._cond:
+                self._cond.notify()
+
+    def _ensure_worker(self) -> None:
+        with self._cond:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="write-behind", daemon=True)
+                self._worker.start()
+
+    def _run(self) -> None:
+        interval = getattr(settings, "WRITE_BEHIND_INTERVAL_SECONDS", 2.0)
+        max_pending = getattr(settings, "WRITE_BEHIND_MAX_PENDING", 500)
+        while True:
+            with self._cond:
+                self._cond.wait(timeout=interval)
+            try:
+                self.safe_flush("size" if self.pending() >= max_pending else "interval")
+            finally:
+                # The worker outlives requests, so nothing else closes its connection.
+                connection.close()
+
+    def safe_flush(self, trigger: str) -> None:
+        """Flush, logging instead of raising; a failed batch stays queued for the next flush."""
+        try:
+            self.flush(trigger)
+        except DatabaseError:
+            logger.exception("Write-behind flush (%s) failed", trigger)
+
+    def flush(self, trigger: str = "manual") -> int:
+        """Write everything queued so far; returns rows written."""
+        with self._flush_lock:
+            with self._cond:
+                coins, self._coins = self._coins, {}
+                prices, self._prices = self._prices, {}
+                intraday, self._intraday = self._intraday, {}
+            if not coins and not prices and not intraday:
+                return 0
+
+            start = time.perf_counter()
+            try:
+                history_rows, intraday_points = self._write(coins, prices, intraday)
+            except Exception:
+                self._requeue(coins, prices, intraday)
+                raise
+            record_write_behind_flush(len(coins), history_rows, time.perf_counter() - start, trigger, intraday_points)
+            return len(coins) + history_rows + intraday_points
+
+    def _write(
+        self,
+        coins: Dict[str, Dict[str, Any]],
+        prices: Dict[str, Dict[int, float]],
+        intraday: Dict[str, Dict[str, Dict[int, float]]],
+    ) -> Tuple[int, int]:
+        if coins:
+            upsert_market_coins(coins.values())
+        known = {c.cg_id: c for c in Coin.objects.filter(cg_id__in=[*prices, *intraday])} if prices or intraday else {}
+
+        def coin_for(cg_id: str) -> Coin:
+            if cg_id not in known:
+                known[cg_id] = Coin.objects.get_or_create(
+                    cg_id=cg_id, defaults={"symbol": cg_id[:10].upper(), "name": cg_id}
+                )[0]
+            return known[cg_id]
+
+        history_rows = 0
+        for cg_id, points in prices.items():
+            history_rows += store_price_history(coin_for(cg_id), sorted(points.items()))
+        intraday_points = 0
+        for cg_id, chart in intraday.items():
+            payload = {series: sorted(points.items()) for series, points in chart.items()}
+            intraday_points += store_intraday(coin_for(cg_id), payload)
+        return history_rows, intraday_points
+
+    def _requeue(
+        self,
+        coins: Dict[str, Dict[str, Any]],
+        prices: Dict[str, Dict[int, float]],
+        intraday: Dict[str, Dict[str, Dict[int, float]]],
+    ) -> None:
+        """Put a failed batch back; anything enqueued meanwhile is newer and wins.
+
+        Both writes are upserts, so retrying the part that did land is harmless, and
+        coalescing keeps the queue bounded by distinct coins and timestamps.
+        """
+        with self._cond:
+            self._coins = {**coins, **self._coins}
+            for cg_id, points in prices.items():
+                self._prices[cg_id] = {**points, **self._prices.get(cg_id, {})}
+            for cg_id, chart in intraday.items():
+                newer = self._intraday.get(cg_id, {})
+                self._intraday[cg_id] = {series: {**points, **newer.get(series, {})} for series, points in chart.items()}
+
+
+write_behind = WriteBehindQueue()
+atexit.register(write_behind.safe_flush, "shutdown")
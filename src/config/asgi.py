@@ -14,3 +14,12 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
 application = get_asgi_application()
+
+# Warm this worker's caches in the background; /health/ready reports when done.
+from chat.popularity import query_popularity  # noqa: E402
+from coins.warmup import coin_requests, warmup_state  # noqa: E402
+
+warmup_state.start()
+# Merge popularity counts with the other workers in the background, off the request path.
+query_popularity.start()
+coin_requests.start()
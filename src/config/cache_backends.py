@@ -0,0 +1,199 @@
+"""In-process cache backend bounded by memory rather than entry count."""
+
+import pickle
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Dict, Optional, Tuple
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+# Rough per-entry bookkeeping (key string, tuple, dict slots) on top of the pickled value.
+ENTRY_OVERHEAD_BYTES = 120
+
+Entry = Tuple[bytes, Optional[float], int]
+
+
+class _Store:
+    """Segmented LRU: new keys enter probation, a second hit promotes them to protected.
+
+    One-off large entries (a rarely viewed 1y chart) churn through probation
+    without pushing out keys that are read again and again.
+    """
+
+    def __init__(self, max_bytes: int, protected_ratio: float):
+        self.lock = Lock()
+        self.max_bytes = max_bytes
+        self.protected_bytes_limit = int(max_bytes * protected_ratio)
+        self.probation: "OrderedDict[str, Entry]" = OrderedDict()
+        self.protected: "OrderedDict[str, Entry]" = OrderedDict()
+        self.probation_bytes = 0
+        self.protected_bytes = 0
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "rejections": 0}
+
+    @property
+    def bytes(self) -> int:
+        return self.probation_bytes + self.protected_bytes
+
+    def lookup(self, key: str, promote: bool = True) -> Optional[Entry]:
+        for segment in (self.protected, self.probation):
+            entry = segment.get(key)
+            if entry is None:
+                continue
+            if entry[1] is not None and entry[1] <= time.time():
+                self.remove(key)
+                self.stats["expirations"] += 1
+                return None
+            if promote:
+                self._touch(key, entry, segment)
+            return entry
+        return None
+
+    def _touch(self, key: str, entry: Entry, segment: "OrderedDict[str, Entry]") -> None:
+        if segment is self.protected:
+            segment.move_to_end(key)
+            return
+        del self.probation[key]
+        self.probation_bytes -= entry[2]
+        self.protected[key] = entry
+        self.protected_bytes += entry[2]
+        while self.protected_bytes > self.protected_bytes_limit and len(self.protected) > 1:
+            old_key, old = self.protected.popitem(last=False)
+            self.protected_bytes -= old[2]
+            self.probation[old_key] = old
+            self.probation_bytes += old[2]
+
+    def store(self, key: str, pickled: bytes, expiry: Optional[float]) -> bool:
+        size = len(pickled) + len(key) + ENTRY_OVERHEAD_BYTES
+        was_protected = key in self.protected
+        self.remove(key)
+        if size > self.max_bytes:
+            self.stats["rejections"] += 1
+            return False
+        if was_protected:
+            self.protected[key] = (pickled, expiry, size)
+            self.protected_bytes += size
+        else:
+            self.probation[key] = (pickled, expiry, size)
+            self.probation_bytes += size
+        self._evict()
+        return True
+
+    def remove(self, key: str) -> bool:
+        for segment in (self.protected, self.probation):
+            entry = segment.pop(key, None)
+            if entry is not None:
+                if segment is self.protected:
+                    self.protected_bytes -= entry[2]
+                else:
+                    self.probation_bytes -= entry[2]
+                return True
+        return False
+
+    def _evict(self) -> None:
+        while self.bytes > self.max_bytes:
+            segment = self.probation if self.probation else self.protected
+            _, entry = segment.popitem(last=False)
+            if segment is self.protected:
+                self.protected_bytes -= entry[2]
+            else:
+                self.probation_bytes -= entry[2]
+            self.stats["evictions"] += 1
+
+    def clear(self) -> None:
+        self.probation.clear()
+        self.protected.clear()
+        self.probation_bytes = self.protected_bytes = 0
+
+
+# Shared by every thread's cache handle, like LocMemCache's module-level stores.
+_stores: Dict[str, _Store] = {}
+_stores_lock = Lock()
+
+
+class BudgetedMemoryCache(BaseCache):
+    """Thread-safe in-memory cache that evicts by approximate bytes held.
+
+    OPTIONS:
+        MAX_BYTES: memory budget for pickled values plus per-entry overhead (default 64 MiB).
+        PROTECTED_RATIO: share of the budget reserved for keys hit at least twice (default 0.8;
+            0 gives plain LRU).
+    """
+
+    pickle_protocol = pickle.HIGHEST_PROTOCOL
+
+    def __init__(self, name, params):
+        super().__init__(params)
+        options = params.get("OPTIONS", {})
+        with _stores_lock:
+            self._store = _stores.get(name)
+            if self._store is None:
+                self._store = _stores[name] = _Store(
+                    int(options.get("MAX_BYTES", 64 * 1024 * 1024)), float(options.get("PROTECTED_RATIO", 0.8))
+                )
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        pickled = pickle.dumps(value, self.pickle_protocol)
+        with self._store.lock:
+            if self._store.lookup(key, promote=False) is not None:
+                return False
+            return self._store.store(key, pickled, self.get_backend_timeout(timeout))
+
+    def get(self, key, default=None, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        with self._store.lock:
+            entry = self._store.lookup(key)
+            self._store.stats["hits" if entry is not None else "misses"] += 1
+        if entry is None:
+            return default
+        return pickle.loads(entry[0])
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        pickled = pickle.dumps(value, self.pickle_protocol)
+        with self._store.lock:
+            self._store.store(key, pickled, self.get_backend_timeout(timeout))
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        with self._store.lock:
+            entry = self._store.lookup(key, promote=False)
+            if entry is None:
+                return False
+            self._store.store(key, entry[0], self.get_backend_timeout(timeout))
+            return True
+
+    def incr(self, key, delta=1, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        with self._store.lock:
+            entry = self._store.lookup(key)
+            if entry is None:
+                raise ValueError("Key '%s' not found" % key)
+            new_value = pickle.loads(entry[0]) + delta
+            self._store.store(key, pickle.dumps(new_value, self.pickle_protocol), entry[1])
+        return new_value
+
+    def has_key(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        with self._store.lock:
+            return self._store.lookup(key, promote=False) is not None
+
+    def delete(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        with self._store.lock:
+            return self._store.remove(key)
+
+    def clear(self):
+        with self._store.lock:
+            self._store.clear()
+
+    def stats(self) -> Dict[str, int]:
+        store = self._store
+        with store.lock:
+            return {
+                **store.stats,
+                "entries": len(store.probation) + len(store.protected),
+                "bytes": store.bytes,
+                "max_bytes": store.max_bytes,
+            }
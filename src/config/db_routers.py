@@ -0,0 +1,119 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+from django.conf import settings
+from django.core.cache import caches
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+# Sessions, users, token blacklist and the cache table are read on the primary: they are
+# consulted while routing is decided (or right after a write), so replica lag or a routing
+# lookup on them would be wrong or recursive.
+PRIMARY_APP_LABELS = frozenset({"sessions", "auth", "contenttypes", "token_blacklist", "django_cache"})
+
+
+class RoutingState:
+    """Per-request routing decision.
+
+    The user is only known once DRF has authenticated the request, and the
+    authentication class reports it through :func:`note_authenticated_user`.
+    The router never touches ``request.user`` itself: resolving a session user
+    reads the database, which would route through here again.
+    """
+
+    def __init__(self, replicas_allowed: bool = False):
+        self.replicas_allowed = replicas_allowed
+        self.user_id = None
+        self._pinned: Optional[bool] = None
+
+    def pinned(self) -> bool:
+        if self.user_id is None:
+            return False  # not cached: the user may still be authenticated later in the request
+        if self._pinned is None:
+            self._pinned = caches["shared"].has_key(pin_cache_key(self.user_id))
+        return self._pinned
+
+
+# Unset outside requests, so commands, background workers and tests read from the primary.
+_routing: ContextVar[Optional[RoutingState]] = ContextVar("db_routing", default=None)
+
+
+def pin_cache_key(user_id) -> str:
+    return f"db_primary_pin_{user_id}"
+
+
+def pin_to_primary(user_id) -> None:
+    """Send this user's reads to the primary for DB_PRIMARY_PIN_SECONDS (read-your-writes).
+
+    The pin lives in the shared cache, so it holds whichever worker or replica serves the next read.
+    """
+    caches["shared"].set(pin_cache_key(user_id), True, getattr(settings, "DB_PRIMARY_PIN_SECONDS", 5))
+
+
+def note_authenticated_user(user) -> None:
+    """Tell the current request's routing which user it serves, so their primary pin applies."""
+    state = _routing.get()
+    if state is not None and state.user_id != user.pk:
+        state.user_id = user.pk
+        state._pinned = None
+
+
+def read_database() -> str:
+    """Alias reads should use right now: a random replica for safe, unpinned requests, else the primary."""
+    replicas = getattr(settings, "DATABASE_REPLICAS", [])
+    state = _routing.get()
+    if not replicas or state is None or not state.replicas_allowed or state.pinned():
+        return "default"
+    return random.choice(replicas)
+
+
+@contextmanager
+def primary() -> Iterator[None]:
+    """Force reads inside the block onto the primary."""
+    token = _routing.set(RoutingState())
+    try:
+        yield
+    finally:
+        _routing.reset(token)
+
+
+class ReplicaRouter:
+    """Writes and migrations go to ``default``; reads follow :func:`read_database`.
+
+    Replicas hold the same data as the primary, so relations across aliases are allowed.
+    """
+
+    def db_for_read(self, model, **hints):
+        if model is not None and model._meta.app_label in PRIMARY_APP_LABELS:
+            return "default"
+        return read_database()
+
+    def db_for_write(self, model, **hints):
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == "default"
+
+
+class ReplicaRoutingMiddleware:
+    """Route safe requests' reads to replicas and pin users to the primary after they write."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        safe = request.method in SAFE_METHODS
+        token = _routing.set(RoutingState(replicas_allowed=safe))
+        try:
+            response = self.get_response(request)
+        finally:
+            _routing.reset(token)
+        # Routing is reset, so resolving a lazy session user here reads the primary directly.
+        user = getattr(request, "user", None)
+        if not safe and response.status_code < 400 and user is not None and user.is_authenticated:
+            pin_to_primary(user.pk)
+        return response
@@ -0,0 +1,54 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+from django.conf import settings
+
+DEADLINE_HEADER = "HTTP_X_REQUEST_TIMEOUT"
+
+# Monotonic instant the current request must answer by; unset outside requests, so
+# commands, background jobs and worker threads keep their full upstream timeouts.
+_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+
+def remaining() -> Optional[float]:
+    """Seconds left in the current budget (may be negative), or None when there is no deadline."""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+@contextmanager
+def deadline(seconds: float) -> Iterator[None]:
+    """Give the block at most ``seconds``; nested budgets can only shorten the outer one."""
+    current = _deadline.get()
+    candidate = time.monotonic() + seconds
+    token = _deadline.set(candidate if current is None else min(current, candidate))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def request_budget(request) -> float:
+    """REQUEST_DEADLINE_SECONDS, shortened by a client's ``X-Request-Timeout`` (seconds) if smaller."""
+    budget = float(getattr(settings, "REQUEST_DEADLINE_SECONDS", 8.0))
+    try:
+        asked = float(request.META.get(DEADLINE_HEADER, ""))
+    except ValueError:
+        return budget
+    return min(budget, asked) if asked > 0 else budget
+
+
+class RequestDeadlineMiddleware:
+    """Give every request a deadline budget that upstream calls time out against."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        budget = request_budget(request)
+        if budget <= 0:
+            return self.get_response(request)
+        with deadline(budget):
+            return self.get_response(request)
@@ -0,0 +1,20 @@
+import requests
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.views import exception_handler
+
+
+def api_exception_handler(exc, context):
+    """DRF's handler, plus CoinGecko failures with no stale copy to fall back on.
+
+    A timeout, including a spent request deadline, answers 504; any other upstream
+    error answers 503, rather than an unhandled 500.
+    """
+    if isinstance(exc, requests.exceptions.Timeout):
+        return Response(
+            {"detail": "CoinGecko did not answer within the request's time budget."},
+            status=status.HTTP_504_GATEWAY_TIMEOUT,
+        )
+    if isinstance(exc, requests.exceptions.RequestException):
+        return Response({"detail": "CoinGecko is unavailable."}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+    return exception_handler(exc, context)
@@ -27,11 +27,51 @@ env = environ.Env(
     SECRET_KEY=(str, "dev-secret-change-me"),
     ALLOWED_HOSTS=(str, "127.0.0.1,localhost"),
     DATABASE_URL=(str, "sqlite:///" + str(Path(__file__).resolve().parent.parent / "db.sqlite3")),
+    DATABASE_REPLICA_URLS=(str, ""),
+    DB_PRIMARY_PIN_SECONDS=(int, 5),
+    JOB_LEASE_SECONDS=(int, 30),
+    JOB_POLL_SECONDS=(int, 5),
+    JOB_INTERVALS=(dict, {}),
     CORS_ALLOWED_ORIGINS=(str, "http://localhost:3000"),
     ACCESS_TOKEN_LIFETIME_MIN=(int, 30),
     REFRESH_TOKEN_LIFETIME_DAYS=(int, 7),
+    COINGECKO_API_BASE=(str, "https://api.coingecko.com/api/v3"),
+    COINGECKO_API_KEY=(str, ""),
     COINGECKO_CACHE_TTL_SECONDS=(int, 300),
+    COINGECKO_STALE_TTL_SECONDS=(int, 86400),
+    REQUEST_DEADLINE_SECONDS=(float, 8.0),
+    UPSTREAM_HEDGE_ENABLED=(bool, False),
+    UPSTREAM_HEDGE_RATE=(str, "10/min"),
     API_PAGE_SIZE=(int, 10),
+    COINS_THROTTLE_CACHED_RATE=(str, "120/min"),
+    COINS_THROTTLE_UPSTREAM_RATE=(str, "20/min"),
+    AUTH_USER_CACHE_TTL_SECONDS=(int, 60),
+    AUTH_USER_STAMP_CHECK_SECONDS=(int, 5),
+    AUTH_BLACKLIST_SYNC_SECONDS=(int, 5),
+    AUTH_BLACKLIST_FILTER_CAPACITY=(int, 10000),
+    METRICS_ENABLED=(bool, True),
+    METRICS_TOKEN=(str, ""),
+    CHAT_SUGGESTIONS_COUNT=(int, 4),
+    CHAT_SUGGESTIONS_MERGE_SECONDS=(int, 30),
+    CHAT_SUGGESTIONS_MIN_COUNT=(int, 3),
+    WARMUP_ENABLED=(bool, True),
+    WARMUP_HOT_KEYS=(int, 10),
+    WARMUP_POPULARITY_MERGE_SECONDS=(int, 30),
+    PREFETCH_ENABLED=(bool, True),
+    PREFETCH_RATE=(str, "10/min"),
+    PREFETCH_WORKERS=(int, 2),
+    PREFETCH_WATCHLIST_LIMIT=(int, 10),
+    WRITE_BEHIND_ENABLED=(bool, True),
+    WRITE_BEHIND_INTERVAL_SECONDS=(float, 2.0),
+    WRITE_BEHIND_MAX_PENDING=(int, 500),
+    CACHE_MAX_BYTES=(int, 64 * 1024 * 1024),
+    CACHE_PROTECTED_RATIO=(float, 0.8),
+    SHARED_CACHE_URL=(str, "dbcache://shared_cache"),
+    EXPORT_CHUNK_SIZE=(int, 2000),
+    PRICE_HISTORY_RETENTION_DAYS=(int, 0),
+    COINS_OHLC_CACHE_TTL_SECONDS=(int, 3600),
+    COMPARE_MAX_COINS=(int, 10),
+    FX_CACHE_TTL_SECONDS=(int, 3600),
 )
 environ.Env.read_env(env_file=str(Path(__file__).resolve().parent.parent.parent / ".env"))
 
@@ -59,15 +99,21 @@ INSTALLED_APPS = [
     'accounts',
     'coins',
     'chat',
+    'monitoring',
+    'perf',
+    'jobs',
 ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'monitoring.middleware.RequestMetricsMiddleware',
+    'config.deadlines.RequestDeadlineMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'config.db_routers.ReplicaRoutingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -97,10 +143,20 @@ DATABASES = {
     'default': env.db(),
 }
 
+# Read replicas (comma-separated URLs): safe requests read from them, writes and migrations stay on default
+DATABASE_REPLICAS = []
+for i, url in enumerate(u.strip() for u in env("DATABASE_REPLICA_URLS").split(",") if u.strip()):
+    alias = f"replica{i + 1}"
+    DATABASES[alias] = {**env.db_url_config(url), 'TEST': {'MIRROR': 'default'}}
+    DATABASE_REPLICAS.append(alias)
+DATABASE_ROUTERS = ['config.db_routers.ReplicaRouter']
+# After a successful write a user's reads stay on the primary this long, so they see their own changes
+DB_PRIMARY_PIN_SECONDS = env("DB_PRIMARY_PIN_SECONDS")
+
 # REST Framework
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'accounts.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
@@ -108,6 +164,13 @@ REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': env('API_PAGE_SIZE'),
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    # CoinGecko failures without a stale fallback answer 503/504 instead of 500
+    'EXCEPTION_HANDLER': 'config.exceptions.api_exception_handler',
+    # Sliding-window limits per user and endpoint; see coins.throttling.CoinGeckoBudgetThrottle
+    'DEFAULT_THROTTLE_RATES': {
+        'coins_cached': env('COINS_THROTTLE_CACHED_RATE'),
+        'coins_upstream': env('COINS_THROTTLE_UPSTREAM_RATE'),
+    },
 }
 
 # Simple JWT
@@ -118,6 +181,15 @@ SIMPLE_JWT = {
     'BLACKLIST_AFTER_ROTATION': True,
 }
 
+# Authenticated users are resolved from token claims plus this short-lived cache
+AUTH_USER_CACHE_TTL_SECONDS = env("AUTH_USER_CACHE_TTL_SECONDS")
+# How often a worker re-reads a cached user's shared version stamp (saves elsewhere land within this)
+AUTH_USER_STAMP_CHECK_SECONDS = env("AUTH_USER_STAMP_CHECK_SECONDS")
+
+# Refresh-token blacklist checks go through a per-worker Bloom filter synced from the database
+AUTH_BLACKLIST_SYNC_SECONDS = env("AUTH_BLACKLIST_SYNC_SECONDS")
+AUTH_BLACKLIST_FILTER_CAPACITY = env("AUTH_BLACKLIST_FILTER_CAPACITY")
+
 # CORS
 CORS_ALLOWED_ORIGINS = [o.strip() for o in env("CORS_ALLOWED_ORIGINS").split(",") if o.strip()]
 
@@ -136,15 +208,80 @@ CORS_ALLOWED_HEADERS = [
     'x-requested-with',
 ]
 
-# Cache
+# Cache (per-process, bounded by approximate bytes with segmented-LRU eviction)
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'BACKEND': 'config.cache_backends.BudgetedMemoryCache',
         'LOCATION': 'crypto-dashboard-cache',
-    }
+        'OPTIONS': {
+            'MAX_BYTES': env('CACHE_MAX_BYTES'),
+            'PROTECTED_RATIO': env('CACHE_PROTECTED_RATIO'),
+        },
+    },
+    # Small state every worker and replica must agree on (primary pins, auth invalidation,
+    # blacklist generations, throttle windows, popularity sketches). The database by default,
+    # which costs an SQL query per read; point it at Redis (redis://...) in production.
+    'shared': env.cache_url('SHARED_CACHE_URL'),
 }
 
+COINGECKO_API_BASE = env("COINGECKO_API_BASE")
+COINGECKO_API_KEY = env("COINGECKO_API_KEY")
 COINGECKO_CACHE_TTL_SECONDS = env("COINGECKO_CACHE_TTL_SECONDS")
+# How long each response is kept past its freshness, served when an upstream call fails or runs out of request budget
+COINGECKO_STALE_TTL_SECONDS = env("COINGECKO_STALE_TTL_SECONDS")
+# Time budget per request that upstream calls must fit in (0 disables; clients may lower it with X-Request-Timeout)
+REQUEST_DEADLINE_SECONDS = env("REQUEST_DEADLINE_SECONDS")
+# Fire a second CoinGecko request when the first outlives that endpoint's observed p95, used if the first fails
+UPSTREAM_HEDGE_ENABLED = env("UPSTREAM_HEDGE_ENABLED")
+# Hedges are extra CoinGecko calls; at most this many across all workers, then slow calls are left alone
+UPSTREAM_HEDGE_RATE = env("UPSTREAM_HEDGE_RATE")
+# Candles outlive the raw series; only the newest candle is rebinned when the series refreshes
+COINS_OHLC_CACHE_TTL_SECONDS = env("COINS_OHLC_CACHE_TTL_SECONDS")
+# Most coins a single /api/coins/compare request may ask for
+COMPARE_MAX_COINS = env("COMPARE_MAX_COINS")
+# vs_currency quotes are converted from USD with CoinGecko's /exchange_rates table, refreshed this often
+FX_CACHE_TTL_SECONDS = env("FX_CACHE_TTL_SECONDS")
+
+# Chat suggestions (popularity sketch merged across workers through the shared cache in the background)
+CHAT_SUGGESTIONS_COUNT = env("CHAT_SUGGESTIONS_COUNT")
+CHAT_SUGGESTIONS_MERGE_SECONDS = env("CHAT_SUGGESTIONS_MERGE_SECONDS")
+# A question is only suggested to everyone once it has been asked this many times
+CHAT_SUGGESTIONS_MIN_COUNT = env("CHAT_SUGGESTIONS_MIN_COUNT")
+
+# Startup warm-up: market snapshot, global data and the hottest detail/chart keys from recent traffic
+WARMUP_ENABLED = env("WARMUP_ENABLED")
+WARMUP_HOT_KEYS = env("WARMUP_HOT_KEYS")
+WARMUP_POPULARITY_MERGE_SECONDS = env("WARMUP_POPULARITY_MERGE_SECONDS")
+
+# Predictive prefetch (charts after a detail view, dashboard data after login) with its own upstream budget
+PREFETCH_ENABLED = env("PREFETCH_ENABLED")
+PREFETCH_RATE = env("PREFETCH_RATE")
+PREFETCH_WORKERS = env("PREFETCH_WORKERS")
+PREFETCH_WATCHLIST_LIMIT = env("PREFETCH_WATCHLIST_LIMIT")
+
+# Coin/PriceHistory writes triggered by reads are queued and flushed in bulk off the request path
+WRITE_BEHIND_ENABLED = env("WRITE_BEHIND_ENABLED")
+WRITE_BEHIND_INTERVAL_SECONDS = env("WRITE_BEHIND_INTERVAL_SECONDS")
+WRITE_BEHIND_MAX_PENDING = env("WRITE_BEHIND_MAX_PENDING")
+
+# Rows per server-side cursor fetch when streaming PriceHistory exports
+EXPORT_CHUNK_SIZE = env("EXPORT_CHUNK_SIZE")
+
+# Daily PriceHistory rows older than this are pruned by prune_price_history (weekly/monthly rollups stay); 0 keeps them
+PRICE_HISTORY_RETENTION_DAYS = env("PRICE_HISTORY_RETENTION_DAYS")
+
+
+# Singleton background jobs (run_jobs): one replica holds each job's lease; failover within lease + poll seconds.
+# JOB_INTERVALS overrides per-job periods in seconds, e.g. "refresh_market=60,backfill_history=0" (0 disables)
+JOB_LEASE_SECONDS = env("JOB_LEASE_SECONDS")
+JOB_POLL_SECONDS = env("JOB_POLL_SECONDS")
+JOB_INTERVALS = env("JOB_INTERVALS")
+
+
+# Request metrics exposed at /metrics (Prometheus text format), behind Bearer auth with this token;
+# without one the endpoint is open only when DEBUG is on
+METRICS_ENABLED = env("METRICS_ENABLED")
+METRICS_TOKEN = env("METRICS_TOKEN")
 
 
 # Password validation
@@ -197,7 +334,7 @@ SPECTACULAR_SETTINGS = {
     'COMPONENT_SPLIT_REQUEST': True,
     'SCHEMA_PATH_PREFIX': '/api/',
     'AUTHENTICATION_WHITELIST': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'accounts.authentication.CachedJWTAuthentication',
     ],
     'SWAGGER_UI_SETTINGS': {
         'deepLinking': True,
@@ -0,0 +1,74 @@
+from rest_framework.test import APITestCase
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.sessions.models import Session
+from django.core.cache import cache, caches
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+from django.utils.functional import SimpleLazyObject
+
+from coins.models import Coin
+from .db_routers import (
+    ReplicaRouter, ReplicaRoutingMiddleware, note_authenticated_user, pin_cache_key, primary, read_database,
+)
+
+
+@override_settings(DATABASE_REPLICAS=["replica1"])
+class TestReplicaRouting(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(username="r1", password="pass12345")
+
+    def route(self, method, user=None, status=200, model=None):
+        """Run a request through the middleware; the view authenticates like DRF does and reports the read alias."""
+        seen = {}
+
+        def view(request):
+            request.user = user or AnonymousUser()
+            if user is not None:
+                note_authenticated_user(user)
+            seen["alias"] = ReplicaRouter().db_for_read(model)
+            return HttpResponse(status=status)
+
+        request = getattr(RequestFactory(), method.lower())("/api/coins/watchlist")
+        ReplicaRoutingMiddleware(view)(request)
+        return seen["alias"]
+
+    def test_safe_reads_use_replicas_and_writes_pin_primary(self):
+        self.assertEqual(read_database(), "default")  # no request: commands and workers
+        self.assertEqual(self.route("GET", self.user), "replica1")
+        self.assertEqual(self.route("POST", self.user, status=400), "default")
+        self.assertEqual(self.route("GET", self.user), "replica1")  # failed writes do not pin
+
+        self.route("POST", self.user, status=201)
+        cache.clear()  # the next read may land on another worker, with its own local cache
+        self.assertEqual(self.route("GET", self.user), "default")
+        self.assertEqual(self.route("GET"), "replica1")
+        caches["shared"].delete(pin_cache_key(self.user.pk))
+        self.assertEqual(self.route("GET", self.user), "replica1")
+
+    def test_primary_block_and_migrations(self):
+        router = ReplicaRouter()
+        self.assertEqual(router.db_for_write(None), "default")
+        for model in (Session, get_user_model()):
+            self.assertEqual(self.route("GET", self.user, model=model), "default")
+        self.assertTrue(router.allow_migrate("default", "coins"))
+        self.assertFalse(router.allow_migrate("replica1", "coins"))
+        with primary():
+            self.assertEqual(read_database(), "default")
+
+    def test_routing_never_resolves_a_lazy_session_user(self):
+        def view(request):
+            request.user = SimpleLazyObject(lambda: self.fail("request.user was resolved while routing"))
+            return HttpResponse(ReplicaRouter().db_for_read(Coin))
+
+        request = RequestFactory().get("/admin/")
+        self.assertEqual(ReplicaRoutingMiddleware(view)(request).content, b"replica1")
+
+    def test_watchlist_write_pins_user(self):
+        resp = self.client.post("/api/auth/login", {"username": "r1", "password": "pass12345"}, format="json")
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {resp.data['access']}")
+        caches["shared"].delete(pin_cache_key(self.user.pk))
+        with override_settings(DATABASE_REPLICAS=[]):
+            self.assertEqual(self.client.post("/api/coins/watchlist/bitcoin").status_code, 201)
+        self.assertTrue(caches["shared"].has_key(pin_cache_key(self.user.pk)))
@@ -24,6 +24,7 @@ urlpatterns = [
     path('api/auth/', include('accounts.urls')),
     path('api/coins/', include('coins.urls')),
     path('api/chat/', include('chat.urls')),
+    path('', include('monitoring.urls')),
 ]
 
 # Expose API documentation only in development
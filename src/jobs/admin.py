@@ -0,0 +1,9 @@
+from django.contrib import admin
+
+from .models import JobLease
+
+
+@admin.register(JobLease)
+class JobLeaseAdmin(admin.ModelAdmin):
+    list_display = ("name", "holder", "term", "expires_at", "last_run_at", "last_status", "last_duration_seconds")
+    readonly_fields = list_display + ("acquired_at", "last_error")
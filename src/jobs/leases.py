@@ -0,0 +1,95 @@
+import os
+import socket
+import threading
+from datetime import timedelta
+from typing import Optional
+
+from django.db import DatabaseError, connection
+from django.db.models import F, Q
+from django.db.models.functions import Now
+from django.utils import timezone
+
+from .models import JobLease
+
+
+def default_holder() -> str:
+    """Identity of this process: host (the container id under docker) plus pid."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def try_acquire(name: str, holder: str, ttl_seconds: float) -> Optional[JobLease]:
+    """Take the lease on ``name`` if it is free, expired or already ours; returns it, or None.
+
+    The take-over is one conditional UPDATE, so concurrent replicas cannot both
+    win on any database, and expiry is judged by the database clock so skew
+    between replicas does not matter. A successful acquisition bumps ``term``.
+    """
+    JobLease.objects.get_or_create(name=name, defaults={"expires_at": timezone.now()})
+    won = (
+        JobLease.objects.filter(name=name)
+        .filter(Q(expires_at__lte=Now()) | Q(holder=holder))
+        .update(
+            holder=holder,
+            term=F("term") + 1,
+            acquired_at=Now(),
+            expires_at=Now() + timedelta(seconds=ttl_seconds),
+        )
+    )
+    return JobLease.objects.get(name=name) if won else None
+
+
+def renew(lease: JobLease, ttl_seconds: float) -> bool:
+    """Extend a lease we still hold; False means it expired and someone else took over."""
+    return bool(
+        JobLease.objects.filter(name=lease.name, holder=lease.holder, term=lease.term)
+        .update(expires_at=Now() + timedelta(seconds=ttl_seconds))
+    )
+
+
+def release(lease: JobLease, **outcome) -> bool:
+    """Give the lease up (and record ``outcome`` fields) if it is still ours."""
+    return bool(
+        JobLease.objects.filter(name=lease.name, holder=lease.holder, term=lease.term)
+        .update(holder="", expires_at=Now(), **outcome)
+    )
+
+
+class Heartbeat:
+    """Renews a lease every third of its TTL on a daemon thread while a job runs.
+
+    If a renewal fails the lease is gone (the database was unreachable for longer
+    than the TTL, say) and ``lease_lost`` is set: the job should stop at its next
+    batch boundary, since another replica may already be running it.
+    """
+
+    def __init__(self, lease: JobLease, ttl_seconds: float):
+        self.lease = lease
+        self.ttl_seconds = ttl_seconds
+        self.lease_lost = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"lease-{lease.name}", daemon=True)
+
+    @property
+    def lost(self) -> bool:
+        return self.lease_lost.is_set()
+
+    def __enter__(self) -> "Heartbeat":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        try:
+            while not self._stop.wait(self.ttl_seconds / 3):
+                try:
+                    renewed = renew(self.lease, self.ttl_seconds)
+                except DatabaseError:
+                    renewed = False
+                if not renewed:
+                    self.lease_lost.set()
+                    return
+        finally:
+            connection.close()
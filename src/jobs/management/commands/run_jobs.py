@@ -0,0 +1,30 @@
+import signal
+import threading
+
+from django.core.management.base import BaseCommand
+
+from jobs.runner import JOBS, JobRunner, interval_for
+
+
+class Command(BaseCommand):
+    help = "Run periodic singleton jobs; every replica may run this, each job runs on one of them at a time"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Run one scheduling pass and exit")
+        parser.add_argument("--holder", default="", help="Lease holder id (default: hostname:pid)")
+        parser.add_argument("--poll", type=float, default=None, help="Seconds between passes (default: JOB_POLL_SECONDS)")
+
+    def handle(self, *args, **options):
+        runner = JobRunner(holder=options["holder"] or None)
+        if options["once"]:
+            for name, outcome in runner.run_pending():
+                self.stdout.write(f"{name}: {outcome}")
+            return
+
+        schedule = ", ".join(f"{name} every {interval_for(entry)}s" for name, entry in JOBS.items() if interval_for(entry) > 0)
+        self.stdout.write(f"Job runner {runner.holder} polling for: {schedule or 'nothing'}")
+        stop = threading.Event()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(sig, lambda *_: stop.set())
+        runner.run_forever(stop, poll_seconds=options["poll"])
+        self.stdout.write(self.style.SUCCESS("Job runner stopped"))
@@ -0,0 +1,22 @@
+from django.db import models
+
+
+class JobLease(models.Model):
+    """Who may run a singleton job right now, and how its last run went.
+
+    A holder owns the job while ``expires_at`` is in the future; ``term`` grows on
+    every acquisition so a holder whose lease was taken over can tell (fencing).
+    """
+
+    name = models.CharField(max_length=64, unique=True)
+    holder = models.CharField(max_length=128, blank=True, default="")
+    term = models.BigIntegerField(default=0)
+    acquired_at = models.DateTimeField(null=True, blank=True)
+    expires_at = models.DateTimeField()
+    last_run_at = models.DateTimeField(null=True, blank=True)
+    last_status = models.CharField(max_length=16, blank=True, default="")
+    last_duration_seconds = models.FloatField(null=True, blank=True)
+    last_error = models.TextField(blank=True, default="")
+
+    def __str__(self):
+        return f"{self.name} held by {self.holder or 'nobody'} (term {self.term})"
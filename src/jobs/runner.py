@@ -0,0 +1,135 @@
+import logging
+import threading
+import time
+from datetime import timedelta
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from django.conf import settings
+from django.core.management import call_command
+from django.db import DatabaseError, close_old_connections
+from django.utils import timezone
+
+from monitoring.metrics import record_job_run
+from .leases import Heartbeat, default_holder, release, try_acquire
+
+logger = logging.getLogger(__name__)
+
+
+class Job(NamedTuple):
+    name: str
+    interval_seconds: int
+    func: Callable[[threading.Event], object]
+
+
+JOBS: Dict[str, Job] = {}
+
+
+def job(name: str, interval_seconds: int):
+    """Register a periodic singleton job; ``JOB_INTERVALS`` may override the interval (0 disables it).
+
+    The job is called with an event that is set if its lease is lost; long jobs
+    pass it on as ``stop`` and check it between batches.
+    """
+
+    def register(func: Callable[[threading.Event], object]):
+        JOBS[name] = Job(name, interval_seconds, func)
+        return func
+
+    return register
+
+
+def interval_for(entry: Job) -> int:
+    overrides = getattr(settings, "JOB_INTERVALS", {}) or {}
+    return int(overrides.get(entry.name, entry.interval_seconds))
+
+
+@job("refresh_market", interval_seconds=120)
+def refresh_market(lease_lost: threading.Event):
+    """Store the top-250 market snapshot so Coin rows stay fresh without user traffic."""
+    from coins.persistence import upsert_market_coins
+    from coins.services import fetch_top_coins
+
+    upsert_market_coins(fetch_top_coins(limit=250))
+
+
+@job("backfill_history", interval_seconds=6 * 3600)
+def backfill_history(lease_lost: threading.Event):
+    # Checkpointed per coin, so each run only fetches coins not yet backfilled.
+    call_command("backfill_history", top=100, days=365, workers=2, verbosity=0, stop=lease_lost)
+
+
+@job("prune_price_history", interval_seconds=24 * 3600)
+def prune_price_history(lease_lost: threading.Event):
+    call_command("prune_price_history", verbosity=0, stop=lease_lost)
+
+
+@job("purge_expired_tokens", interval_seconds=24 * 3600)
+def purge_expired_tokens(lease_lost: threading.Event):
+    call_command("purge_expired_tokens", verbosity=0, stop=lease_lost)
+
+
+class JobRunner:
+    """Runs each due job on exactly one replica.
+
+    Every replica polls; for a due job it tries to take the job's lease, re-checks
+    that the job is still due (another replica may just have run it), and runs it
+    while a heartbeat keeps the lease alive; a job whose lease is lost is told to
+    stop at its next batch. If the holder dies, its lease expires
+    after ``JOB_LEASE_SECONDS`` and the next poll on another replica takes over, so
+    failover takes at most lease TTL plus poll interval.
+    """
+
+    def __init__(self, holder: Optional[str] = None, lease_seconds: Optional[float] = None, jobs: Optional[List[Job]] = None):
+        self.holder = holder or default_holder()
+        self.lease_seconds = lease_seconds or getattr(settings, "JOB_LEASE_SECONDS", 30)
+        self.jobs = jobs if jobs is not None else list(JOBS.values())
+
+    def run_pending(self) -> List[Tuple[str, str]]:
+        """One scheduling pass; returns (job, outcome) for every job this replica ran."""
+        ran = []
+        for entry in self.jobs:
+            interval = interval_for(entry)
+            if interval <= 0:
+                continue
+            lease = try_acquire(entry.name, self.holder, self.lease_seconds)
+            if lease is None:
+                continue
+            if lease.last_run_at and lease.last_run_at + timedelta(seconds=interval) > timezone.now():
+                release(lease)
+                continue
+            ran.append((entry.name, self._run(entry, lease)))
+        return ran
+
+    def _run(self, entry: Job, lease) -> str:
+        start = time.perf_counter()
+        error = ""
+        with Heartbeat(lease, self.lease_seconds) as heartbeat:
+            try:
+                entry.func(heartbeat.lease_lost)
+                outcome = "success"
+            except Exception as exc:  # a failing job must not take the runner down
+                logger.exception("Job %s failed", entry.name)
+                outcome, error = "failed", f"{type(exc).__name__}: {exc}"[:2000]
+        if heartbeat.lost:
+            outcome = "lost_lease"
+        elapsed = time.perf_counter() - start
+        record_job_run(entry.name, outcome, elapsed)
+        release(
+            lease,
+            last_run_at=timezone.now(),
+            last_status=outcome,
+            last_duration_seconds=elapsed,
+            last_error=error,
+        )
+        return outcome
+
+    def run_forever(self, stop: threading.Event, poll_seconds: Optional[float] = None) -> None:
+        poll_seconds = poll_seconds or getattr(settings, "JOB_POLL_SECONDS", 5)
+        while not stop.is_set():
+            close_old_connections()
+            try:
+                for name, outcome in self.run_pending():
+                    logger.info("Job %s finished: %s", name, outcome)
+            except DatabaseError:
+                logger.exception("Job scheduling pass failed; retrying after %ss", poll_seconds)
+            stop.wait(poll_seconds)
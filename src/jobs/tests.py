@@ -0,0 +1,80 @@
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import ANY, MagicMock, patch
+
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from .leases import release, renew, try_acquire
+from .models import JobLease
+from .runner import Job, JobRunner
+
+
+class TestLeases(TestCase):
+    def test_only_one_holder_until_expiry(self):
+        lease = try_acquire("ingest", "a", 30)
+        self.assertEqual((lease.holder, lease.term), ("a", 1))
+        self.assertIsNone(try_acquire("ingest", "b", 30))
+
+        JobLease.objects.filter(name="ingest").update(expires_at=timezone.now() - timedelta(seconds=1))
+        taken = try_acquire("ingest", "b", 30)
+        self.assertEqual((taken.holder, taken.term), ("b", 2))
+        # The old holder is fenced off: it can neither renew nor release b's lease.
+        self.assertFalse(renew(lease, 30))
+        self.assertFalse(release(lease))
+        self.assertTrue(renew(taken, 30))
+        self.assertTrue(release(taken))
+        self.assertIsNotNone(try_acquire("ingest", "a", 30))
+
+
+class TestJobRunner(TestCase):
+    def test_each_due_job_runs_once_across_replicas(self):
+        work = MagicMock()
+        jobs = [Job("ingest", 60, work)]
+        first, second = JobRunner("a", jobs=jobs), JobRunner("b", jobs=jobs)
+
+        self.assertEqual(first.run_pending(), [("ingest", "success")])
+        self.assertEqual(second.run_pending(), [])  # not due again yet
+        self.assertEqual(work.call_count, 1)
+
+        JobLease.objects.filter(name="ingest").update(last_run_at=timezone.now() - timedelta(seconds=61))
+        self.assertEqual(second.run_pending(), [("ingest", "success")])
+        self.assertEqual(work.call_count, 2)
+        self.assertEqual(JobLease.objects.get(name="ingest").holder, "")
+
+    def test_held_lease_blocks_and_failures_are_recorded(self):
+        work = MagicMock(side_effect=RuntimeError("upstream down"))
+        try_acquire("ingest", "crashed-replica", 30)
+        runner = JobRunner("b", jobs=[Job("ingest", 60, work)])
+        self.assertEqual(runner.run_pending(), [])
+        work.assert_not_called()
+
+        JobLease.objects.filter(name="ingest").update(expires_at=timezone.now() - timedelta(seconds=1))
+        with self.assertLogs("jobs.runner", "ERROR"):
+            self.assertEqual(runner.run_pending(), [("ingest", "failed")])
+        lease = JobLease.objects.get(name="ingest")
+        self.assertEqual((lease.last_status, lease.last_error), ("failed", "RuntimeError: upstream down"))
+
+    @override_settings(JOB_INTERVALS={"refresh_market": "0", "backfill_history": "0", "prune_price_history": "0"})
+    def test_command_once_honours_interval_overrides(self):
+        out = StringIO()
+        with patch("jobs.runner.call_command") as mock_call:
+            call_command("run_jobs", "--once", "--holder", "t", stdout=out)
+        mock_call.assert_called_once_with("purge_expired_tokens", verbosity=0, stop=ANY)
+        self.assertEqual(out.getvalue().strip(), "purge_expired_tokens: success")
+
+
+class TestLeaseLoss(TransactionTestCase):
+    def test_job_is_told_when_its_lease_is_taken(self):
+        seen = []
+
+        def work(lease_lost):
+            JobLease.objects.filter(name="ingest").update(expires_at=timezone.now() - timedelta(seconds=1))
+            self.assertIsNotNone(try_acquire("ingest", "b", 30))
+            seen.append(lease_lost.wait(5))
+
+        runner = JobRunner("a", lease_seconds=0.3, jobs=[Job("ingest", 60, work)])
+        self.assertEqual(runner.run_pending(), [("ingest", "lost_lease")])
+        self.assertEqual(seen, [True])
+        self.assertEqual(JobLease.objects.get(name="ingest").holder, "b")
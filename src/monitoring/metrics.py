@@ -0,0 +1,215 @@
+import threading
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Tuple
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+# (name, type, help, labels, value) read from another component at scrape time
+Sample = Tuple[str, str, str, Dict[str, str], float]
+
+
+class Histogram:
+    def __init__(self, buckets: Iterable[float]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-quantile (inf if it overflows the last bucket)."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts, strict=True):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+
+class MetricsRegistry:
+    """In-process counters and histograms rendered in the Prometheus text format.
+
+    Each worker process keeps its own registry; scrape every worker (or run one
+    worker per container) to get the full picture.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._help: Dict[str, str] = {}
+        self._buckets: Dict[str, Tuple[float, ...]] = {}
+        self._histograms: Dict[str, Dict[LabelKey, Histogram]] = {}
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._collectors: List[Callable[[], Iterable[Sample]]] = []
+
+    def histogram(self, name: str, help_text: str, buckets: Iterable[float] = LATENCY_BUCKETS) -> str:
+        self._help[name] = help_text
+        self._buckets[name] = tuple(buckets)
+        self._histograms.setdefault(name, {})
+        return name
+
+    def counter(self, name: str, help_text: str) -> str:
+        self._help[name] = help_text
+        self._counters.setdefault(name, {})
+        return name
+
+    def register_collector(self, collect: Callable[[], Iterable[Sample]]) -> None:
+        """Add a callback whose samples are read and rendered on every scrape."""
+        self._collectors.append(collect)
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._histograms[name]
+            hist = series.get(key)
+            if hist is None:
+                hist = series[key] = Histogram(self._buckets[name])
+            hist.observe(value)
+
+    def inc(self, name: str, amount: float = 1, **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._counters[name]
+            series[key] = series.get(key, 0) + amount
+
+    def get_histogram(self, name: str, **labels: str) -> Histogram | None:
+        return self._histograms.get(name, {}).get(tuple(sorted(labels.items())))
+
+    def counter_values(self, name: str) -> Dict[LabelKey, float]:
+        with self._lock:
+            return dict(self._counters.get(name, {}))
+
+    def reset(self) -> None:
+        with self._lock:
+            for series in self._histograms.values():
+                series.clear()
+            for series in self._counters.values():
+                series.clear()
+
+    def render(self) -> str:
+        lines: List[str] = []
+        with self._lock:
+            for name, series in self._counters.items():
+                lines.append(f"# HELP {name} {self._help[name]}")
+                lines.append(f"# TYPE {name} counter")
+                for key, value in sorted(series.items()):
+                    lines.append(f"{name}{_labels(key)} {_number(value)}")
+            for name, series in self._histograms.items():
+                lines.append(f"# HELP {name} {self._help[name]}")
+                lines.append(f"# TYPE {name} histogram")
+                for key, hist in sorted(series.items()):
+                    cumulative = 0
+                    for bound, count in zip(hist.buckets + (float("inf"),), hist.counts, strict=True):
+                        cumulative += count
+                        le = "+Inf" if bound == float("inf") else _number(bound)
+                        lines.append(f"{name}_bucket{_labels(key + (('le', le),))} {cumulative}")
+                    lines.append(f"{name}_sum{_labels(key)} {_number(hist.sum)}")
+                    lines.append(f"{name}_count{_labels(key)} {hist.count}")
+        described = set()
+        for collect in self._collectors:
+            for name, kind, help_text, labels, value in collect():
+                if name not in described:
+                    described.add(name)
+                    lines.append(f"# HELP {name} {help_text}")
+                    lines.append(f"# TYPE {name} {kind}")
+                lines.append(f"{name}{_labels(tuple(sorted(labels.items())))} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(key: LabelKey) -> str:
+    if not key:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in key) + "}"
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+registry = MetricsRegistry()
+
+REQUEST_SECONDS = registry.histogram("http_request_duration_seconds", "Wall time per request by view.")
+REQUEST_DB_QUERIES = registry.histogram(
+    "http_request_db_queries", "Database queries per request by view.", COUNT_BUCKETS
+)
+REQUEST_DB_SECONDS = registry.histogram("http_request_db_seconds", "Database time per request by view.")
+CACHE_LOOKUPS = registry.counter("coingecko_cache_lookups_total", "CoinGecko cache lookups by key family and result.")
+UPSTREAM_SECONDS = registry.histogram("coingecko_upstream_seconds", "CoinGecko call latency by endpoint and status.")
+PREFETCHES = registry.counter("coingecko_prefetch_total", "Predictive prefetch decisions by key family and result.")
+WRITE_BEHIND_ROWS = registry.counter("write_behind_rows_total", "Rows written by the write-behind queue by kind and trigger.")
+WRITE_BEHIND_SECONDS = registry.histogram("write_behind_flush_seconds", "Write-behind flush duration by trigger.")
+JOB_SECONDS = registry.histogram("job_run_seconds", "Singleton background job runs by job and outcome.")
+UPSTREAM_HEDGES = registry.counter("coingecko_hedged_requests_total", "Hedged CoinGecko calls by endpoint and which request won.")
+STALE_SERVED = registry.counter("coingecko_stale_served_total", "Stale CoinGecko data served after an upstream failure by key family.")
+
+
+def record_cache_lookup(family: str, hit: bool) -> None:
+    registry.inc(CACHE_LOOKUPS, family=family, result="hit" if hit else "miss")
+
+
+def record_upstream_call(endpoint: str, seconds: float, status: str) -> None:
+    registry.observe(UPSTREAM_SECONDS, seconds, endpoint=endpoint, status=status)
+
+
+def record_upstream_hedge(endpoint: str, winner: str) -> None:
+    registry.inc(UPSTREAM_HEDGES, endpoint=endpoint, winner=winner)
+
+
+def record_stale_served(family: str) -> None:
+    registry.inc(STALE_SERVED, family=family)
+
+
+def record_prefetch(family: str, result: str) -> None:
+    registry.inc(PREFETCHES, family=family, result=result)
+
+
+def record_write_behind_flush(coins: int, history_rows: int, seconds: float, trigger: str, intraday_points: int = 0) -> None:
+    registry.inc(WRITE_BEHIND_ROWS, coins, kind="coins", trigger=trigger)
+    registry.inc(WRITE_BEHIND_ROWS, history_rows, kind="price_history", trigger=trigger)
+    registry.inc(WRITE_BEHIND_ROWS, intraday_points, kind="intraday", trigger=trigger)
+    registry.observe(WRITE_BEHIND_SECONDS, seconds, trigger=trigger)
+
+
+def record_job_run(job: str, outcome: str, seconds: float) -> None:
+    registry.observe(JOB_SECONDS, seconds, job=job, outcome=outcome)
+
+
+CACHE_STATS = (
+    ("hits", "cache_hits_total", "counter", "Cache reads that found a live entry."),
+    ("misses", "cache_misses_total", "counter", "Cache reads that found nothing."),
+    ("evictions", "cache_evictions_total", "counter", "Entries dropped to stay within the memory budget."),
+    ("rejections", "cache_rejections_total", "counter", "Values larger than the whole budget that were not stored."),
+    ("entries", "cache_entries", "gauge", "Live entries held."),
+    ("bytes", "cache_bytes", "gauge", "Approximate bytes held."),
+    ("max_bytes", "cache_max_bytes", "gauge", "Configured memory budget."),
+)
+
+
+def collect_cache_stats() -> Iterable[Sample]:
+    """Samples for every configured cache whose backend reports ``stats()``."""
+    from django.conf import settings
+    from django.core.cache import caches
+
+    for alias in settings.CACHES:
+        stats = getattr(caches[alias], "stats", None)
+        if stats is None:
+            continue
+        values = stats()
+        for field, name, kind, help_text in CACHE_STATS:
+            if field in values:
+                yield name, kind, help_text, {"cache": alias}, values[field]
+
+
+registry.register_collector(collect_cache_stats)
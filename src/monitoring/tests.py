@@ -0,0 +1,132 @@
+from unittest.mock import MagicMock, patch
+from rest_framework.test import APITestCase
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+
+from config.cache_backends import ENTRY_OVERHEAD_BYTES, BudgetedMemoryCache
+from coins.services import coin_chart_cache_key, coin_detail_cache_key, fetch_global_market_data, top_coins_cache_key
+from coins.warmup import coin_requests, hot_keys, record_detail_request, warmup_state
+from .metrics import registry
+
+
+class TestMetricsEndpoint(APITestCase):
+    def setUp(self):
+        cache.clear()
+        registry.reset()
+        get_user_model().objects.create_user(username="m1", password="pass12345")
+        resp = self.client.post("/api/auth/login", {"username": "m1", "password": "pass12345"}, format="json")
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {resp.data['access']}")
+
+    @override_settings(DEBUG=True)
+    @patch("coins.services.requests.get")
+    def test_request_cache_and_upstream_metrics(self, mock_get):
+        mock_get.return_value = MagicMock(status_code=200, json=lambda: {"data": {}})
+        fetch_global_market_data()
+        self.client.get("/api/coins/market-data")
+
+        body = self.client.get("/metrics").content.decode()
+        self.assertIn('coingecko_cache_lookups_total{family="coingecko_global",result="miss"} 1', body)
+        self.assertIn('coingecko_cache_lookups_total{family="coingecko_global",result="hit"} 1', body)
+        self.assertIn('coingecko_upstream_seconds_count{endpoint="/global",status="200"} 1', body)
+        self.assertIn('http_request_duration_seconds_count{method="GET",status="2xx",view="market-data"} 1', body)
+        self.assertIn('http_request_db_queries_count{view="auth-login"} 1', body)
+
+    @override_settings(METRICS_TOKEN="scrape-secret")
+    def test_token_required_when_configured(self):
+        self.client.credentials()
+        self.assertEqual(self.client.get("/metrics").status_code, 401)
+        self.assertEqual(self.client.get("/metrics", HTTP_AUTHORIZATION="Bearer scrape-secre").status_code, 401)
+        resp = self.client.get("/metrics", HTTP_AUTHORIZATION="Bearer scrape-secret")
+        self.assertEqual(resp.status_code, 200)
+
+    def test_closed_without_token_unless_debug(self):
+        self.client.credentials()
+        self.assertEqual(self.client.get("/metrics").status_code, 403)
+        with override_settings(DEBUG=True):
+            self.assertEqual(self.client.get("/metrics").status_code, 200)
+
+
+def fake_coingecko(url, params=None, **kwargs):
+    if url.endswith("/coins/markets"):
+        body = [{"id": "bitcoin"}, {"id": "ethereum"}]
+    else:
+        body = {"data": {}, "prices": []}
+    return MagicMock(status_code=200, json=lambda: body)
+
+
+class TestReadiness(APITestCase):
+    def setUp(self):
+        cache.clear()
+        warmup_state.reset()
+        coin_requests.reset()
+
+    def test_live_is_always_ok(self):
+        self.assertEqual(self.client.get("/health/live").status_code, 200)
+
+    @override_settings(WARMUP_HOT_KEYS=3)
+    @patch("coins.services.requests.get", side_effect=fake_coingecko)
+    def test_ready_only_after_warmup(self, mock_get):
+        resp = self.client.get("/health/ready")
+        self.assertEqual(resp.status_code, 503)
+        self.assertEqual(resp.data["status"], "pending")
+
+        warmup_state.run()
+        resp = self.client.get("/health/ready")
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.data["failed"], 0)
+        for key in (top_coins_cache_key(10), top_coins_cache_key(100), "coingecko_global",
+                    coin_detail_cache_key("bitcoin"), coin_chart_cache_key("bitcoin", 7),
+                    coin_detail_cache_key("ethereum")):
+            self.assertTrue(cache.has_key(key), key)
+
+    @override_settings(WARMUP_ENABLED=False)
+    def test_ready_when_warmup_disabled(self):
+        self.assertEqual(self.client.get("/health/ready").status_code, 200)
+
+    def test_hot_keys_prefer_recent_traffic(self):
+        for _ in range(3):
+            record_detail_request("solana")
+        coin_requests.sync()
+        keys = hot_keys(2, market=[{"id": "bitcoin"}])
+        self.assertEqual(keys, [("detail", "solana", None), ("detail", "bitcoin", None)])
+
+
+class TestBudgetedMemoryCache(SimpleTestCase):
+    def make_cache(self, max_bytes, protected_ratio=0.5):
+        backend = BudgetedMemoryCache(self.id(), {"OPTIONS": {"MAX_BYTES": max_bytes, "PROTECTED_RATIO": protected_ratio}})
+        backend.clear()
+        return backend
+
+    def test_evicts_by_bytes_and_keeps_reused_keys(self):
+        backend = self.make_cache(4 * (1000 + ENTRY_OVERHEAD_BYTES + 100))
+        backend.set("hot", b"x" * 1000)
+        backend.get("hot")
+        for i in range(10):
+            backend.set(f"scan-{i}", b"x" * 1000)
+        stats = backend.stats()
+        self.assertLessEqual(stats["bytes"], stats["max_bytes"])
+        self.assertEqual(backend.get("hot"), b"x" * 1000)
+        self.assertIsNone(backend.get("scan-0"))
+        self.assertEqual(stats["evictions"], 7)
+
+    def test_oversized_values_are_rejected(self):
+        backend = self.make_cache(2000)
+        backend.set("big", b"x" * 5000)
+        self.assertFalse(backend.has_key("big"))
+        self.assertEqual(backend.stats()["rejections"], 1)
+
+    def test_expiry_add_and_incr(self):
+        backend = self.make_cache(10000)
+        self.assertTrue(backend.add("n", 1))
+        self.assertFalse(backend.add("n", 5))
+        self.assertEqual(backend.incr("n", 2), 3)
+        backend.set("gone", 1, timeout=-1)
+        self.assertIsNone(backend.get("gone"))
+        with self.assertRaises(ValueError):
+            backend.incr("gone")
+
+    def test_stats_are_scraped(self):
+        body = registry.render()
+        self.assertIn('cache_bytes{cache="default"}', body)
+        self.assertIn("# TYPE cache_evictions_total counter", body)
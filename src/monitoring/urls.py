@@ -0,0 +1,9 @@
+from django.urls import path
+from .views import LivenessView, MetricsView, ReadinessView
+
+
+urlpatterns = [
+    path("metrics", MetricsView.as_view(), name="metrics"),
+    path("health/live", LivenessView.as_view(), name="health-live"),
+    path("health/ready", ReadinessView.as_view(), name="health-ready"),
+]
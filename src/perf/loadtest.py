@@ -0,0 +1,225 @@
+import math
+import random
+import socket
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence
+from urllib.parse import quote
+
+import requests
+
+from monitoring.metrics import CACHE_LOOKUPS, registry
+
+RANGES = ("1d", "7d", "30d", "90d")
+
+ENDPOINTS: Dict[str, Callable[[random.Random, str], str]] = {
+    "top": lambda rng, coin: "/api/coins/top?limit=10",
+    "market-data": lambda rng, coin: "/api/coins/market-data",
+    "gainers-losers": lambda rng, coin: "/api/coins/gainers-losers",
+    "detail": lambda rng, coin: f"/api/coins/{coin}/detail",
+    "price-history": lambda rng, coin: f"/api/coins/{coin}/price-history?range={rng.choice(RANGES)}",
+    "watchlist": lambda rng, coin: "/api/coins/watchlist",
+    "chat": lambda rng, coin: "/api/chat/query?text=" + quote(f"What is the price of {coin}?"),
+}
+
+DEFAULT_MIX = "top=4,price-history=3,watchlist=2,chat=1"
+
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    """Parse ``"top=4,chat=1"`` into normalized endpoint weights."""
+    weights: Dict[str, float] = {}
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        name, _, weight = part.partition("=")
+        if name not in ENDPOINTS:
+            raise ValueError(f"Unknown endpoint '{name}'; choose from {', '.join(ENDPOINTS)}")
+        weights[name] = float(weight or 1)
+    total = sum(weights.values())
+    if total <= 0:
+        raise ValueError("Traffic mix needs at least one positive weight")
+    return {name: weight / total for name, weight in weights.items()}
+
+
+def percentile(sorted_values: Sequence[float], q: float) -> float:
+    """Nearest-rank percentile of an already sorted sequence."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(q / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(latencies: List[float], errors: int) -> Dict[str, Any]:
+    values = sorted(latencies)
+    return {
+        "requests": len(values),
+        "errors": errors,
+        "mean_ms": round(sum(values) / len(values) * 1000, 3) if values else 0.0,
+        "p50_ms": round(percentile(values, 50) * 1000, 3),
+        "p95_ms": round(percentile(values, 95) * 1000, 3),
+        "p99_ms": round(percentile(values, 99) * 1000, 3),
+        "max_ms": round(values[-1] * 1000, 3) if values else 0.0,
+    }
+
+
+def cache_hit_ratios(before: Dict, after: Dict) -> Dict[str, Dict[str, Any]]:
+    totals: Dict[str, Dict[str, float]] = defaultdict(lambda: {"hit": 0, "miss": 0})
+    for key, value in after.items():
+        labels = dict(key)
+        totals[labels["family"]][labels["result"]] += value - before.get(key, 0)
+    return {
+        family: {
+            "hits": int(c["hit"]),
+            "misses": int(c["miss"]),
+            "hit_ratio": round(c["hit"] / (c["hit"] + c["miss"]), 4) if c["hit"] + c["miss"] else None,
+        }
+        for family, c in sorted(totals.items())
+    }
+
+
+def free_port(host: str = "127.0.0.1") -> int:
+    with socket.socket() as sock:
+        sock.bind((host, 0))
+        return sock.getsockname()[1]
+
+
+class LiveServer:
+    """Run the project's ASGI application under uvicorn in a background thread."""
+
+    def __init__(self, host: str = "127.0.0.1", port: Optional[int] = None):
+        import uvicorn
+
+        from config.asgi import application
+
+        self.host = host
+        self.port = port or free_port(host)
+        config = uvicorn.Config(application, host=host, port=self.port, log_level="warning", access_log=False, lifespan="off")
+        self._server = uvicorn.Server(config)
+        self._thread = threading.Thread(target=self._server.run, name="loadtest-uvicorn", daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def __enter__(self) -> "LiveServer":
+        self._thread.start()
+        deadline = time.monotonic() + 15
+        while not self._server.started:
+            if time.monotonic() > deadline or not self._thread.is_alive():
+                raise RuntimeError("uvicorn did not start")
+            time.sleep(0.05)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._server.should_exit = True
+        self._thread.join(timeout=10)
+
+
+def run_level(
+    base_url: str,
+    tokens: Sequence[str],
+    mix: Dict[str, float],
+    coins: Sequence[str],
+    concurrency: int,
+    duration: float,
+    seed: int = 0,
+) -> Dict[str, Any]:
+    """Drive ``concurrency`` closed-loop clients for ``duration`` seconds."""
+    names = list(mix)
+    weights = [mix[n] for n in names]
+    # Zipf-like popularity so a few coins are hot, like real dashboard traffic.
+    coin_weights = [1 / (rank + 1) for rank in range(len(coins))]
+    samples: Dict[str, List[float]] = defaultdict(list)
+    errors: Dict[str, int] = defaultdict(int)
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def client(worker: int) -> None:
+        rng = random.Random(seed * 10007 + worker)
+        session = requests.Session()
+        session.headers["Authorization"] = f"Bearer {tokens[worker % len(tokens)]}"
+        while time.monotonic() < deadline:
+            name = rng.choices(names, weights)[0]
+            path = ENDPOINTS[name](rng, rng.choices(coins, coin_weights)[0])
+            start = time.perf_counter()
+            try:
+                ok = session.get(base_url + path, timeout=30).status_code < 400
+            except requests.RequestException:
+                ok = False
+            elapsed = time.perf_counter() - start
+            with lock:
+                samples[name].append(elapsed)
+                if not ok:
+                    errors[name] += 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(client, range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    all_samples = [v for values in samples.values() for v in values]
+    return {
+        "concurrency": concurrency,
+        "duration_s": round(elapsed, 3),
+        "throughput_rps": round(len(all_samples) / elapsed, 2) if elapsed else 0.0,
+        "overall": summarize(all_samples, sum(errors.values())),
+        "endpoints": {name: summarize(samples[name], errors[name]) for name in sorted(samples)},
+    }
+
+
+def run_load_test(
+    base_url: str,
+    tokens: Sequence[str],
+    mix: Dict[str, float],
+    coins: Sequence[str],
+    levels: Sequence[int],
+    duration: float,
+    upstream_calls: Optional[Callable[[], int]] = None,
+    before_level: Optional[Callable[[int], None]] = None,
+) -> Dict[str, Any]:
+    results = []
+    for seed, concurrency in enumerate(levels):
+        if before_level:
+            before_level(concurrency)
+        cache_before = registry.counter_values(CACHE_LOOKUPS)
+        calls_before = upstream_calls() if upstream_calls else 0
+        result = run_level(base_url, tokens, mix, coins, concurrency, duration, seed=seed)
+        result["cache"] = cache_hit_ratios(cache_before, registry.counter_values(CACHE_LOOKUPS))
+        if upstream_calls:
+            result["upstream_calls"] = upstream_calls() - calls_before
+        results.append(result)
+    return {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "mix": mix,
+        "duration_per_level_s": duration,
+        "levels": results,
+    }
+
+
+def compare_reports(current: Dict[str, Any], baseline: Dict[str, Any]) -> List[str]:
+    """Human-readable deltas for levels and endpoints present in both reports."""
+    lines = []
+    previous = {level["concurrency"]: level for level in baseline.get("levels", [])}
+    for level in current["levels"]:
+        old = previous.get(level["concurrency"])
+        if not old:
+            continue
+        lines.append(
+            f"c={level['concurrency']}: {old['throughput_rps']} -> {level['throughput_rps']} req/s "
+            f"({_delta(old['throughput_rps'], level['throughput_rps'])})"
+        )
+        for name, stats in level["endpoints"].items():
+            before = old["endpoints"].get(name)
+            if before:
+                lines.append(
+                    f"  {name}: p95 {before['p95_ms']} -> {stats['p95_ms']} ms "
+                    f"({_delta(before['p95_ms'], stats['p95_ms'])}), "
+                    f"p99 {before['p99_ms']} -> {stats['p99_ms']} ms ({_delta(before['p99_ms'], stats['p99_ms'])})"
+                )
+    return lines
+
+
+def _delta(old: float, new: float) -> str:
+    if not old:
+        return "n/a"
+    return f"{(new - old) / old * 100:+.1f}%"
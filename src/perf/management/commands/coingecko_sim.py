@@ -0,0 +1,54 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from perf.simulator import MODES, CoinGeckoSimulator
+
+
+def add_simulator_arguments(parser):
+    parser.add_argument("--sim-mode", choices=MODES, default="synthetic", help="synthetic, record or replay")
+    parser.add_argument("--data-dir", help="Directory for recorded payloads (record/replay)")
+    parser.add_argument("--upstream", default="https://api.coingecko.com/api/v3", help="Real API base for record mode")
+    parser.add_argument("--strict", action="store_true", help="In replay mode, 404 instead of synthesizing misses")
+    parser.add_argument("--latency", default="0", help="Latency model in ms, e.g. 50, uniform:20:200, lognormal:80:0.6")
+    parser.add_argument("--error-rate-429", type=float, default=0.0, help="Fraction of calls answered with 429")
+    parser.add_argument("--error-rate-5xx", type=float, default=0.0, help="Fraction of calls answered with 503")
+    parser.add_argument("--seed", type=int, default=0)
+
+
+def simulator_from_options(options, **kwargs) -> CoinGeckoSimulator:
+    try:
+        return CoinGeckoSimulator(
+            mode=options["sim_mode"],
+            data_dir=options["data_dir"],
+            upstream=options["upstream"],
+            strict=options["strict"],
+            latency=options["latency"],
+            error_rate_429=options["error_rate_429"],
+            error_rate_5xx=options["error_rate_5xx"],
+            seed=options["seed"],
+            **kwargs,
+        )
+    except ValueError as e:
+        raise CommandError(str(e)) from e
+
+
+class Command(BaseCommand):
+    help = "Run a local CoinGecko stand-in; point COINGECKO_API_BASE at the printed URL"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8765)
+        parser.add_argument("--coins", type=int, default=250, help="Coins known to synthetic mode")
+        add_simulator_arguments(parser)
+
+    def handle(self, *args, **options):
+        simulator = simulator_from_options(options, host=options["host"], port=options["port"], coins=options["coins"])
+        with simulator:
+            self.stdout.write(self.style.SUCCESS(f"CoinGecko simulator ({simulator.mode}) listening on {simulator.url}"))
+            self.stdout.write(f"Call counters: {simulator.url}/__sim/stats")
+            try:
+                while True:
+                    time.sleep(1)
+            except KeyboardInterrupt:
+                self.stdout.write(str(simulator.stats()))
@@ -0,0 +1,131 @@
+import json
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from coins.models import Coin, Watchlist
+from coins.writebehind import write_behind
+from perf.loadtest import DEFAULT_MIX, LiveServer, compare_reports, parse_mix, run_load_test
+
+from .coingecko_sim import add_simulator_arguments, simulator_from_options
+
+
+class Command(BaseCommand):
+    help = "Load-test the ASGI app against a local CoinGecko simulator and report latency percentiles"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--mix", default=DEFAULT_MIX, help=f"Weighted endpoint mix (default: {DEFAULT_MIX})")
+        parser.add_argument("--concurrency", default="1,8,32", help="Comma-separated concurrency levels")
+        parser.add_argument("--duration", type=float, default=10.0, help="Seconds per concurrency level")
+        parser.add_argument("--users", type=int, default=8, help="Authenticated users to spread traffic over")
+        parser.add_argument("--coins", type=int, default=50, help="Distinct coins requested (Zipf-weighted)")
+        parser.add_argument("--cold", action="store_true", help="Clear the cache before each level")
+        parser.add_argument("--keep-throttles", action="store_true", help="Leave API throttling enabled")
+        parser.add_argument("--output", help="Write the JSON report to this path")
+        parser.add_argument("--baseline", help="Compare against a previous JSON report")
+        add_simulator_arguments(parser)
+
+    def handle(self, *args, **options):
+        try:
+            mix = parse_mix(options["mix"])
+            levels = [int(c) for c in options["concurrency"].split(",") if c.strip()]
+        except ValueError as e:
+            raise CommandError(str(e)) from e
+
+        rest_framework = dict(settings.REST_FRAMEWORK)
+        if not options["keep_throttles"]:
+            rest_framework["DEFAULT_THROTTLE_RATES"] = {}
+
+        with simulator_from_options(options, coins=max(options["coins"], 10)) as simulator:
+            coins = simulator.coin_ids[:options["coins"]]
+            known_coins = set(Coin.objects.filter(cg_id__in=simulator.coin_ids).values_list("cg_id", flat=True))
+            created_users, created_watchlist, issued = [], [], []
+            try:
+                tokens = self._prepare_users(options["users"], coins, created_users, created_watchlist, issued)
+                with override_settings(COINGECKO_API_BASE=simulator.url, REST_FRAMEWORK=rest_framework):
+                    with LiveServer() as server:
+                        self.stdout.write(f"Serving {server.url} against simulator {simulator.url}")
+                        report = run_load_test(
+                            server.url,
+                            tokens,
+                            mix,
+                            coins,
+                            levels,
+                            options["duration"],
+                            upstream_calls=simulator.total_calls,
+                            before_level=lambda _: cache.clear() if options["cold"] else None,
+                        )
+            finally:
+                self._clean_up(created_users, created_watchlist, issued, set(simulator.coin_ids) - known_coins)
+
+        report["simulator"] = {
+            "mode": options["sim_mode"],
+            "latency": options["latency"],
+            "error_rate_429": options["error_rate_429"],
+            "error_rate_5xx": options["error_rate_5xx"],
+        }
+        self._print_report(report)
+        if options["baseline"]:
+            baseline = json.loads(Path(options["baseline"]).read_text())
+            self.stdout.write("\nCompared with baseline:")
+            for line in compare_reports(report, baseline):
+                self.stdout.write(line)
+        if options["output"]:
+            path = Path(options["output"])
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(json.dumps(report, indent=2))
+            self.stdout.write(self.style.SUCCESS(f"Report written to {path}"))
+
+    def _prepare_users(self, count, coins, created_users, created_watchlist, issued):
+        """Access tokens for ``count`` users; the rows and token ids this creates are appended to the lists."""
+        User = get_user_model()
+        tokens = []
+        for i in range(count):
+            user, created = User.objects.get_or_create(username=f"loadtest-{i}")
+            if created:
+                user.set_unusable_password()
+                user.save()
+                created_users.append(user.pk)
+            for cg_id in coins[i % len(coins):][:5]:
+                coin, _ = Coin.objects.get_or_create(cg_id=cg_id, defaults={"symbol": cg_id[:10].upper(), "name": cg_id})
+                item, created = Watchlist.objects.get_or_create(user=user, coin=coin)
+                if created:
+                    created_watchlist.append(item.pk)
+            refresh = RefreshToken.for_user(user)
+            issued.append(refresh["jti"])
+            tokens.append(str(refresh.access_token))
+        return tokens
+
+    def _clean_up(self, created_users, created_watchlist, issued, new_coins):
+        """Delete the users, watchlist rows and coins this run added, and what hangs off them."""
+        # Requests may have queued coin and price writes; land them first so none outlive the cleanup.
+        write_behind.safe_flush("shutdown")
+        Watchlist.objects.filter(pk__in=created_watchlist).delete()
+        OutstandingToken.objects.filter(jti__in=issued).delete()
+        get_user_model().objects.filter(pk__in=created_users).delete()
+        _, deleted = Coin.objects.filter(cg_id__in=new_coins).delete()
+        self.stdout.write(
+            f"Removed {len(created_users)} load-test users and {deleted.get('coins.Coin', 0)} simulator coins"
+        )
+
+    def _print_report(self, report):
+        for level in report["levels"]:
+            overall = level["overall"]
+            self.stdout.write(
+                f"\nconcurrency={level['concurrency']} throughput={level['throughput_rps']} req/s "
+                f"p50={overall['p50_ms']}ms p95={overall['p95_ms']}ms p99={overall['p99_ms']}ms "
+                f"errors={overall['errors']} upstream_calls={level.get('upstream_calls', 'n/a')}"
+            )
+            for name, stats in level["endpoints"].items():
+                self.stdout.write(
+                    f"  {name:<15} n={stats['requests']:<6} p50={stats['p50_ms']:<9} "
+                    f"p95={stats['p95_ms']:<9} p99={stats['p99_ms']:<9} errors={stats['errors']}"
+                )
+            for family, stats in level["cache"].items():
+                self.stdout.write(f"  cache {family:<22} hit_ratio={stats['hit_ratio']}")
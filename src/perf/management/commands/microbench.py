@@ -0,0 +1,50 @@
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from perf.microbench import compare, environment, run_benchmarks
+
+DEFAULT_BASELINE = Path(__file__).resolve().parents[2] / "baselines" / "microbench.json"
+
+
+class Command(BaseCommand):
+    help = "Time CPU hot paths and compare them against the committed baseline"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--filter", help="Only run benchmarks whose name contains this text")
+        parser.add_argument("--repeat", type=int, default=5, help="Timing repeats per benchmark (best is kept)")
+        parser.add_argument("--min-time", type=float, default=0.2, help="Minimum seconds per repeat")
+        parser.add_argument("--baseline", default=str(DEFAULT_BASELINE), help="Baseline JSON file")
+        parser.add_argument("--threshold", type=float, default=0.25, help="Allowed slowdown before failing (0.25 = 25%%)")
+        parser.add_argument("--save", action="store_true", help="Write these results as the new baseline")
+
+    def handle(self, *args, **options):
+        results = run_benchmarks(options["filter"], repeat=options["repeat"], min_time=options["min_time"])
+        for name, timing in results.items():
+            self.stdout.write(f"{name:<40} best={timing['best_us']:>12.3f}us median={timing['median_us']:>12.3f}us")
+
+        path = Path(options["baseline"])
+        if options["save"]:
+            existing = json.loads(path.read_text())["results"] if path.exists() else {}
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(json.dumps({"environment": environment(), "results": {**existing, **results}}, indent=2) + "\n")
+            self.stdout.write(self.style.SUCCESS(f"Baseline written to {path}"))
+            return
+
+        if not path.exists():
+            self.stdout.write(self.style.WARNING(f"No baseline at {path}; run with --save to create one"))
+            return
+        baseline = json.loads(path.read_text())
+        if baseline.get("environment") != environment():
+            self.stdout.write(self.style.WARNING(f"Baseline was recorded on {baseline.get('environment')}"))
+
+        regressions = []
+        self.stdout.write("")
+        for name, before, after, ratio, regressed in compare(results, baseline["results"], options["threshold"]):
+            line = f"{name:<40} {before:>12.3f}us -> {after:>12.3f}us ({(ratio - 1) * 100:+.1f}%)"
+            self.stdout.write(self.style.ERROR(line) if regressed else line)
+            if regressed:
+                regressions.append(name)
+        if regressions:
+            raise CommandError(f"{len(regressions)} benchmark(s) slower than baseline by more than {options['threshold']:.0%}")
@@ -0,0 +1,156 @@
+import platform
+import statistics
+import timeit
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from django.db import transaction
+
+BENCHMARKS: Dict[str, Callable[[], Callable[[], Any]]] = {}
+
+
+def benchmark(name: str):
+    """Register a setup function that returns the zero-argument callable to time."""
+
+    def register(setup: Callable[[], Callable[[], Any]]):
+        BENCHMARKS[name] = setup
+        return setup
+
+    return register
+
+
+def _market(size: int) -> List[Dict[str, Any]]:
+    from .simulator import CoinGeckoSimulator
+
+    return CoinGeckoSimulator(coins=size).markets({"per_page": str(size)})
+
+
+@benchmark("chat.normalize_coin[200 queries]")
+def _normalize_coin():
+    from chat.views import normalize_coin
+
+    templates = [
+        "What is the price of {}?",
+        "Show me the 7-day trend of {}",
+        "how is {} doing today",
+        "{} vs btc last week",
+    ]
+    queries = [t.format(item["name"]) for item in _market(50) for t in templates]
+    return lambda: [normalize_coin(q) for q in queries]
+
+
+@benchmark("coins.CoinSerializer[250 rows]")
+def _coin_serializer():
+    from coins.models import Coin
+    from coins.serializers import CoinSerializer
+
+    coins = [
+        Coin(
+            cg_id=item["id"],
+            symbol=item["symbol"].upper(),
+            name=item["name"],
+            last_price_usd=item["current_price"],
+            last_volume_24h_usd=item["total_volume"],
+            last_pct_change_24h=item["price_change_percentage_24h"],
+            market_cap_rank=item["market_cap_rank"],
+            market_cap_usd=item["market_cap"],
+            image_url=item["image"],
+        )
+        for item in _market(250)
+    ]
+    return lambda: CoinSerializer(coins, many=True).data
+
+
+@benchmark("coins.upsert_market_coins[250 rows]")
+def _upsert_market_coins():
+    from coins.persistence import upsert_market_coins
+
+    market = _market(250)
+
+    def run():
+        with transaction.atomic():
+            upsert_market_coins(market)
+            transaction.set_rollback(True)
+
+    return run
+
+
+@benchmark("coins.rank_movers[100 rows]")
+def _rank_movers():
+    from coins.views import rank_movers
+
+    market = _market(100)
+    return lambda: rank_movers(market, 5)
+
+
+@benchmark("coins.mock_chart_data[365 days]")
+def _mock_chart_data():
+    from coins.services import mock_chart_data
+
+    return lambda: mock_chart_data(365)
+
+
+@benchmark("coins.value_portfolio[200 positions x 365 days]")
+def _value_portfolio():
+    from array import array
+
+    from coins.portfolio import value_positions, value_series
+
+    quantities = [0.5 + i for i in range(200)]
+    prices = [100.0 + i * 3 for i in range(200)]
+    rows = [array("d", [price * (1 + day / 1000) for day in range(365)]) for price in prices]
+
+    def run():
+        value_positions(quantities, prices)
+        value_series(quantities, rows, 365)
+
+    return run
+
+
+def _calibration() -> Callable[[], Any]:
+    data = list(range(2000))
+    return lambda: sorted((x * 7919) % 2003 for x in data)
+
+
+def time_benchmark(func: Callable[[], Any], repeat: int = 5, min_time: float = 0.2) -> Dict[str, float]:
+    func()  # warm caches (regex, ORM query compilation) before timing
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    number = max(1, int(number * min_time / 0.2))
+    per_op = [t / number * 1e6 for t in timer.repeat(repeat=repeat, number=number)]
+    return {"best_us": round(min(per_op), 3), "median_us": round(statistics.median(per_op), 3), "loops": number}
+
+
+def run_benchmarks(pattern: Optional[str] = None, repeat: int = 5, min_time: float = 0.2) -> Dict[str, Dict[str, float]]:
+    """Time every matching benchmark, each relative to a fixed pure-Python calibration loop.
+
+    The calibration is re-timed next to every benchmark so that comparisons use
+    ``relative`` (benchmark / calibration) and tolerate machine speed drift.
+    """
+    calibration = _calibration()
+    results = {}
+    for name, setup in BENCHMARKS.items():
+        if pattern and pattern not in name:
+            continue
+        timing = time_benchmark(setup(), repeat=repeat, min_time=min_time)
+        reference = time_benchmark(calibration, repeat=repeat, min_time=min_time)
+        timing["relative"] = round(timing["best_us"] / reference["best_us"], 4)
+        results[name] = timing
+    return results
+
+
+def environment() -> Dict[str, str]:
+    return {"python": platform.python_version(), "machine": platform.machine(), "system": platform.system()}
+
+
+def compare(
+    results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]], threshold: float
+) -> List[Tuple[str, float, float, float, bool]]:
+    """Rows of (name, baseline_us, current_us, ratio, regressed); ratio compares calibrated timings."""
+    rows = []
+    for name, current in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        ratio = current["relative"] / base["relative"] if base.get("relative") else 1.0
+        rows.append((name, base["best_us"], current["best_us"], ratio, ratio > 1 + threshold))
+    return rows
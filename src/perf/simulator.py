@@ -0,0 +1,375 @@
+import hashlib
+import json
+import math
+import random
+import threading
+import time
+import zlib
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+import requests
+
+WELL_KNOWN_COINS = [
+    ("bitcoin", "btc", "Bitcoin"),
+    ("ethereum", "eth", "Ethereum"),
+    ("tether", "usdt", "Tether"),
+    ("binancecoin", "bnb", "BNB"),
+    ("solana", "sol", "Solana"),
+    ("ripple", "xrp", "XRP"),
+    ("usd-coin", "usdc", "USDC"),
+    ("cardano", "ada", "Cardano"),
+    ("dogecoin", "doge", "Dogecoin"),
+    ("tron", "trx", "TRON"),
+]
+
+
+MODES = ("synthetic", "record", "replay")
+
+
+def _rng(*parts: Any) -> random.Random:
+    return random.Random(zlib.crc32(":".join(str(p) for p in parts).encode()))
+
+
+class LatencyModel:
+    """Per-request delay parsed from a spec in milliseconds.
+
+    ``"0"``, ``"fixed:50"``, ``"uniform:20:200"``, ``"normal:100:25"`` (mean, stddev)
+    or ``"lognormal:80:0.6"`` (median, sigma; long right tail like a real API).
+    """
+
+    def __init__(self, spec: str = "0", seed: int = 0):
+        kind, *args = str(spec).split(":")
+        if kind.replace(".", "", 1).isdigit():
+            kind, args = "fixed", [kind]
+        if kind not in ("fixed", "uniform", "normal", "lognormal"):
+            raise ValueError(f"Unknown latency model '{spec}'")
+        self.kind = kind
+        self.args = [float(a) for a in args]
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def sample(self) -> float:
+        with self._lock:
+            if self.kind == "fixed":
+                ms = self.args[0]
+            elif self.kind == "uniform":
+                ms = self._rng.uniform(*self.args)
+            elif self.kind == "normal":
+                ms = self._rng.gauss(*self.args)
+            else:
+                ms = self._rng.lognormvariate(math.log(self.args[0]), self.args[1])
+        return max(ms, 0.0) / 1000
+
+
+class CoinGeckoSimulator:
+    """Local HTTP stand-in for the CoinGecko endpoints used by coins.services.
+
+    ``synthetic`` mode generates payloads that are deterministic per coin, so runs
+    are comparable. ``record`` proxies to a real ``upstream`` and saves every
+    response under ``data_dir``; ``replay`` serves those recordings (falling back to
+    synthetic data unless ``strict``). Latency and 429/5xx failures can be injected
+    in every mode, and ``calls``/``statuses`` count what was received. Point
+    ``COINGECKO_API_BASE`` at ``simulator.url``.
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        coins: int = 250,
+        mode: str = "synthetic",
+        data_dir: Optional[str] = None,
+        upstream: str = "https://api.coingecko.com/api/v3",
+        strict: bool = False,
+        latency: str = "0",
+        error_rate_429: float = 0.0,
+        error_rate_5xx: float = 0.0,
+        seed: int = 0,
+    ):
+        if mode not in MODES:
+            raise ValueError(f"mode must be one of {', '.join(MODES)}")
+        if mode != "synthetic" and not data_dir:
+            raise ValueError(f"{mode} mode needs a data_dir")
+        self.coins: List[Tuple[str, str, str]] = list(WELL_KNOWN_COINS[:coins])
+        for n in range(len(self.coins), coins):
+            self.coins.append((f"coin-{n}", f"c{n}", f"Coin {n}"))
+        self._by_id = {coin[0]: (rank, coin) for rank, coin in enumerate(self.coins, start=1)}
+        self.mode = mode
+        self.data_dir = Path(data_dir) if data_dir else None
+        self.upstream = upstream.rstrip("/")
+        self.strict = strict
+        self.latency = LatencyModel(latency, seed)
+        self.error_rate_429 = error_rate_429
+        self.error_rate_5xx = error_rate_5xx
+        self._failures = random.Random(seed)
+        self.calls: Counter = Counter()
+        self.statuses: Counter = Counter()
+        self._lock = threading.Lock()
+        self._address = (host, port)
+        self._server = None
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def coin_ids(self) -> List[str]:
+        return [coin[0] for coin in self.coins]
+
+    def start(self) -> "CoinGeckoSimulator":
+        self._server = ThreadingHTTPServer(self._address, self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, name="coingecko-sim", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "CoinGeckoSimulator":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def total_calls(self) -> int:
+        with self._lock:
+            return sum(self.calls.values())
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"calls": dict(self.calls), "statuses": {str(k): v for k, v in self.statuses.items()}}
+
+    def reset_counters(self) -> None:
+        with self._lock:
+            self.calls.clear()
+            self.statuses.clear()
+
+    def _handler_class(self):
+        simulator = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                parts = urlsplit(self.path)
+                query = {k: v[-1] for k, v in parse_qs(parts.query).items()}
+                if parts.path == "/__sim/stats":
+                    status, payload = 200, simulator.stats()
+                else:
+                    status, payload = simulator.handle(parts.path, query)
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                if status == 429:
+                    self.send_header("Retry-After", "1")
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def route(self, path: str) -> Tuple[str, Dict[str, str]]:
+        segments = [s for s in path.split("/") if s]
+        if segments == ["global"]:
+            return "/global", {}
+        if segments == ["exchange_rates"]:
+            return "/exchange_rates", {}
+        if segments == ["coins", "markets"]:
+            return "/coins/markets", {}
+        if len(segments) == 2 and segments[0] == "coins":
+            return "/coins/{id}", {"id": segments[1]}
+        if len(segments) == 3 and segments[0] == "coins" and segments[2] == "market_chart":
+            return "/coins/{id}/market_chart", {"id": segments[1]}
+        return "", {}
+
+    def handle(self, path: str, query: Dict[str, str]) -> Tuple[int, Any]:
+        endpoint, _ = self.route(path)
+        with self._lock:
+            self.calls[endpoint or "unknown"] += 1
+            roll = self._failures.random()
+        delay = self.latency.sample()
+        if delay:
+            time.sleep(delay)
+
+        if roll < self.error_rate_429:
+            status, payload = 429, {"status": {"error_code": 429, "error_message": "You've exceeded the Rate Limit."}}
+        elif roll < self.error_rate_429 + self.error_rate_5xx:
+            status, payload = 503, {"error": "Service Unavailable"}
+        elif self.mode == "record":
+            status, payload = self._record(path, query)
+        elif self.mode == "replay":
+            status, payload = self._replay(path, query)
+        else:
+            status, payload = self.synthesize(path, query)
+
+        with self._lock:
+            self.statuses[status] += 1
+        return status, payload
+
+    def _recording_path(self, path: str, query: Dict[str, str]) -> Path:
+        digest = hashlib.sha1(json.dumps(query, sort_keys=True).encode()).hexdigest()[:12]
+        return self.data_dir / f"{path.strip('/').replace('/', '__') or 'root'}-{digest}.json"
+
+    def _record(self, path: str, query: Dict[str, str]) -> Tuple[int, Any]:
+        resp = requests.get(f"{self.upstream}{path}", params=query, timeout=30)
+        try:
+            payload = resp.json()
+        except ValueError:
+            payload = {"error": resp.text[:500]}
+        if resp.status_code == 200:
+            self.data_dir.mkdir(parents=True, exist_ok=True)
+            recording = {"path": path, "query": query, "status": resp.status_code, "body": payload}
+            self._recording_path(path, query).write_text(json.dumps(recording))
+        return resp.status_code, payload
+
+    def _replay(self, path: str, query: Dict[str, str]) -> Tuple[int, Any]:
+        recording = self._recording_path(path, query)
+        if recording.exists():
+            data = json.loads(recording.read_text())
+            return data["status"], data["body"]
+        if self.strict:
+            return 404, {"error": "no recording", "path": path, "query": query}
+        return self.synthesize(path, query)
+
+    def synthesize(self, path: str, query: Dict[str, str]) -> Tuple[int, Any]:
+        endpoint, args = self.route(path)
+        if not endpoint:
+            return 404, {"error": "Not Found"}
+        if "id" in args and args["id"] not in self._by_id:
+            return 404, {"error": "coin not found"}
+        if endpoint == "/global":
+            return 200, self.global_data()
+        if endpoint == "/exchange_rates":
+            return 200, self.exchange_rates()
+        if endpoint == "/coins/markets":
+            return 200, self.markets(query)
+        if endpoint == "/coins/{id}":
+            return 200, self.coin_detail(args["id"])
+        return 200, self.market_chart(args["id"], query)
+
+    def _market_item(self, coin_id: str) -> Dict[str, Any]:
+        rank, (cid, symbol, name) = self._by_id[coin_id]
+        rng = _rng(cid)
+        price = 60000.0 / rank ** 1.5 * rng.uniform(0.8, 1.2)
+        supply = rng.uniform(1e7, 1e10)
+        return {
+            "id": cid,
+            "symbol": symbol,
+            "name": name,
+            "image": f"https://assets.example.com/coins/{cid}.png",
+            "current_price": round(price, 8),
+            "market_cap": round(price * supply, 2),
+            "market_cap_rank": rank,
+            "total_volume": round(price * supply * rng.uniform(0.01, 0.2), 2),
+            "price_change_percentage_24h": round(rng.uniform(-12, 12), 4),
+            "circulating_supply": supply,
+            "total_supply": supply * 1.1,
+            "max_supply": supply * 1.5,
+            "ath": price * rng.uniform(1.1, 4),
+            "atl": price * rng.uniform(0.01, 0.5),
+            "last_updated": time.strftime("%Y-%m-%dT%H:%M:%S.000Z", time.gmtime()),
+        }
+
+    def markets(self, query: Dict[str, str]) -> List[Dict[str, Any]]:
+        if query.get("ids"):
+            ids = [i for i in query["ids"].split(",") if i in self._by_id]
+        else:
+            per_page = int(query.get("per_page", 100))
+            page = int(query.get("page", 1))
+            ids = self.coin_ids[(page - 1) * per_page:page * per_page]
+        return [self._market_item(cid) for cid in ids]
+
+    def coin_detail(self, coin_id: str) -> Dict[str, Any]:
+        item = self._market_item(coin_id)
+        rng = _rng(coin_id, "detail")
+        currencies = ["usd", "eur", "gbp", "jpy", "aud", "cad", "chf", "cny", "inr", "krw", "btc", "eth"]
+        fx = {c: rng.uniform(0.5, 1.5) for c in currencies}
+        fx["usd"] = 1.0
+
+        def per_currency(value: float) -> Dict[str, float]:
+            return {c: value * rate for c, rate in fx.items()}
+
+        return {
+            "id": item["id"],
+            "symbol": item["symbol"],
+            "name": item["name"],
+            "description": {"en": f"{item['name']} is a synthetic coin. " * 40},
+            "links": {"homepage": [f"https://{item['id']}.example.com"], "blockchain_site": [""] * 10},
+            "image": {"thumb": item["image"], "small": item["image"], "large": item["image"]},
+            "market_cap_rank": item["market_cap_rank"],
+            "market_data": {
+                "current_price": per_currency(item["current_price"]),
+                "market_cap": per_currency(item["market_cap"]),
+                "total_volume": per_currency(item["total_volume"]),
+                "ath": per_currency(item["ath"]),
+                "atl": per_currency(item["atl"]),
+                "price_change_percentage_24h": item["price_change_percentage_24h"],
+                "price_change_percentage_7d": round(rng.uniform(-30, 30), 4),
+                "price_change_percentage_30d": round(rng.uniform(-60, 60), 4),
+                "market_cap_rank": item["market_cap_rank"],
+                "circulating_supply": item["circulating_supply"],
+                "total_supply": item["total_supply"],
+                "max_supply": item["max_supply"],
+            },
+        }
+
+    def market_chart(self, coin_id: str, query: Dict[str, str]) -> Dict[str, List[List[float]]]:
+        days = query.get("days", "1")
+        days = 3650 if days == "max" else max(1, int(float(days)))
+        interval = query.get("interval", "")
+        if interval == "daily" or days > 90:
+            step, points = 86400_000, days + 1
+        elif days == 1 and interval != "hourly":
+            step, points = 300_000, 288
+        else:
+            step, points = 3600_000, days * 24
+        now = int(time.time() * 1000) // step * step
+        price = self._market_item(coin_id)["current_price"]
+        rng = _rng(coin_id, days, interval)
+        prices, caps, volumes = [], [], []
+        for i in range(points):
+            ts = now - (points - 1 - i) * step
+            price *= 1 + rng.gauss(0, 0.01)
+            prices.append([ts, price])
+            caps.append([ts, price * 1e7])
+            volumes.append([ts, price * 1e5 * rng.uniform(0.5, 1.5)])
+        return {"prices": prices, "market_caps": caps, "total_volumes": volumes}
+
+    def exchange_rates(self) -> Dict[str, Any]:
+        """BTC-denominated rates like CoinGecko's; fiat rates are fixed multiples of the USD one."""
+        btc_usd = self._market_item("bitcoin")["current_price"] if "bitcoin" in self._by_id else 60000.0
+        units = {
+            "btc": ("Bitcoin", "BTC", 1.0, "crypto"),
+            "eth": ("Ether", "ETH", btc_usd / 3000.0, "crypto"),
+            "usd": ("US Dollar", "$", btc_usd, "fiat"),
+            "eur": ("Euro", "€", btc_usd * 0.92, "fiat"),
+            "gbp": ("British Pound Sterling", "£", btc_usd * 0.79, "fiat"),
+            "jpy": ("Japanese Yen", "¥", btc_usd * 151.0, "fiat"),
+            "inr": ("Indian Rupee", "₹", btc_usd * 83.0, "fiat"),
+        }
+        return {
+            "rates": {
+                code: {"name": name, "unit": unit, "value": value, "type": kind}
+                for code, (name, unit, value, kind) in units.items()
+            }
+        }
+
+    def global_data(self) -> Dict[str, Any]:
+        return {
+            "data": {
+                "active_cryptocurrencies": len(self.coins),
+                "total_market_cap": {"usd": 2.5e12},
+                "total_volume": {"usd": 9.5e10},
+                "market_cap_percentage": {"btc": 52.1, "eth": 17.3},
+                "market_cap_change_percentage_24h_usd": 1.2,
+            }
+        }
@@ -0,0 +1,75 @@
+import tempfile
+
+import requests
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+
+from coins.services import fetch_global_market_data, fetch_top_coins
+from .loadtest import cache_hit_ratios, parse_mix, percentile, summarize
+from .microbench import BENCHMARKS, compare, time_benchmark
+from .simulator import CoinGeckoSimulator, LatencyModel
+
+
+class TestLoadTestReporting(SimpleTestCase):
+    def test_parse_mix_normalizes_weights(self):
+        self.assertEqual(parse_mix("top=3, chat=1"), {"top": 0.75, "chat": 0.25})
+        with self.assertRaises(ValueError):
+            parse_mix("nope=1")
+
+    def test_percentiles_use_nearest_rank(self):
+        values = [i / 1000 for i in range(1, 101)]
+        self.assertEqual(percentile(values, 50), 0.05)
+        self.assertEqual(percentile(values, 99), 0.099)
+        self.assertEqual(summarize(values, errors=2)["p95_ms"], 95.0)
+
+    def test_cache_hit_ratio_uses_counter_deltas(self):
+        hit = (("family", "coingecko_top"), ("result", "hit"))
+        miss = (("family", "coingecko_top"), ("result", "miss"))
+        ratios = cache_hit_ratios({hit: 5, miss: 5}, {hit: 8, miss: 6})
+        self.assertEqual(ratios["coingecko_top"], {"hits": 3, "misses": 1, "hit_ratio": 0.75})
+
+
+class TestCoinGeckoSimulator(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_services_cache_through_simulator(self):
+        with CoinGeckoSimulator(coins=20) as sim, override_settings(COINGECKO_API_BASE=sim.url):
+            first = fetch_top_coins(limit=5)
+            second = fetch_top_coins(limit=5)
+            self.assertEqual([c["id"] for c in first][:2], ["bitcoin", "ethereum"])
+            self.assertEqual(first, second)
+            self.assertEqual(sim.calls["/coins/markets"], 1)
+
+    def test_injected_429_falls_back_to_default_payload(self):
+        with CoinGeckoSimulator(error_rate_429=1.0) as sim, override_settings(COINGECKO_API_BASE=sim.url):
+            data = fetch_global_market_data()
+            self.assertEqual(data["data"]["active_cryptocurrencies"], 25)
+            self.assertEqual(sim.statuses[429], 1)
+
+    def test_record_then_replay(self):
+        with tempfile.TemporaryDirectory() as data_dir:
+            with CoinGeckoSimulator(coins=20) as origin:
+                with CoinGeckoSimulator(mode="record", data_dir=data_dir, upstream=origin.url) as recorder:
+                    recorded = requests.get(f"{recorder.url}/coins/solana", timeout=5).json()
+            with CoinGeckoSimulator(mode="replay", data_dir=data_dir, strict=True) as replay:
+                self.assertEqual(requests.get(f"{replay.url}/coins/solana", timeout=5).json(), recorded)
+                self.assertEqual(requests.get(f"{replay.url}/coins/tron", timeout=5).status_code, 404)
+
+    def test_latency_models(self):
+        self.assertEqual(LatencyModel("50").sample(), 0.05)
+        self.assertTrue(0.02 <= LatencyModel("uniform:20:30").sample() <= 0.03)
+        with self.assertRaises(ValueError):
+            LatencyModel("gamma:1")
+
+
+class TestMicrobench(SimpleTestCase):
+    def test_compare_flags_calibrated_slowdowns(self):
+        baseline = {"a": {"best_us": 10.0, "relative": 1.0}, "b": {"best_us": 10.0, "relative": 1.0}}
+        results = {"a": {"best_us": 20.0, "relative": 1.1}, "b": {"best_us": 12.0, "relative": 1.4}, "c": {"best_us": 1.0, "relative": 1.0}}
+        rows = {name: regressed for name, _, _, _, regressed in compare(results, baseline, threshold=0.25)}
+        self.assertEqual(rows, {"a": False, "b": True})
+
+    def test_registered_benchmarks_run(self):
+        timing = time_benchmark(BENCHMARKS["coins.rank_movers[100 rows]"](), repeat=1, min_time=0.01)
+        self.assertGreater(timing["best_us"], 0)